@@ -0,0 +1,242 @@
+"""
+Streaming export of attendance by course, department and date range.
+
+Rows are fetched ``EXPORT_ARRAYSIZE`` at a time and written as they arrive,
+so memory stays bounded however many rows match. Two formats:
+
+* ``csv`` - plain text, gzip-compressed when the file name ends in ``.gz``;
+* ``parquet`` - compressed columnar file written one row group at a time;
+  needs the optional ``pyarrow`` package.
+
+Usage:
+    python attendance_export.py out.csv --course C101
+    python attendance_export.py out.parquet --department "Computer Science" --from 2024-01-01 --to 2024-06-30
+"""
+import argparse
+import csv
+import datetime
+import gzip
+import logging
+import sys
+import time
+
+from database import DB_ERRORS
+from attendance_queries import as_date
+from statements import DATE, KEY, VARCHAR2, dynamic, execute
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Only CSV exports are available without it
+    pyarrow = None
+
+EXPORT_ARRAYSIZE = 5000  # rows per fetch round trip
+ROW_GROUP_ROWS = 100000  # rows buffered per Parquet row group
+
+EXPORT_COLUMNS = ("attendance_id", "student_id", "student_name", "department_name",
+                  "course_id", "course_name", "date_attended", "status")
+
+# Ordered like attendance_course_date_ix, so a course export reads the index in order
+EXPORT_QUERY = """
+    SELECT a.attendance_id, a.student_id,
+           s.first_name || ' ' || COALESCE(s.last_name, '') AS student_name,
+           s.department_name, a.course_id, c.course_name, a.date_attended, a.status
+    FROM attendance a
+    JOIN students s ON s.student_id = a.student_id
+    JOIN courses c ON c.course_id = a.course_id
+    WHERE 1 = 1{filters}
+    ORDER BY a.course_id, a.date_attended, a.student_id
+"""
+
+COUNT_QUERY = """
+    SELECT COUNT(*)
+    FROM attendance a
+    JOIN students s ON s.student_id = a.student_id
+    WHERE 1 = 1{filters}
+"""
+
+# Filter -> (predicate, type of the value it binds under the same name)
+FILTER_PREDICATES = {
+    'course_id': ("a.course_id = :course_id", KEY),
+    'department': ("s.department_name = :department", VARCHAR2(100)),
+    'date_from': ("a.date_attended >= :date_from", DATE),
+    'date_to': ("a.date_attended < :date_to", DATE),
+}
+
+
+def filtered_statement(kind, template, names):
+    """Registered statement for one combination of filters (16 at most per kind)."""
+    return dynamic(f"{kind} [{', '.join(names)}]", lambda: (
+        template.format(filters="".join(f"\n      AND {FILTER_PREDICATES[name][0]}" for name in names)),
+        {name: FILTER_PREDICATES[name][1] for name in names},
+    ))
+
+
+def build_filters(course_id=None, department=None, date_from=None, date_to=None):
+    """Returns (names of the filters in use, binds); ``date_to`` is inclusive."""
+    values = {
+        'course_id': course_id,
+        'department': department,
+        'date_from': date_from,
+        # Half-open upper bound keeps the predicate index friendly
+        'date_to': date_to + datetime.timedelta(days=1) if date_to is not None else None,
+    }
+    binds = {name: value for name, value in values.items() if value is not None}
+    return tuple(binds), binds
+
+
+def fetch_chunks(cursor, arraysize=EXPORT_ARRAYSIZE):
+    """Yields lists of up to ``arraysize`` rows until the cursor is exhausted."""
+    while True:
+        rows = cursor.fetchmany(arraysize)
+        if not rows:
+            return
+        yield rows
+
+
+class CsvExportWriter:
+    """Writes rows as CSV with a header; gzip when the path ends in .gz."""
+
+    def __init__(self, path):
+        opener = gzip.open if path.endswith(".gz") else open
+        self._file = opener(path, "wt", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EXPORT_COLUMNS)
+
+    def write(self, rows):
+        self._writer.writerows(
+            (attendance_id, student_id, student_name, department, course_id, course_name,
+             as_date(day).isoformat(), status)
+            for attendance_id, student_id, student_name, department, course_id, course_name, day, status in rows
+        )
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetExportWriter:
+    """Writes rows as zstd-compressed Parquet, one row group per ROW_GROUP_ROWS."""
+
+    def __init__(self, path):
+        if pyarrow is None:
+            raise RuntimeError("Parquet export needs the pyarrow package (pip install pyarrow).")
+        self.schema = pyarrow.schema([
+            ("attendance_id", pyarrow.int64()),
+            ("student_id", pyarrow.string()),
+            ("student_name", pyarrow.string()),
+            ("department_name", pyarrow.string()),
+            ("course_id", pyarrow.string()),
+            ("course_name", pyarrow.string()),
+            ("date_attended", pyarrow.date32()),
+            ("status", pyarrow.string()),
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression="zstd")
+        self._buffer = []
+
+    def write(self, rows):
+        self._buffer.extend(rows)
+        if len(self._buffer) >= ROW_GROUP_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        columns = [list(column) for column in zip(*self._buffer)]
+        columns[0] = [int(value) for value in columns[0]]
+        columns[6] = [as_date(value) for value in columns[6]]
+        arrays = [pyarrow.array(column, type=field.type) for column, field in zip(columns, self.schema)]
+        self._writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self.schema))
+        self._buffer = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+WRITERS = {
+    'csv': CsvExportWriter,
+    'parquet': ParquetExportWriter,
+}
+
+
+def format_for(path):
+    """Picks the export format from a file name."""
+    return 'parquet' if path.lower().endswith(".parquet") else 'csv'
+
+
+def count_rows(cursor, filters, backend=None):
+    names, binds = build_filters(**filters)
+    execute(cursor, filtered_statement("count attendance export", COUNT_QUERY, names), binds, backend)
+    return cursor.fetchone()[0]
+
+
+def export_rows(cursor, writer, filters, progress=None, arraysize=EXPORT_ARRAYSIZE, backend=None):
+    """Streams the attendance matching ``filters`` into ``writer``.
+
+    Args:
+        filters: keyword arguments for build_filters().
+        progress: optional callable(rows written) called after each fetch.
+
+    Returns:
+        int: rows written.
+    """
+    names, binds = build_filters(**filters)
+    cursor.arraysize = arraysize
+    if hasattr(cursor, "prefetchrows"):
+        cursor.prefetchrows = arraysize
+    execute(cursor, filtered_statement("export attendance", EXPORT_QUERY, names), binds, backend)
+    written = 0
+    for rows in fetch_chunks(cursor, arraysize):
+        writer.write(rows)
+        written += len(rows)
+        if progress:
+            progress(written)
+    return written
+
+
+class _ProgressPrinter:
+    def __init__(self, total):
+        self.total = total
+        self.started = self.last = time.monotonic()
+
+    def __call__(self, written):
+        now = time.monotonic()
+        if now - self.last < 2:
+            return
+        self.last = now
+        rate = written / max(now - self.started, 1e-9)
+        share = f" ({written * 100 / self.total:.0f}%)" if self.total else ""
+        print(f"  {written:,} rows{share}, {rate:,.0f} rows/s", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export attendance to CSV or Parquet.")
+    parser.add_argument("path", help="output file: .csv, .csv.gz or .parquet")
+    parser.add_argument("--course", dest="course_id")
+    parser.add_argument("--department")
+    parser.add_argument("--from", dest="date_from", type=datetime.date.fromisoformat, help="YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", type=datetime.date.fromisoformat, help="YYYY-MM-DD, inclusive")
+    parser.add_argument("--no-count", action="store_true", help="skip counting rows for the progress display")
+    args = parser.parse_args(argv)
+    filters = {'course_id': args.course_id, 'department': args.department,
+               'date_from': args.date_from, 'date_to': args.date_to}
+    # Imported here: repository imports this module
+    from repository import get_repository
+
+    repository = get_repository()
+    try:
+        total = None if args.no_count else repository.count_attendance_export(**filters)
+        if total is not None:
+            print(f"Exporting {total:,} rows to {args.path} ...")
+        started = time.monotonic()
+        written = repository.export_attendance(args.path, progress=_ProgressPrinter(total), **filters)
+    except (OSError, RuntimeError, *DB_ERRORS) as e:
+        logging.error(f"Attendance export to {args.path} failed: {e}")
+        print(f"Export failed: {e}")
+        return 1
+    print(f"Exported {written:,} rows in {time.monotonic() - started:.1f} s.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""
+Streaming import of attendance from CSV.
+
+The file has one ``student_id,date,status`` row per mark (a header row is
+optional), dates as YYYY-MM-DD and statuses Present/Absent/Leave or the
+roster grid's P/A/L shortcuts. Rows are read lazily and written in
+fixed-size executemany batches, so memory depends on the batch size and the
+course, never on the file:
+
+    python attendance_import.py C101 semester.csv
+    python attendance_import.py C101 semester.csv --dry-run
+
+Rows for students not enrolled in the course (checked against the cached
+roster), malformed rows and dates the student already has a mark for are
+skipped and reported with their line number; everything else is imported
+in one transaction together with its attendance_summary counters.
+"""
+import argparse
+import calendar
+import csv
+import datetime
+import logging
+import sys
+import time
+
+from database import DB_ERRORS, current_backend
+from attendance_queries import SAVE_ATTENDANCE_INSERT, as_date, day_range
+from attendance_summary import apply_transitions
+from statements import DATE, KEY, execute, executemany_batch, register
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000  # further rejected rows are only counted
+RANGE_GAP_DAYS = 3  # unread dates this close together are read in one range, e.g. across a weekend
+
+STATUS_ALIASES = {
+    'present': 'Present', 'p': 'Present',
+    'absent': 'Absent', 'a': 'Absent',
+    'leave': 'Leave', 'l': 'Leave',
+}
+
+# Marks the course already has over one span of dates
+EXISTING_MARKS_QUERY = register('import existing marks', """
+    SELECT student_id, date_attended
+    FROM attendance
+    WHERE course_id = :cid
+      AND date_attended >= :day_start
+      AND date_attended < :day_end
+""", {'cid': KEY, 'day_start': DATE, 'day_end': DATE})
+
+
+class ImportResult:
+    """Counts of an import plus the first MAX_REPORTED_ERRORS rejected rows."""
+
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.rejected = 0
+        self.errors = []  # (line number, student_id, message)
+
+    def reject(self, line_number, student_id, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_number, student_id, message))
+
+
+def read_csv(stream):
+    """Yields (line number, fields) for each non-blank row, skipping a header."""
+    for line_number, fields in enumerate(csv.reader(stream), start=1):
+        if not any(field.strip() for field in fields):
+            continue
+        if line_number == 1 and fields[0].strip().lower() == 'student_id':
+            continue
+        yield line_number, fields
+
+
+def parse_record(fields, roster):
+    """Returns (student_id, date, status) or raises ValueError with the reason."""
+    if len(fields) != 3:
+        raise ValueError(f"expected 3 columns (student_id, date, status), got {len(fields)}")
+    student_id, day_text, status_text = (field.strip() for field in fields)
+    if student_id not in roster:
+        raise ValueError("student is not enrolled in this course")
+    try:
+        day = datetime.date.fromisoformat(day_text)
+    except ValueError:
+        raise ValueError(f"invalid date {day_text!r}, expected YYYY-MM-DD") from None
+    status = STATUS_ALIASES.get(status_text.lower())
+    if status is None:
+        raise ValueError(f"invalid status {status_text!r}, expected Present, Absent or Leave")
+    return student_id, day, status
+
+
+def _date_spans(days, gap=RANGE_GAP_DAYS):
+    """Groups sorted dates into (first, last) spans, joining dates at most ``gap`` days apart."""
+    spans = []
+    for day in days:
+        if spans and (day - spans[-1][1]).days <= gap:
+            spans[-1][1] = day
+        else:
+            spans.append([day, day])
+    return [tuple(span) for span in spans]
+
+
+class ExistingMarks:
+    """
+    The students a course already has a mark for, per date, for the dates
+    around the current batch.
+
+    Each batch only asks for the dates not read yet, in a few date spans, so
+    an unsorted file (whose batches all span the same months) does not
+    re-read them for every batch. Rows the import inserts are added as it
+    goes. After a batch, dates outside its span are dropped, so memory is
+    bounded by the course's marks over one batch's span, not by the file.
+    """
+
+    def __init__(self, cursor, course_id, backend):
+        self.cursor = cursor
+        self.course_id = course_id
+        self.backend = backend
+        self.days = {}  # date -> set of student ids marked on it
+
+    def load(self, days):
+        """Reads the marks of any of ``days`` not read yet."""
+        for first, last in _date_spans(sorted(set(days) - self.days.keys())):
+            for n in range((last - first).days + 1):
+                self.days[first + datetime.timedelta(days=n)] = set()
+            day_start, _ = day_range(first)
+            _, day_end = day_range(last)
+            execute(self.cursor, EXISTING_MARKS_QUERY,
+                    {'cid': self.course_id, 'day_start': day_start, 'day_end': day_end}, self.backend)
+            for student_id, day in self.cursor:
+                self.days[as_date(day)].add(student_id)
+
+    def retain(self, first, last):
+        """Forgets every date outside [first, last]."""
+        for day in [day for day in self.days if day < first or day > last]:
+            del self.days[day]
+
+    def __contains__(self, key):
+        student_id, day = key
+        return student_id in self.days.get(day, ())
+
+    def add(self, key):
+        student_id, day = key
+        self.days[day].add(student_id)
+
+    def discard(self, key):
+        student_id, day = key
+        self.days[day].discard(student_id)
+
+
+def _write_batch(cursor, course_id, batch, backend, result, existing):
+    """Inserts one batch of (line, student_id, date, status) rows not yet marked."""
+    days = {row[2] for row in batch}
+    existing.retain(min(days), max(days))
+    existing.load(days)
+    fresh = []
+    for line_number, student_id, day, status in batch:
+        if (student_id, day) in existing:
+            result.reject(line_number, student_id, f"attendance for {day} is already recorded")
+            continue
+        existing.add((student_id, day))  # a repeat later in the file is a duplicate too
+        fresh.append((line_number, student_id, day, status))
+    rows = [(course_id, day, student_id, calendar.day_name[day.weekday()], status)
+            for _, student_id, day, status in fresh]
+    _, errors = executemany_batch(cursor, SAVE_ATTENDANCE_INSERT, rows, backend)
+    failed = set()
+    for offset, message in errors:
+        failed.add(offset)
+        existing.discard((fresh[offset][1], fresh[offset][2]))
+        result.reject(fresh[offset][0], fresh[offset][1], message)
+    apply_transitions(cursor, course_id, [
+        (row[2], None, row[4]) for offset, row in enumerate(rows) if offset not in failed
+    ], backend)
+    result.imported += len(rows) - len(failed)
+
+
+def import_attendance(cursor, course_id, records, roster, backend=None,
+                      batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Imports (line number, fields) records for one course in batches.
+
+    Args:
+        roster: the set of student ids enrolled in the course.
+        progress: optional callable(rows read) called after each batch.
+
+    Returns:
+        ImportResult. Nothing is committed; the caller owns the transaction.
+    """
+    backend = backend or current_backend()
+    result = ImportResult()
+    existing = ExistingMarks(cursor, course_id, backend)
+    batch = []
+    for line_number, fields in records:
+        result.read += 1
+        try:
+            student_id, day, status = parse_record(fields, roster)
+        except ValueError as e:
+            result.reject(line_number, fields[0].strip() if fields else "", str(e))
+            continue
+        batch.append((line_number, student_id, day, status))
+        if len(batch) >= batch_size:
+            _write_batch(cursor, course_id, batch, backend, result, existing)
+            batch = []
+            if progress:
+                progress(result.read)
+    if batch:
+        _write_batch(cursor, course_id, batch, backend, result, existing)
+    if progress:
+        progress(result.read)
+    return result
+
+
+class _ProgressPrinter:
+    def __init__(self):
+        self.started = self.last = time.monotonic()
+
+    def __call__(self, read):
+        now = time.monotonic()
+        if now - self.last < 2:
+            return
+        self.last = now
+        rate = read / max(now - self.started, 1e-9)
+        print(f"  {read:,} rows read, {rate:,.0f} rows/s", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import attendance for one course from a CSV file.")
+    parser.add_argument("course_id")
+    parser.add_argument("path", help="CSV with student_id,date,status rows")
+    parser.add_argument("--dry-run", action="store_true", help="validate and roll back")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    # Imported here: repository imports this module
+    from repository import get_repository
+
+    try:
+        with open(args.path, newline="", encoding="utf-8-sig") as f:
+            result = get_repository().import_attendance(
+                args.course_id, read_csv(f), dry_run=args.dry_run, batch_size=args.batch_size,
+                progress=_ProgressPrinter(),
+            )
+    except (OSError, *DB_ERRORS) as e:
+        logging.error(f"Attendance import of {args.path} failed: {e}")
+        print(f"Import failed: {e}")
+        return 1
+    for line_number, student_id, message in result.errors:
+        print(f"line {line_number} ({student_id}): {message}")
+    if result.rejected > len(result.errors):
+        print(f"... and {result.rejected - len(result.errors)} more rejected rows")
+    verb = "Would import" if args.dry_run else "Imported"
+    print(f"{verb} {result.imported:,} of {result.read:,} rows; {result.rejected:,} rejected.")
+    return 1 if result.rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
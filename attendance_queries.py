@@ -0,0 +1,401 @@
+"""
+Set-based queries behind the attendance windows.
+
+These functions take an open cursor and contain no Tk code, so they can be
+timed and checked against the SQLite stand-in as well as Oracle. Their
+statements are registered in statements.py.
+"""
+import calendar
+import datetime
+
+from database import current_backend
+from attendance_summary import apply_transitions, resync_pairs
+from statements import (
+    DATE, DAY_NAME, KEY, NUMBER, STATUS, execute, executemany, executemany_batch, executemany_rowcounts, register,
+)
+
+def day_range(day):
+    """Returns the half-open [day, next day) bounds as native date binds.
+
+    Comparing the bare column against these keeps date predicates usable by
+    an index, unlike TRUNC(column) = TO_DATE(text).
+    """
+    if isinstance(day, datetime.datetime):
+        day = day.date()
+    return day, day + datetime.timedelta(days=1)
+
+
+def as_date(value):
+    """Returns a fetched date column as a datetime.date.
+
+    oracledb returns DATE columns as datetime.datetime and sqlite3 as text.
+    """
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+ROSTER_WITH_STATUS_QUERY = register('roster with status', """
+    SELECT s.student_id,
+           (s.first_name || ' ' || COALESCE(s.last_name, '')) AS student_name,
+           (SELECT MAX(a.status)
+              FROM attendance_status_view a
+             WHERE a.STUDENT_ID = s.student_id
+               AND a.COURSE_ID = s.course_id
+               AND a.DATE_ATTENDED >= :day_start
+               AND a.DATE_ATTENDED < :day_end) AS attendance_status,
+           (SELECT COUNT(*)
+              FROM leave_requests lr
+             WHERE lr.STUDENT_ID = s.student_id
+               AND lr.COURSE_ID = s.course_id
+               AND lr.LEAVE_DATE >= :day_start
+               AND lr.LEAVE_DATE < :day_end
+               AND lr.STATUS = 'Approved') AS approved_leaves
+    FROM course_students_view s
+    WHERE s.course_id = :course_id
+    ORDER BY s.student_id
+""", {'course_id': KEY, 'day_start': DATE, 'day_end': DATE})
+
+
+def fetch_roster_with_status(cursor, course_id, selected_date, backend=None):
+    """Loads a course roster with each student's status for one date.
+
+    One round trip replaces the per-student attendance and leave lookups.
+    The status is the recorded attendance if there is one, otherwise
+    'Leave' for an approved leave request and 'Absent' for everyone else.
+
+    Returns:
+        list: (student_id, student_name, status) tuples ordered by student_id.
+    """
+    day_start, day_end = day_range(selected_date)
+    execute(cursor, ROSTER_WITH_STATUS_QUERY, {
+        'course_id': course_id,
+        'day_start': day_start,
+        'day_end': day_end,
+    }, backend)
+    roster = []
+    for student_id, student_name, attendance_status, approved_leaves in cursor.fetchall():
+        if attendance_status:
+            status = attendance_status
+        elif approved_leaves:
+            status = "Leave"
+        else:
+            status = "Absent"
+        roster.append((student_id, student_name, status))
+    return roster
+
+
+# Records shown in the teacher's AttendanceRecordsWindow for one date
+COURSE_RECORDS_QUERY = register('course records', """
+    SELECT student_id, formatted_date, STATUS
+    FROM attendance_records_view
+    WHERE COURSE_ID = :cid
+      AND DATE_ATTENDED >= :day_start
+      AND DATE_ATTENDED < :day_end
+    ORDER BY student_id ASC, DATE_ATTENDED ASC
+""", {'cid': KEY, 'day_start': DATE, 'day_end': DATE})
+
+# Records shown in the student's AttendanceRecordsWindow for one date
+STUDENT_RECORDS_QUERY = register('student records', """
+    SELECT date_attended, status
+    FROM STUDENT_ATTENDANCE_VIEW
+    WHERE course_id = :cid
+      AND student_id = :sid
+      AND date_attended >= :day_start
+      AND date_attended < :day_end
+    ORDER BY date_attended ASC
+""", {'cid': KEY, 'sid': KEY, 'day_start': DATE, 'day_end': DATE})
+
+ATTENDANCE_MARKED_QUERY = register('attendance already marked', """
+    SELECT 1
+    FROM attendance_check_view
+    WHERE COURSE_ID = :cid
+      AND DATE_ATTENDED >= :day_start
+      AND DATE_ATTENDED < :day_end
+""", {'cid': KEY, 'day_start': DATE, 'day_end': DATE})
+
+# Teacher home summary: one row per assigned course with its roster size,
+# the day's marks by status and the requests still waiting for a decision.
+# The day's marks come from a single grouped pass over attendance_course_date_ix
+# for all of the teacher's courses; the two counts are index-only probes.
+TEACHER_COURSE_SUMMARY_QUERY = register('teacher course summary', """
+    SELECT tc.course_id, tc.course_name,
+           (SELECT COUNT(*)
+              FROM enrollments e
+             WHERE e.course_id = tc.course_id) AS roster_size,
+           COALESCE(marks.present_count, 0) AS present_count,
+           COALESCE(marks.absent_count, 0) AS absent_count,
+           COALESCE(marks.leave_count, 0) AS leave_count,
+           COALESCE(marks.marked_count, 0) AS marked_count,
+           (SELECT COUNT(*)
+              FROM leave_requests lr
+             WHERE lr.status = 'Pending'
+               AND lr.course_id = tc.course_id) AS pending_leaves
+    FROM teacher_courses_view tc
+    LEFT JOIN (
+        SELECT a.course_id,
+               SUM(CASE WHEN a.status = 'Present' THEN 1 ELSE 0 END) AS present_count,
+               SUM(CASE WHEN a.status = 'Absent' THEN 1 ELSE 0 END) AS absent_count,
+               SUM(CASE WHEN a.status = 'Leave' THEN 1 ELSE 0 END) AS leave_count,
+               COUNT(*) AS marked_count
+          FROM attendance a
+         WHERE a.course_id IN (SELECT course_id FROM assignments WHERE teacher_id = :teacher_id)
+           AND a.date_attended >= :day_start
+           AND a.date_attended < :day_end
+         GROUP BY a.course_id
+    ) marks ON marks.course_id = tc.course_id
+    WHERE tc.teacher_id = :teacher_id
+    ORDER BY tc.course_id
+""", {'teacher_id': KEY, 'day_start': DATE, 'day_end': DATE})
+
+
+def fetch_teacher_course_summary(cursor, teacher_id, selected_date, backend=None):
+    """Loads the home summary for every course assigned to a teacher.
+
+    Returns:
+        list: (course_id, course_name, roster_size, present, absent, leave,
+        marked, pending_leaves) tuples ordered by course_id; ``marked`` is 0
+        for a course without attendance on the date.
+    """
+    day_start, day_end = day_range(selected_date)
+    execute(cursor, TEACHER_COURSE_SUMMARY_QUERY, {
+        'teacher_id': teacher_id,
+        'day_start': day_start,
+        'day_end': day_end,
+    }, backend)
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+# Saves one (course_id, date, student_id, day name, status) row. Oracle keeps
+# calling save_attendance_proc, bound to the whole batch in one round trip;
+# SQLite has no procedures and inserts the row (keyed by its rowid).
+SAVE_ATTENDANCE_INSERT = register('save attendance', {
+    'oracle': """
+        BEGIN save_attendance_proc(:1, :2, :3, :4, :5); END;
+    """,
+    'sqlite': """
+        INSERT INTO attendance (course_id, date_attended, student_id, day_attended, status)
+        VALUES (:1, :2, :3, :4, :5)
+    """,
+}, (KEY, DATE, KEY, DAY_NAME, STATUS))
+
+
+def attendance_already_marked(cursor, course_id, selected_date, backend=None):
+    """Returns True if any attendance exists for the course on the date."""
+    day_start, day_end = day_range(selected_date)
+    execute(cursor, ATTENDANCE_MARKED_QUERY, {
+        'cid': course_id,
+        'day_start': day_start,
+        'day_end': day_end,
+    }, backend)
+    return cursor.fetchone() is not None
+
+
+def save_attendance_bulk(cursor, course_id, selected_date, statuses, backend=None):
+    """Inserts a whole day's attendance for a course in one batched call.
+
+    Args:
+        statuses: iterable of (student_id, status) pairs.
+
+    Returns:
+        list: (student_id, error message) for rows the database rejected.
+        The caller owns the transaction and decides whether to commit; the
+        attendance_summary counters for the inserted rows are in it too.
+    """
+    backend = backend or current_backend()
+    day_name = calendar.day_name[selected_date.weekday()]
+    rows = [(course_id, selected_date, student_id, day_name, status) for student_id, status in statuses]
+    _, errors = executemany_batch(cursor, SAVE_ATTENDANCE_INSERT, rows, backend)
+    rejected = {offset for offset, _ in errors}
+    apply_transitions(cursor, course_id, [
+        (row[2], None, row[4]) for offset, row in enumerate(rows) if offset not in rejected
+    ], backend)
+    return [(rows[offset][2], message) for offset, message in errors]
+
+
+# Current statuses of a course's rows for one date, read (and on Oracle
+# locked) before an update so the summary counters can be adjusted.
+RECORDED_STATUSES_QUERY = register('recorded statuses', {
+    'oracle': """
+        SELECT student_id, status
+        FROM attendance
+        WHERE course_id = :cid
+          AND date_attended >= :day_start
+          AND date_attended < :day_end
+        FOR UPDATE
+    """,
+    'sqlite': """
+        SELECT student_id, status
+        FROM attendance
+        WHERE course_id = :cid
+          AND date_attended >= :day_start
+          AND date_attended < :day_end
+    """,
+}, {'cid': KEY, 'day_start': DATE, 'day_end': DATE})
+
+
+def recorded_statuses(cursor, course_id, selected_date, backend=None):
+    """Returns {student_id: [status, ...]} for the attendance rows of a date."""
+    day_start, day_end = day_range(selected_date)
+    execute(cursor, RECORDED_STATUSES_QUERY, {
+        'cid': course_id,
+        'day_start': day_start,
+        'day_end': day_end,
+    }, backend)
+    recorded = {}
+    for student_id, status in cursor.fetchall():
+        recorded.setdefault(student_id, []).append(status)
+    return recorded
+
+
+UPDATE_ATTENDANCE_STATEMENT = register('update attendance', """
+    UPDATE attendance_update_view
+    SET STATUS = :1
+    WHERE STUDENT_ID = :2
+      AND COURSE_ID = :3
+      AND DATE_ATTENDED >= :4
+      AND DATE_ATTENDED < :5
+""", (STATUS, KEY, KEY, DATE, DATE))
+
+
+def changed_statuses(snapshot, current):
+    """Returns (student_id, status) pairs whose status differs from the snapshot."""
+    return [(student_id, status) for student_id, status in current.items()
+            if snapshot.get(student_id) != status]
+
+
+def update_attendance_changes(cursor, course_id, selected_date, changes, backend=None):
+    """Writes only the changed statuses for a date as one batched UPDATE.
+
+    Args:
+        changes: (student_id, status) pairs, usually from changed_statuses().
+
+    Returns:
+        tuple: (rows updated, list of (student_id, error message)).
+        The caller owns the transaction and decides whether to commit; the
+        attendance_summary counters for the updated rows are in it too.
+    """
+    backend = backend or current_backend()
+    recorded = recorded_statuses(cursor, course_id, selected_date, backend)
+    day_start, day_end = day_range(selected_date)
+    rows = [(status, student_id, course_id, day_start, day_end) for student_id, status in changes]
+    touched, errors = executemany_batch(cursor, UPDATE_ATTENDANCE_STATEMENT, rows, backend)
+    rejected = {offset for offset, _ in errors}
+    apply_transitions(cursor, course_id, [
+        (student_id, old, status)
+        for offset, (student_id, status) in enumerate(changes) if offset not in rejected
+        for old in recorded.get(student_id, ())
+    ], backend)
+    return touched, [(rows[offset][1], message) for offset, message in errors]
+
+
+# Marks one student's attendance as 'Leave' for an approved leave date,
+# inserting the row if the date has not been marked yet. SQLite has no
+# MERGE, so it runs the update and the conditional insert separately.
+MARK_LEAVE_BINDS = {'sid': KEY, 'cid': KEY, 'day_start': DATE, 'day_end': DATE, 'day': DAY_NAME}
+
+MARK_LEAVE_STATEMENTS = {
+    'oracle': [register('mark leave (merge)', {'oracle': """
+        MERGE INTO attendance_merge_view a
+        USING (SELECT :sid AS student_id,
+                      :cid AS course_id,
+                      :day_start AS date_attended,
+                      :day AS day_attended,
+                      'Leave' AS status
+               FROM dual) s
+        ON (a.STUDENT_ID = s.student_id AND a.COURSE_ID = s.course_id
+            AND a.DATE_ATTENDED >= s.date_attended AND a.DATE_ATTENDED < :day_end)
+        WHEN NOT MATCHED THEN
+            INSERT (STUDENT_ID, COURSE_ID, DATE_ATTENDED, DAY_ATTENDED, STATUS)
+            VALUES (s.student_id, s.course_id, s.date_attended, s.day_attended, s.status)
+        WHEN MATCHED THEN
+            UPDATE SET a.STATUS = s.status, a.DAY_ATTENDED = s.day_attended
+    """}, MARK_LEAVE_BINDS)],
+    'sqlite': [register('mark leave (update)', {'sqlite': """
+        UPDATE attendance
+        SET status = 'Leave', day_attended = :day
+        WHERE student_id = :sid
+          AND course_id = :cid
+          AND date_attended >= :day_start
+          AND date_attended < :day_end
+    """}, MARK_LEAVE_BINDS), register('mark leave (insert)', {'sqlite': """
+        INSERT INTO attendance (student_id, course_id, date_attended, day_attended, status)
+        SELECT :sid, :cid, :day_start, :day, 'Leave'
+        WHERE NOT EXISTS (SELECT 1 FROM attendance
+                          WHERE student_id = :sid
+                            AND course_id = :cid
+                            AND date_attended >= :day_start
+                            AND date_attended < :day_end)
+    """}, MARK_LEAVE_BINDS)],
+}
+
+
+def mark_leave_attendance(cursor, leaves, backend=None):
+    """Records 'Leave' attendance for approved leave requests in batched calls.
+
+    Args:
+        leaves: (student_id, course_id, leave_date) triples, leave_date a
+            datetime.date.
+
+    The caller owns the transaction and decides whether to commit; the
+    attendance_summary counters of the affected students are recomputed in
+    it too.
+    """
+    backend = backend or current_backend()
+    rows = []
+    for student_id, course_id, leave_date in leaves:
+        day_start, day_end = day_range(leave_date)
+        rows.append({
+            'sid': student_id,
+            'cid': course_id,
+            'day_start': day_start,
+            'day_end': day_end,
+            'day': calendar.day_name[leave_date.weekday()],
+        })
+    if not rows:
+        return
+    for statement in MARK_LEAVE_STATEMENTS[backend]:
+        executemany(cursor, statement, rows, backend)
+    resync_pairs(cursor, [(student_id, course_id) for student_id, course_id, _ in leaves], backend)
+
+
+# Only a request that is still pending can be decided; one the student has
+# dismissed or another decision got to first matches no row.
+LEAVE_DECISION_STATEMENT = register('decide leave request', """
+    UPDATE leave_requests_update_view
+    SET status = :status
+    WHERE REQUEST_ID = :rid
+      AND STATUS = 'Pending'
+""", {'status': STATUS, 'rid': NUMBER})
+
+
+def decide_leave_requests(cursor, requests, status, backend=None):
+    """Sets the status of many leave requests in one batched UPDATE.
+
+    Each request is found by its primary key, so every row of the batch is
+    a single-row index lookup. Requests that are no longer pending are left
+    alone and reported back.
+
+    Args:
+        requests: (request_id, student_id, course_id, leave_date) tuples.
+        status: 'Approved' or 'Rejected'. Approving also marks the leave
+            dates of the requests it changed as 'Leave' attendance.
+
+    Returns:
+        tuple: (list of (request, error message) for requests the database
+        rejected, list of requests that were no longer pending). The caller
+        owns the transaction and should roll back if any failed.
+    """
+    backend = backend or current_backend()
+    rows = [{'status': status, 'rid': request[0]} for request in requests]
+    counts, errors = executemany_rowcounts(cursor, LEAVE_DECISION_STATEMENT, rows, backend)
+    if errors:
+        return [(requests[offset], message) for offset, message in errors], []
+    decided = [request for request, count in zip(requests, counts) if count]
+    stale = [request for request, count in zip(requests, counts) if not count]
+    if status == 'Approved':
+        mark_leave_attendance(cursor, [(student_id, course_id, leave_date)
+                                       for _, student_id, course_id, leave_date in decided], backend)
+    return [], stale
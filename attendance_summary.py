@@ -0,0 +1,283 @@
+"""
+Running attendance totals per (student, course).
+
+ATTENDANCE_STATS_VIEW aggregates a student's whole attendance history on
+every read. The ``attendance_summary`` table instead keeps present, absent,
+leave and total counters keyed by (student_id, course_id), so the stats
+window reads one row by primary key.
+
+Every code path that writes attendance applies its changes here in the same
+transaction (see attendance_queries). If the counters ever drift, rebuild
+them from the attendance table:
+
+    python attendance_summary.py verify    # exit status 1 on mismatches
+    python attendance_summary.py rebuild
+"""
+import argparse
+import collections
+import logging
+import sys
+
+from database import DB_ERRORS, connection, current_backend, error_info
+from statements import KEY, NUMBER, execute, executemany, register
+
+STATUS_COLUMNS = {"Present": 0, "Absent": 1, "Leave": 2}
+
+# Adds deltas to a (student, course) row, creating it on first use.
+APPLY_DELTAS = register('apply summary deltas', {
+    'oracle': """
+        MERGE INTO attendance_summary s
+        USING (SELECT :1 AS student_id, :2 AS course_id, :3 AS present_delta,
+                      :4 AS absent_delta, :5 AS leave_delta, :6 AS total_delta
+               FROM dual) d
+        ON (s.student_id = d.student_id AND s.course_id = d.course_id)
+        WHEN MATCHED THEN
+            UPDATE SET s.present_count = s.present_count + d.present_delta,
+                       s.absent_count = s.absent_count + d.absent_delta,
+                       s.leave_count = s.leave_count + d.leave_delta,
+                       s.total_count = s.total_count + d.total_delta
+        WHEN NOT MATCHED THEN
+            INSERT (student_id, course_id, present_count, absent_count, leave_count, total_count)
+            VALUES (d.student_id, d.course_id, d.present_delta, d.absent_delta, d.leave_delta, d.total_delta)
+    """,
+    'sqlite': """
+        INSERT INTO attendance_summary (student_id, course_id, present_count, absent_count, leave_count, total_count)
+        VALUES (:1, :2, :3, :4, :5, :6)
+        ON CONFLICT (student_id, course_id) DO UPDATE SET
+            present_count = present_count + excluded.present_count,
+            absent_count = absent_count + excluded.absent_count,
+            leave_count = leave_count + excluded.leave_count,
+            total_count = total_count + excluded.total_count
+    """,
+}, (KEY, KEY, NUMBER, NUMBER, NUMBER, NUMBER))
+
+AGGREGATE_SELECT = """
+    SELECT student_id, course_id,
+           SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN status = 'Absent' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN status = 'Leave' THEN 1 ELSE 0 END),
+           COUNT(*)
+    FROM attendance
+"""
+
+SUMMARY_COLUMNS = "(student_id, course_id, present_count, absent_count, leave_count, total_count)"
+
+STATS_QUERY = register('attendance stats', """
+    SELECT s.present_count, s.absent_count, s.leave_count, s.total_count,
+           (SELECT MAX(asg.total_classes) FROM assignments asg WHERE asg.course_id = s.course_id)
+    FROM attendance_summary s
+    WHERE s.student_id = :sid AND s.course_id = :cid
+""", {'sid': KEY, 'cid': KEY})
+
+# Counters of every course a student is enrolled in, for the dashboard's
+# course list: one probe of enrollments_student_course_ix plus a primary-key
+# read of attendance_summary per course, however many courses there are.
+STUDENT_COURSE_STATS_QUERY = register('student course stats', """
+    SELECT ce.course_id, ce.course_name,
+           COALESCE(s.present_count, 0), COALESCE(s.absent_count, 0), COALESCE(s.leave_count, 0),
+           COALESCE(s.total_count, 0),
+           (SELECT MAX(asg.total_classes) FROM assignments asg WHERE asg.course_id = ce.course_id)
+    FROM course_enrollment_view ce
+    LEFT JOIN attendance_summary s
+      ON s.student_id = ce.student_id AND s.course_id = ce.course_id
+    WHERE ce.student_id = :sid
+    ORDER BY ce.course_id
+""", {'sid': KEY})
+
+# Pairs whose stored counters differ from the attendance table, both ways
+VERIFY_QUERY = register('verify summary', """
+    SELECT a.student_id, a.course_id,
+           s.present_count, s.absent_count, s.leave_count, s.total_count,
+           a.present_count, a.absent_count, a.leave_count, a.total_count
+    FROM (
+        SELECT student_id, course_id,
+               SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END) AS present_count,
+               SUM(CASE WHEN status = 'Absent' THEN 1 ELSE 0 END) AS absent_count,
+               SUM(CASE WHEN status = 'Leave' THEN 1 ELSE 0 END) AS leave_count,
+               COUNT(*) AS total_count
+        FROM attendance
+        GROUP BY student_id, course_id
+    ) a
+    LEFT JOIN attendance_summary s
+      ON s.student_id = a.student_id AND s.course_id = a.course_id
+    WHERE s.student_id IS NULL
+       OR s.present_count <> a.present_count OR s.absent_count <> a.absent_count
+       OR s.leave_count <> a.leave_count OR s.total_count <> a.total_count
+    UNION ALL
+    SELECT s.student_id, s.course_id,
+           s.present_count, s.absent_count, s.leave_count, s.total_count,
+           0, 0, 0, 0
+    FROM attendance_summary s
+    WHERE s.total_count <> 0
+      AND NOT EXISTS (SELECT 1 FROM attendance a
+                      WHERE a.student_id = s.student_id AND a.course_id = s.course_id)
+""")
+
+RESYNC_DELETE = register(
+    'resync summary (delete)',
+    "DELETE FROM attendance_summary WHERE student_id = :1 AND course_id = :2",
+    (KEY, KEY),
+)
+RESYNC_INSERT = register(
+    'resync summary (insert)',
+    f"INSERT INTO attendance_summary {SUMMARY_COLUMNS} {AGGREGATE_SELECT}"
+    " WHERE student_id = :1 AND course_id = :2 GROUP BY student_id, course_id",
+    (KEY, KEY),
+)
+
+# Full rebuild; Oracle keeps attendance writers out until the new counters are in
+REBUILD_STATEMENTS = (
+    register('lock attendance', {'oracle': "LOCK TABLE attendance IN SHARE MODE"}),
+    register('clear summary', "DELETE FROM attendance_summary"),
+    register('rebuild summary', f"INSERT INTO attendance_summary {SUMMARY_COLUMNS} {AGGREGATE_SELECT}"
+                                " GROUP BY student_id, course_id"),
+)
+SUMMARY_COUNT_QUERY = register('count summary rows', "SELECT COUNT(*) FROM attendance_summary")
+
+
+def summary_deltas(course_id, transitions):
+    """Turns status transitions into per-student counter deltas.
+
+    Args:
+        transitions: (student_id, old status, new status) triples; old is
+            None for a newly inserted row and new is None for a deleted one.
+
+    Returns:
+        list: (student_id, course_id, present, absent, leave, total) deltas,
+        leaving out students whose counters do not change.
+    """
+    totals = collections.defaultdict(lambda: [0, 0, 0, 0])
+    for student_id, old, new in transitions:
+        counters = totals[student_id]
+        if old is not None:
+            counters[STATUS_COLUMNS[old]] -= 1
+            counters[3] -= 1
+        if new is not None:
+            counters[STATUS_COLUMNS[new]] += 1
+            counters[3] += 1
+    return [(student_id, course_id, *counters)
+            for student_id, counters in totals.items() if any(counters)]
+
+
+def apply_transitions(cursor, course_id, transitions, backend=None):
+    """Adds status transitions for one course to the summary in one batched call.
+
+    The caller owns the transaction, so the counters commit or roll back
+    together with the attendance rows they describe.
+
+    On Oracle two sessions can both find no row for a new (student, course)
+    pair and both insert it; the loser gets ORA-00001. Its batch is rolled
+    back to a savepoint and run once more, when the MERGE finds the row.
+    """
+    rows = summary_deltas(course_id, transitions)
+    if not rows:
+        return 0
+    backend = backend or current_backend()
+    if backend != 'oracle':
+        executemany(cursor, APPLY_DELTAS, rows, backend)
+        return len(rows)
+    cursor.execute("SAVEPOINT summary_deltas")
+    try:
+        executemany(cursor, APPLY_DELTAS, rows, backend)
+    except DB_ERRORS as e:
+        if error_info(e)[0] != 1:
+            raise
+        cursor.execute("ROLLBACK TO SAVEPOINT summary_deltas")
+        executemany(cursor, APPLY_DELTAS, rows, backend)
+    return len(rows)
+
+
+def resync_pairs(cursor, pairs, backend=None):
+    """Recomputes the counters of the given (student_id, course_id) pairs.
+
+    For writes that bypass attendance_queries, such as the CRUD window. Each
+    pair is an index range read on attendance; nothing is committed.
+    """
+    pairs = list(set(pairs))
+    if not pairs:
+        return
+    executemany(cursor, RESYNC_DELETE, pairs, backend)
+    executemany(cursor, RESYNC_INSERT, pairs, backend)
+
+
+def fetch_stats(cursor, student_id, course_id, backend=None):
+    """Returns (present, absent, leave, recorded, planned classes) or None."""
+    execute(cursor, STATS_QUERY, {'sid': student_id, 'cid': course_id}, backend)
+    return cursor.fetchone()
+
+
+def fetch_student_course_stats(cursor, student_id, backend=None):
+    """Returns (course_id, course_name, present, absent, leave, recorded,
+    planned classes) for every course the student is enrolled in."""
+    execute(cursor, STUDENT_COURSE_STATS_QUERY, {'sid': student_id}, backend)
+    return cursor.fetchall()
+
+
+def percentages(present, absent, leave, recorded, planned):
+    """Returns (classes, present %, absent %, leave %).
+
+    Percentages are of the planned classes when the assignment sets them,
+    otherwise of the classes recorded so far.
+    """
+    classes = planned or recorded
+    if not classes:
+        return classes, 0.0, 0.0, 0.0
+    return classes, present * 100 / classes, absent * 100 / classes, leave * 100 / classes
+
+
+def rebuild(conn, backend=None):
+    """Recomputes every counter from the attendance table and commits.
+
+    Returns:
+        int: number of (student, course) rows written.
+    """
+    backend = backend or current_backend()
+    cursor = conn.cursor()
+    try:
+        for statement in REBUILD_STATEMENTS:
+            if statement.runs_on(backend):
+                execute(cursor, statement, backend=backend)
+        execute(cursor, SUMMARY_COUNT_QUERY, backend=backend)
+        count = cursor.fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return count
+
+
+def verify(conn):
+    """Compares the summary with the attendance table.
+
+    Returns:
+        list: (student_id, course_id, stored counters, actual counters) for
+        every pair that disagrees; empty when the summary is correct.
+    """
+    cursor = conn.cursor()
+    execute(cursor, VERIFY_QUERY)
+    mismatches = [(row[0], row[1], tuple(row[2:6]), tuple(row[6:10])) for row in cursor]
+    cursor.close()
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check or rebuild the attendance_summary table.")
+    parser.add_argument("command", choices=("verify", "rebuild"))
+    args = parser.parse_args(argv)
+    with connection() as conn:
+        if args.command == "rebuild":
+            count = rebuild(conn)
+            print(f"Rebuilt attendance_summary: {count} (student, course) rows.")
+            return 0
+        mismatches = verify(conn)
+    for student_id, course_id, stored, actual in mismatches:
+        logging.error(f"attendance_summary mismatch for {student_id}/{course_id}: stored {stored}, actual {actual}")
+        print(f"{student_id} {course_id}: stored {stored}, actual {actual}")
+    print(f"{len(mismatches)} mismatched (student, course) rows.")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Cold-start import budget for the LoginForm entry point.
+
+Runs ``python -X importtime -c "import LoginForm"`` in fresh interpreters,
+reports the median cumulative import time and the slowest modules, and
+fails (exit status 1) if the median exceeds the budget or if any module
+that should only load after login is imported at startup.
+
+Usage: python benchmarks/bench_import_time.py [--budget-ms 75] [--runs 7] [--module LoginForm]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_BUDGET_MS = 75.0
+
+# Loaded on demand after the login window is up; never at startup
+DEFERRED_MODULES = (
+    "teacher_dashboard", "student_dashboard", "crud_window", "tkcalendar",
+    "database", "repository", "statements", "prefetch", "oracledb", "cx_Oracle", "sqlite3", "uuid", "calendar",
+)
+
+
+def import_profile(module):
+    """Returns {module: (self us, cumulative us)} from one fresh interpreter."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    profile = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(self_us), int(cumulative_us))
+    return profile
+
+
+def run(module, runs, budget_ms):
+    profiles = [import_profile(module) for _ in range(runs)]
+    totals = [profile[module][1] / 1000 for profile in profiles]
+    median = statistics.median(totals)
+    loaded = set(profiles[-1])
+
+    print(f"import {module}: median {median:.1f} ms over {runs} runs "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}), {len(loaded)} modules, budget {budget_ms:.0f} ms")
+    slowest = sorted(profiles[-1].items(), key=lambda item: item[1][0], reverse=True)[:10]
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"  {self_us / 1000:7.2f} ms self  {cumulative_us / 1000:7.2f} ms cumulative  {name}")
+
+    failures = []
+    early = sorted(name for name in loaded if name.split(".")[0] in DEFERRED_MODULES)
+    if early:
+        failures.append(f"imported at startup but should load on demand: {', '.join(early)}")
+    if median > budget_ms:
+        failures.append(f"median import time {median:.1f} ms is over the {budget_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the LoginForm cold-start import budget.")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--module", default="LoginForm")
+    args = parser.parse_args(argv)
+    return run(args.module, args.runs, args.budget_ms)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
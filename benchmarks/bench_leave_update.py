@@ -0,0 +1,105 @@
+"""
+Leave-decision benchmark: content-matched UPDATE vs primary-key UPDATE.
+
+Fills leave_requests with a large number of rows, then times deciding a
+batch of them the old way (matching student, course name subquery, date and
+reason text) and by request_id, and prints each statement's query plan.
+
+Usage: python benchmarks/bench_leave_update.py [table rows] [decisions]
+"""
+import datetime
+import sys
+
+from common import sqlite_pool, timed
+
+import database
+from attendance_queries import LEAVE_DECISION_STATEMENT
+
+LEGACY_DECISION_STATEMENT = """
+    UPDATE leave_requests_update_view
+    SET status = :status
+    WHERE STUDENT_ID = :sid
+      AND COURSE_ID = (SELECT course_id FROM course_name_id_view WHERE course_name = :cname)
+      AND LEAVE_DATE = TO_DATE(:ldate, 'YYYY-MM-DD')
+      AND REASON = :reason
+"""
+
+COURSES = 20
+STUDENTS = 500
+FIRST_DAY = datetime.date(2024, 1, 1)
+
+
+def seed(conn, total):
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO courses (course_id, course_name) VALUES (:1, :2)",
+                       [(f"C{c:03d}", f"Course {c:03d}") for c in range(COURSES)])
+    cursor.executemany(
+        "INSERT INTO students (student_id, first_name, department_name, email, password) "
+        "VALUES (:1, :2, 'Dept', :3, 'pw')",
+        [(f"S{s:05d}", f"First{s}", f"s{s:05d}@university.edu.pk") for s in range(STUDENTS)])
+    rows = []
+    for i in range(total):
+        day = FIRST_DAY + datetime.timedelta(days=i % 365)
+        rows.append((f"S{i % STUDENTS:05d}", f"C{i % COURSES:03d}", day, f"Reason {i % 7}", "Pending"))
+    cursor.executemany(
+        "INSERT INTO leave_requests (student_id, course_id, leave_date, reason, status) "
+        "VALUES (:1, :2, :3, :4, :5)", rows)
+    conn.commit()
+    cursor.close()
+
+
+def sample(conn, decisions):
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT request_id, student_id, course_name, TO_CHAR(leave_date, 'YYYY-MM-DD'), reason "
+        "FROM pending_leave_requests_view ORDER BY request_id")
+    rows = cursor.fetchall()
+    cursor.close()
+    step = max(1, len(rows) // decisions)
+    return rows[::step][:decisions]
+
+
+def decide(conn, statement, binds):
+    cursor = conn.cursor()
+    cursor.executemany(statement, binds)
+    conn.rollback()  # Leave the table unchanged between repeats
+    cursor.close()
+
+
+def plan(conn, statement, binds):
+    cursor = conn.cursor()
+    cursor.execute("EXPLAIN QUERY PLAN " + statement, binds)
+    details = [row[-1] for row in cursor.fetchall()]
+    cursor.close()
+    return "; ".join(details)
+
+
+def run(total, decisions):
+    pool = sqlite_pool()
+    with database.connection() as conn:
+        seed(conn, total)
+        picked = sample(conn, decisions)
+        legacy = [{'status': 'Approved', 'sid': sid, 'cname': cname, 'ldate': ldate, 'reason': reason}
+                  for _, sid, cname, ldate, reason in picked]
+        keyed = [{'status': 'Approved', 'rid': rid} for rid, *_ in picked]
+
+        # The views are backed by INSTEAD OF triggers here; plan the base-table lookups
+        legacy_lookup = LEGACY_DECISION_STATEMENT.replace("UPDATE leave_requests_update_view\n    SET status = :status",
+                                                          "SELECT request_id FROM leave_requests")
+        keyed_lookup = LEAVE_DECISION_STATEMENT.sql('sqlite').replace("UPDATE leave_requests_update_view\n    SET status = :status",
+                                                        "SELECT request_id FROM leave_requests")
+        print(f"legacy plan: {plan(conn, legacy_lookup, {k: v for k, v in legacy[0].items() if k != 'status'})}")
+        print(f"keyed plan:  {plan(conn, keyed_lookup, {'rid': keyed[0]['rid']})}")
+
+        legacy_time, _ = timed(decide, conn, LEGACY_DECISION_STATEMENT, legacy, repeat=3)
+        keyed_time, _ = timed(decide, conn, LEAVE_DECISION_STATEMENT.sql('sqlite'), keyed, repeat=3)
+    pool.close()
+
+    print(f"{'rows':>10} {'decisions':>10} | {'legacy ms':>10} {'keyed ms':>10} {'speedup':>8}")
+    print(f"{total:>10} {len(picked):>10} | {legacy_time * 1000:>10.1f} {keyed_time * 1000:>10.1f} "
+          f"{legacy_time / keyed_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    run(args[0] if args else 200000, args[1] if len(args) > 1 else 100)
@@ -0,0 +1,125 @@
+"""
+Login latency benchmark: two LOWER(email) queries vs one indexed round trip.
+
+Generates a university with a large students table, then times logging in
+(a teacher, a student near the end of the table, and a failed attempt)
+three ways: the old teacher-then-student queries without the case-insensitive
+email indexes, the same queries with them, and repository.LOGIN_QUERY. A
+burst of concurrent logins through the pool imitates the start of a lecture
+slot.
+
+Usage: python benchmarks/bench_login.py [students] [burst logins]
+"""
+import statistics
+import sys
+import threading
+import time
+
+from common import sqlite_pool, timed
+from generate_data import Config, generate
+
+import database
+from repository import LOGIN_QUERY
+
+LEGACY_TEACHER_QUERY = "SELECT teacher_id FROM teachers WHERE LOWER(email) = LOWER(:email) AND password = :password"
+LEGACY_STUDENT_QUERY = "SELECT student_id FROM students WHERE LOWER(email) = LOWER(:email) AND password = :password"
+
+EMAIL_INDEXES = {
+    'teachers_email_lower_ix': "CREATE INDEX teachers_email_lower_ix ON teachers (LOWER(email))",
+    'students_email_lower_ix': "CREATE INDEX students_email_lower_ix ON students (LOWER(email))",
+}
+
+BURST_THREADS = 8
+
+
+def legacy_login(conn, binds):
+    cursor = conn.cursor()
+    cursor.execute(LEGACY_TEACHER_QUERY, binds)
+    row = cursor.fetchone()
+    if row is None:
+        cursor.execute(LEGACY_STUDENT_QUERY, binds)
+        row = cursor.fetchone()
+    cursor.close()
+    return row
+
+
+def single_login(conn, binds):
+    cursor = conn.cursor()
+    cursor.execute(LOGIN_QUERY.sql('sqlite'), binds)
+    row = cursor.fetchone()
+    cursor.close()
+    return row
+
+
+def set_email_indexes(conn, present):
+    cursor = conn.cursor()
+    for name, statement in EMAIL_INDEXES.items():
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        if present:
+            cursor.execute(statement)
+    conn.commit()
+    cursor.close()
+
+
+def burst(login, attempts, logins):
+    """Runs ``logins`` logins from BURST_THREADS threads, each on a pooled session."""
+    latencies = []
+    lock = threading.Lock()
+    per_thread = logins // BURST_THREADS
+
+    def worker(offset):
+        for i in range(per_thread):
+            binds = attempts[(offset + i) % len(attempts)]
+            started = time.perf_counter()
+            with database.connection() as conn:
+                login(conn, binds)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(BURST_THREADS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95)], len(latencies) / wall
+
+
+def run(students, logins):
+    pool = sqlite_pool()
+    departments = 10
+    config = Config(departments, 10, 1, students // departments, 1, 0, 1, 0.0, 0.0, 0)
+    with database.connection() as conn:
+        generate(conn, config)
+    last_student = f"S{students:07d}"
+    attempts = [
+        {'email': 'T0050@University.edu.pk', 'password': 'pw'},
+        {'email': f"{last_student}@UNIVERSITY.edu.pk", 'password': 'pw'},
+        {'email': 'nobody@university.edu.pk', 'password': 'pw'},
+    ]
+    labels = ("teacher", "student", "failed")
+
+    print(f"{students:,} students")
+    print(f"{'path':>28} | " + " ".join(f"{label + ' ms':>11}" for label in labels)
+          + f" | {'burst p50':>9} {'p95 ms':>8} {'logins/s':>9}")
+    for name, login, indexed in (("two queries, no index", legacy_login, False),
+                                 ("two queries, indexed", legacy_login, True),
+                                 ("one round trip, indexed", single_login, True)):
+        with database.connection() as conn:
+            set_email_indexes(conn, indexed)
+            times = []
+            for binds in attempts:
+                best, row = timed(login, conn, binds, repeat=5)
+                times.append(best)
+        p50, p95, rate = burst(login, attempts, logins)
+        print(f"{name:>28} | " + " ".join(f"{t * 1000:>11.3f}" for t in times)
+              + f" | {p50 * 1000:>9.3f} {p95 * 1000:>8.3f} {rate:>9.0f}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    run(args[0] if args else 200000, args[1] if len(args) > 1 else 400)
@@ -0,0 +1,98 @@
+"""
+Roster load benchmark for AttendanceWindow.
+
+Compares the old per-student lookups (one attendance query plus, for
+unmarked students, one leave query, each on its own connection) with
+attendance_queries.fetch_roster_with_status, and shows that the new path's
+round trips stay constant as the roster grows.
+
+Usage: python benchmarks/bench_roster_load.py [roster sizes...]
+"""
+import sys
+
+from common import BENCH_DAY, CountingConnection, seed_course, sqlite_pool, timed
+
+from attendance_queries import fetch_roster_with_status
+
+LEGACY_STATUS_QUERY = """
+    SELECT status
+    FROM attendance_status_view
+    WHERE STUDENT_ID = :student_id
+      AND COURSE_ID = :course_id
+      AND TRUNC(DATE_ATTENDED) = TO_DATE(:date_attended, 'YYYY-MM-DD')
+"""
+
+LEGACY_LEAVE_QUERY = """
+    SELECT 1
+    FROM leave_requests
+    WHERE STUDENT_ID = :student_id
+      AND COURSE_ID = :course_id
+      AND TRUNC(LEAVE_DATE) = TO_DATE(:date_attended, 'YYYY-MM-DD')
+      AND STATUS = 'Approved'
+"""
+
+
+def legacy_load(pool, course_id, selected_date, counter):
+    """The pre-change load_students: roster query, then N+1 lookups."""
+    params_date = selected_date.strftime('%Y-%m-%d')
+    conn = CountingConnection(pool.acquire(), counter)
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT s.student_id, (s.first_name || ' ' || s.last_name) FROM course_students_view s "
+        "WHERE s.course_id = :course_id ORDER BY s.student_id",
+        {'course_id': course_id},
+    )
+    roster = []
+    for student_id, student_name in cursor.fetchall():
+        params = {'student_id': student_id, 'course_id': course_id, 'date_attended': params_date}
+        status_conn = CountingConnection(pool.acquire(), counter)
+        status_cursor = status_conn.cursor()
+        status_cursor.execute(LEGACY_STATUS_QUERY, params)
+        result = status_cursor.fetchone()
+        status_conn.close()
+        if result:
+            status = result[0]
+        else:
+            leave_conn = CountingConnection(pool.acquire(), counter)
+            leave_cursor = leave_conn.cursor()
+            leave_cursor.execute(LEGACY_LEAVE_QUERY, params)
+            status = "Leave" if leave_cursor.fetchone() else "Absent"
+            leave_conn.close()
+        roster.append((student_id, student_name, status))
+    conn.close()
+    return roster
+
+
+def set_based_load(pool, course_id, selected_date, counter):
+    conn = CountingConnection(pool.acquire(), counter)
+    cursor = conn.cursor()
+    roster = fetch_roster_with_status(cursor, course_id, selected_date)
+    conn.close()
+    return roster
+
+
+def run(sizes):
+    pool = sqlite_pool()
+    with pool.connection() as conn:
+        for size in sizes:
+            seed_course(conn, f"C{size}", size, BENCH_DAY)
+
+    print(f"{'students':>8} | {'legacy trips':>12} {'conns':>6} {'ms':>9} | {'set-based trips':>15} {'conns':>6} {'ms':>9}")
+    for size in sizes:
+        course_id = f"C{size}"
+        results = []
+        for loader in (legacy_load, set_based_load):
+            counter = {'round_trips': 0}
+            acquired_before = pool.stats()['acquired']
+            loader(pool, course_id, BENCH_DAY, counter)
+            connections = pool.stats()['acquired'] - acquired_before
+            seconds, roster = timed(loader, pool, course_id, BENCH_DAY, {'round_trips': 0})
+            results.append((counter['round_trips'], connections, seconds * 1000, roster))
+        (legacy_trips, legacy_conns, legacy_ms, legacy_roster), (new_trips, new_conns, new_ms, new_roster) = results
+        assert legacy_roster == new_roster, "Loaders disagree on the roster statuses"
+        print(f"{size:>8} | {legacy_trips:>12} {legacy_conns:>6} {legacy_ms:>9.2f} | {new_trips:>15} {new_conns:>6} {new_ms:>9.2f}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    run([int(arg) for arg in sys.argv[1:]] or [10, 100, 300, 1000])
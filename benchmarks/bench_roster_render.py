@@ -0,0 +1,88 @@
+"""
+Render-time benchmark for the AttendanceWindow roster.
+
+Times drawing a roster and redrawing it for a new date, using the old
+layout (a Label and three Radiobuttons gridded per student) and RosterGrid.
+Needs a display; on a headless box run it under xvfb-run.
+
+Usage: python benchmarks/bench_roster_render.py [roster sizes...]
+"""
+import sys
+import time
+import tkinter as tk
+
+import common  # noqa: F401  (puts the repository root on sys.path)
+
+from roster_grid import STATUSES, RosterGrid
+
+
+def make_roster(size):
+    return [(f"S{i:05d}", f"First{i} Last{i}", STATUSES[i % 3]) for i in range(size)]
+
+
+def count_widgets(widget):
+    return sum(1 + count_widgets(child) for child in widget.winfo_children())
+
+
+def legacy_render(frame, roster, widgets):
+    """The pre-change load_students_on_date: destroy everything, re-grid every row."""
+    for row_widgets in widgets.values():
+        for widget in row_widgets:
+            widget.destroy()
+    widgets.clear()
+    for row_num, (student_id, student_name, status) in enumerate(roster, start=1):
+        var = tk.StringVar(value=status)
+        row_widgets = [tk.Label(frame, text=f"{student_id} - {student_name}", font=("Arial", 12))]
+        row_widgets[0].grid(row=row_num, column=0, sticky="w", padx=10, pady=5)
+        for column, value in enumerate(STATUSES, start=1):
+            radio = tk.Radiobutton(frame, text=value, variable=var, value=value)
+            radio.grid(row=row_num, column=column, padx=5)
+            row_widgets.append(radio)
+        widgets[student_id] = row_widgets
+
+
+def measure(root, draw):
+    started = time.perf_counter()
+    draw()
+    root.update_idletasks()
+    return (time.perf_counter() - started) * 1000
+
+
+def run(sizes):
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"No display available ({e}); run under xvfb-run.")
+        return 1
+    root.geometry("750x700")
+
+    print(f"{'students':>8} | {'legacy ms':>10} {'redraw ms':>10} {'widgets':>8} | "
+          f"{'grid ms':>8} {'redraw ms':>10} {'widgets':>8}")
+    for size in sizes:
+        roster = make_roster(size)
+        shifted = [(sid, name, STATUSES[(i + 1) % 3]) for i, (sid, name, _) in enumerate(roster)]
+
+        legacy_frame = tk.Frame(root)
+        legacy_frame.pack(fill="both", expand=True)
+        widgets = {}
+        legacy_first = measure(root, lambda: legacy_render(legacy_frame, roster, widgets))
+        legacy_again = measure(root, lambda: legacy_render(legacy_frame, shifted, widgets))
+        legacy_count = count_widgets(legacy_frame)
+        legacy_frame.destroy()
+
+        grid = RosterGrid(root)
+        grid.pack(fill="both", expand=True)
+        root.update()
+        grid_first = measure(root, lambda: grid.set_roster(roster))
+        grid_again = measure(root, lambda: grid.set_roster(shifted))
+        grid_count = count_widgets(grid)
+        grid.destroy()
+
+        print(f"{size:>8} | {legacy_first:>10.1f} {legacy_again:>10.1f} {legacy_count:>8} | "
+              f"{grid_first:>8.1f} {grid_again:>10.1f} {grid_count:>8}")
+    root.destroy()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run([int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000]))
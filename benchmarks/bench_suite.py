@@ -0,0 +1,274 @@
+"""
+End-to-end benchmark of every dashboard data path.
+
+Times the repository calls behind each screen (login, course lists, roster
+load, saving and updating attendance, records, stats, overall attendance,
+leave listing and approval, CRUD browsing) against a generated dataset and
+writes the timings as JSON, so runs can be compared over time:
+
+    python benchmarks/generate_data.py --scale medium --sqlite bench_data.db
+    python benchmarks/bench_suite.py --sqlite bench_data.db --output before.json
+    ... change something ...
+    python benchmarks/bench_suite.py --sqlite bench_data.db --output after.json --compare before.json
+
+Without ``--sqlite`` a small dataset is generated in memory first. The write
+paths add attendance and leave requests on dates after the existing history,
+so the dataset grows a little with every run.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from common import sqlite_pool
+from generate_data import SCALES, generate
+
+import database
+import statements
+from repository import get_repository
+
+RESULT_FORMAT = 1
+CRUD_PAGES = 5
+
+SUBJECT_COURSE_QUERY = """
+    SELECT course_id FROM enrollments
+    GROUP BY course_id
+    ORDER BY COUNT(*) DESC, course_id
+"""
+
+SUBJECT_TEACHER_QUERY = """
+    SELECT teacher_id, email, password FROM teachers
+    WHERE teacher_id = (SELECT MIN(teacher_id) FROM assignments WHERE course_id = :cid)
+"""
+
+SUBJECT_STUDENT_QUERY = """
+    SELECT student_id, email, password FROM students
+    WHERE student_id = (SELECT MIN(student_id) FROM enrollments WHERE course_id = :cid)
+"""
+
+class Subject:
+    """The course, teacher, student and dates the benchmarks act on."""
+
+    def __init__(self, conn):
+        cursor = conn.cursor()
+        cursor.execute(SUBJECT_COURSE_QUERY)
+        self.course_id = cursor.fetchone()[0]
+        cursor.execute(SUBJECT_TEACHER_QUERY, {'cid': self.course_id})
+        self.teacher_id, self.teacher_email, self.teacher_password = cursor.fetchone()
+        cursor.execute(SUBJECT_STUDENT_QUERY, {'cid': self.course_id})
+        self.student_id, self.student_email, self.student_password = cursor.fetchone()
+        cursor.execute("SELECT MAX(date_attended) FROM attendance WHERE course_id = :cid", {'cid': self.course_id})
+        self.history_day = _as_date(cursor.fetchone()[0])
+        # Write paths use dates after everything already stored
+        cursor.execute("SELECT MAX(date_attended) FROM attendance")
+        latest = _as_date(cursor.fetchone()[0])
+        cursor.execute("SELECT MAX(leave_date) FROM leave_requests")
+        latest_leave = _as_date(cursor.fetchone()[0])
+        cursor.close()
+        self._next_day = max(day for day in (latest, latest_leave) if day is not None)
+
+    def fresh_day(self):
+        """A date with no attendance or leave yet, different on every call."""
+        self._next_day += datetime.timedelta(days=1)
+        return self._next_day
+
+
+def _as_date(value):
+    # MAX() loses SQLite's declared type, so dates come back as ISO text there
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def measure(run, repeat, setup=None):
+    """Times ``run(*setup())`` ``repeat`` times; setup is not timed.
+
+    Returns:
+        dict: min/median/p95/max milliseconds and the rows the last run returned.
+    """
+    timings = []
+    rows = None
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        started = time.perf_counter()
+        result = run(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+        rows = result if isinstance(result, int) else len(result) if hasattr(result, "__len__") else None
+    timings.sort()
+    return {
+        'repeat': repeat,
+        'min_ms': round(timings[0], 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'max_ms': round(timings[-1], 3),
+        'rows': rows,
+    }
+
+
+def cases(repository, subject):
+    """Returns {name: (run, setup)} for every benchmarked path."""
+    course_id, student_id = subject.course_id, subject.student_id
+    roster_ids = [row[0] for row in repository.roster(course_id, subject.history_day)]
+
+    def new_day():
+        return (subject.fresh_day(),)
+
+    def save(day):
+        failed = repository.save_attendance(course_id, day, [(sid, "Present") for sid in roster_ids])
+        if failed:
+            raise RuntimeError(f"save_attendance rejected {len(failed)} rows: {failed[0]}")
+        return len(roster_ids)
+
+    def saved_day():
+        day = subject.fresh_day()
+        save(day)
+        return (day,)
+
+    def update(day):
+        changes = [(sid, "Absent") for sid in roster_ids[::2]]
+        touched, failed = repository.update_attendance(course_id, day, changes)
+        if failed:
+            raise RuntimeError(f"update_attendance rejected {len(failed)} rows: {failed[0]}")
+        return touched
+
+    def pending_requests():
+        day = subject.fresh_day()
+        for sid in roster_ids[:50]:
+            repository.submit_leave_request(sid, course_id, day, "Benchmark")
+        wanted = day.strftime('%Y-%m-%d')
+        requests = [(request_id, sid, cid, day)
+                    for request_id, sid, _, leave_date, _, _, cid in repository.pending_leave_requests()
+                    if leave_date == wanted and cid == course_id]
+        return (requests,)
+
+    def approve(requests):
+        failed, _ = repository.decide_leave_requests(requests, 'Approved')
+        if failed:
+            raise RuntimeError(f"decide_leave_requests rejected {len(failed)} rows: {failed[0]}")
+        return len(requests)
+
+    def browse(table):
+        def run():
+            pager = repository.pager(table)
+            rows, after_key = 0, None
+            for _ in range(CRUD_PAGES):
+                _, page, after_key = repository.fetch_page(pager, after_key)
+                rows += len(page)
+                if after_key is None:
+                    break
+            return rows
+        return run
+
+    return {
+        'login teacher': (lambda: [repository.authenticate(subject.teacher_email, subject.teacher_password)], None),
+        'login student': (lambda: [repository.authenticate(subject.student_email, subject.student_password)], None),
+        'student home (courses with stats)': (lambda: repository.student_course_stats(student_id), None),
+        'teacher home (today summary)': (lambda: repository.teacher_course_summary(subject.teacher_id, subject.history_day), None),
+        'roster load': (lambda: repository.roster(course_id, subject.history_day), None),
+        'save attendance': (save, new_day),
+        'update attendance': (update, saved_day),
+        'course records': (lambda: repository.course_records(course_id, subject.history_day), None),
+        'student records': (lambda: repository.student_records(student_id, course_id, subject.history_day), None),
+        'attendance stats': (lambda: [repository.attendance_stats(student_id, course_id)], None),
+        'overall attendance': (lambda: repository.overall_attendance(student_id, course_id), None),
+        'student leave list': (lambda: repository.student_leave_requests(student_id), None),
+        'pending leave list': (lambda: repository.pending_leave_requests(), None),
+        'leave approval (50)': (approve, pending_requests),
+        f'crud browse students ({CRUD_PAGES} pages)': (browse('students'), None),
+        f'crud browse attendance ({CRUD_PAGES} pages)': (browse('attendance'), None),
+    }
+
+
+def dataset_counts(conn):
+    cursor = conn.cursor()
+    counts = {}
+    for table in ('teachers', 'courses', 'students', 'enrollments', 'attendance', 'leave_requests'):
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = cursor.fetchone()[0]
+    cursor.close()
+    return counts
+
+
+def run_suite(repeat, only=None):
+    """Runs the benchmarks against the shared pool; returns the result document."""
+    repository = get_repository()
+    with database.connection() as conn:
+        subject = Subject(conn)
+        counts = dataset_counts(conn)
+    results = {}
+    statements.cache_stats.reset()
+    for name, (run, setup) in cases(repository, subject).items():
+        if only and not any(word in name for word in only):
+            continue
+        results[name] = measure(run, repeat, setup)
+        print(f"{name:>40}: median {results[name]['median_ms']:9.3f} ms  "
+              f"p95 {results[name]['p95_ms']:9.3f} ms  rows {results[name]['rows']}", flush=True)
+    cache = statements.statement_cache_stats()
+    print(f"statement cache: {cache['hits']:,} hits / {cache['executions']:,} executions "
+          f"({(cache['hit_rate'] or 0) * 100:.1f}%), {cache['cache_size']} statements per session")
+    return {
+        'format': RESULT_FORMAT,
+        'started_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'backend': repository.backend,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'dataset': counts,
+        'subject': {'course_id': subject.course_id, 'teacher_id': subject.teacher_id,
+                    'student_id': subject.student_id, 'day': subject.history_day.isoformat()},
+        'results': results,
+        'statement_cache': cache,
+    }
+
+
+def compare(document, baseline):
+    """Prints the median change of every path present in both documents."""
+    print(f"\n{'path':>40} | {'baseline ms':>11} {'now ms':>10} {'change':>8}")
+    for name, result in document['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before:
+            continue
+        change = (result['median_ms'] / before['median_ms'] - 1) * 100 if before['median_ms'] else 0.0
+        print(f"{name:>40} | {before['median_ms']:>11.3f} {result['median_ms']:>10.3f} {change:>+7.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time every dashboard data path; write JSON results.")
+    parser.add_argument("--sqlite", help="generated SQLite dataset (default: build the small preset in memory)")
+    parser.add_argument("--configured-db", action="store_true", help="benchmark the DB_CONFIG database instead")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", nargs="*", help="run only paths whose name contains one of these words")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    if args.configured_db:
+        database.get_pool()
+    elif args.sqlite:
+        if not os.path.exists(args.sqlite):
+            parser.error(f"{args.sqlite} does not exist; create it with generate_data.py")
+        sqlite_pool(args.sqlite)
+    else:
+        sqlite_pool()
+        with database.connection() as conn:
+            generate(conn, SCALES['small'])
+
+    document = run_suite(args.repeat, args.only)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    print(f"Wrote {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(document, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
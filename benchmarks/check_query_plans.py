@@ -0,0 +1,90 @@
+"""
+Query-plan check for the date-filtered attendance and leave queries.
+
+Runs EXPLAIN QUERY PLAN for each statement against the SQLite stand-in and
+fails if any step scans a table instead of searching an index, or searches a
+date index without a range on its date column. A predicate such as
+TRUNC(date_attended) = TO_DATE(:d, ...) hides the column from the index and
+shows up here as one of the two.
+
+Usage: python benchmarks/check_query_plans.py   (exit status 1 on a scan)
+"""
+import datetime
+import sys
+
+from common import sqlite_pool
+
+import database
+import attendance_queries as queries
+from repository import LOGIN_QUERY
+from attendance_import import EXISTING_MARKS_QUERY
+from attendance_summary import STUDENT_COURSE_STATS_QUERY
+
+# Date column each migrated date index must be searched on
+DATE_INDEXES = {
+    'attendance_course_date_ix': 'date_attended',
+    'attendance_student_course_date_ix': 'date_attended',
+    'leave_requests_course_date_ix': 'leave_date',
+}
+
+DAY = datetime.date(2025, 4, 18)
+DAY_START, DAY_END = queries.day_range(DAY)
+DAY_BINDS = {'day_start': DAY_START, 'day_end': DAY_END}
+LEAVE_BINDS = {'sid': 'S1', 'cid': 'C1', 'day': 'Friday', **DAY_BINDS}
+
+STATEMENTS = {
+    'roster with status': (queries.ROSTER_WITH_STATUS_QUERY, {'course_id': 'C1', **DAY_BINDS}),
+    'attendance already marked': (queries.ATTENDANCE_MARKED_QUERY, {'cid': 'C1', **DAY_BINDS}),
+    'course records': (queries.COURSE_RECORDS_QUERY, {'cid': 'C1', **DAY_BINDS}),
+    'student records': (queries.STUDENT_RECORDS_QUERY, {'cid': 'C1', 'sid': 'S1', **DAY_BINDS}),
+    'recorded statuses': (queries.RECORDED_STATUSES_QUERY, {'cid': 'C1', **DAY_BINDS}),
+    'update attendance': (queries.UPDATE_ATTENDANCE_STATEMENT, ('Present', 'S1', 'C1', DAY_START, DAY_END)),
+    'mark leave (update)': (queries.MARK_LEAVE_STATEMENTS['sqlite'][0], LEAVE_BINDS),
+    'mark leave (insert)': (queries.MARK_LEAVE_STATEMENTS['sqlite'][1], LEAVE_BINDS),
+    'login': (LOGIN_QUERY, {'email': 'T1@University.edu.pk', 'password': 'pw'}),
+    'import existing marks': (EXISTING_MARKS_QUERY, {'cid': 'C1', **DAY_BINDS}),
+    'student course stats': (STUDENT_COURSE_STATS_QUERY, {'sid': 'S1'}),
+    'teacher course summary': (queries.TEACHER_COURSE_SUMMARY_QUERY, {'teacher_id': 'T1', **DAY_BINDS}),
+}
+
+
+def full_scans(cursor, statement, binds, views):
+    """Returns the plan steps that scan a table or skip the date range."""
+    cursor.execute("EXPLAIN QUERY PLAN " + statement.sql('sqlite'), binds)
+    scans = []
+    for row in cursor.fetchall():
+        detail = row[-1]
+        if detail.startswith("SEARCH "):
+            words = detail.split()
+            index = words[words.index("INDEX") + 1] if "INDEX" in words else None
+            if index in DATE_INDEXES and f"{DATE_INDEXES[index]}>" not in detail:
+                scans.append(detail)
+            continue
+        if not detail.startswith("SCAN "):
+            continue
+        target = detail.split()[1]
+        # Constant rows and the row sets INSTEAD OF triggers read are not tables
+        if target == "CONSTANT" or target.lower() in views:
+            continue
+        scans.append(detail)
+    return scans
+
+
+def run():
+    pool = sqlite_pool()
+    failures = 0
+    with database.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT lower(name) FROM sqlite_master WHERE type = 'view'")
+        views = {row[0] for row in cursor.fetchall()}
+        for name, (statement, binds) in STATEMENTS.items():
+            scans = full_scans(cursor, statement, binds, views)
+            print(f"{'FAIL' if scans else 'ok':>4}  {name}" + (f": {'; '.join(scans)}" if scans else ""))
+            failures += bool(scans)
+        cursor.close()
+    pool.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,121 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Benchmarks run against the SQLite stand-in so they work on any machine:
+``sqlite_pool()`` builds an in-memory pool with the application schema and
+``CountingConnection`` counts the round trips a code path makes.
+"""
+import datetime
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import database  # noqa: E402
+
+
+def sqlite_pool(path=":memory:", **overrides):
+    """Returns a SQLite stand-in pool, installed as the process-wide pool."""
+    pool = database.create_pool("sqlite", sqlite_path=path, **overrides)
+    database.set_pool(pool)
+    return pool
+
+
+class CountingCursor:
+    """Cursor wrapper that counts execute/executemany/callproc calls."""
+
+    def __init__(self, cursor, counter):
+        self._cursor = cursor
+        self._counter = counter
+
+    def execute(self, *args, **kwargs):
+        self._counter['round_trips'] += 1
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self._counter['round_trips'] += 1
+        return self._cursor.executemany(*args, **kwargs)
+
+    def callproc(self, *args, **kwargs):
+        self._counter['round_trips'] += 1
+        return self._cursor.callproc(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class CountingConnection:
+    """Connection wrapper whose cursors report into a shared counter."""
+
+    def __init__(self, conn, counter=None):
+        self._conn = conn
+        self.counter = counter if counter is not None else {'round_trips': 0}
+
+    def cursor(self):
+        return CountingCursor(self._conn.cursor(), self.counter)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def seed_course(conn, course_id, students, day, attendance_ratio=0.5, leave_ratio=0.1):
+    """Creates one course with ``students`` enrolled students.
+
+    A share of the students get an attendance row on ``day`` and a share of
+    the rest get an approved leave request, so both status lookups are hit.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO courses (course_id, course_name) VALUES (:1, :2)",
+        (course_id, f"Course {course_id}"),
+    )
+    student_rows = []
+    enrollment_rows = []
+    attendance_rows = []
+    leave_rows = []
+    marked = int(students * attendance_ratio)
+    on_leave = int(students * leave_ratio)
+    for i in range(students):
+        student_id = f"{course_id}-S{i:05d}"
+        student_rows.append((student_id, f"First{i}", f"Last{i}", "Dept",
+                             f"{student_id.lower()}@university.edu.pk", "pw"))
+        enrollment_rows.append((f"{course_id}-E{i:05d}", student_id, course_id))
+        if i < marked:
+            attendance_rows.append((student_id, course_id, day, "Present" if i % 3 else "Absent"))
+        elif i < marked + on_leave:
+            leave_rows.append((student_id, course_id, day, "Sick", "Approved"))
+    cursor.executemany(
+        "INSERT INTO students (student_id, first_name, last_name, department_name, email, password) "
+        "VALUES (:1, :2, :3, :4, :5, :6)", student_rows)
+    cursor.executemany(
+        "INSERT INTO enrollments (enrollment_id, student_id, course_id) VALUES (:1, :2, :3)",
+        enrollment_rows)
+    cursor.executemany(
+        "INSERT INTO attendance (student_id, course_id, date_attended, status) VALUES (:1, :2, :3, :4)",
+        attendance_rows)
+    cursor.executemany(
+        "INSERT INTO leave_requests (student_id, course_id, leave_date, reason, status) "
+        "VALUES (:1, :2, :3, :4, :5)", leave_rows)
+    conn.commit()
+    cursor.close()
+
+
+def timed(func, *args, repeat=5, **kwargs):
+    """Runs ``func`` ``repeat`` times; returns (best seconds, last result)."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+BENCH_DAY = datetime.date(2025, 4, 18)
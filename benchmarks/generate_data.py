@@ -0,0 +1,290 @@
+"""
+Synthetic university generator for benchmarks.
+
+Builds departments, teachers, courses, students, enrollments, daily
+attendance for every class meeting and leave requests, with a fixed random
+seed so two runs produce the same data. Rows are generated lazily and
+written in fixed-size executemany batches, so the large preset (tens of
+millions of attendance rows) never sits in memory at once. The attendance
+counters are rebuilt at the end.
+
+Ids are predictable: teacher ``T0001`` has email ``t0001@university.edu.pk``
+and student ``S0000001`` has ``s0000001@university.edu.pk``, both with
+password ``pw``.
+
+Usage:
+    python benchmarks/generate_data.py --scale medium --sqlite bench_data.db
+    python benchmarks/generate_data.py --scale small --configured-db   # DB_CONFIG backend
+"""
+import argparse
+import calendar
+import collections
+import datetime
+import itertools
+import random
+import sys
+import time
+
+from common import sqlite_pool
+
+import attendance_summary
+import database
+from attendance_queries import SAVE_ATTENDANCE_INSERT
+
+Config = collections.namedtuple("Config", [
+    "departments",           # number of departments
+    "teachers_per_department",
+    "courses_per_teacher",
+    "students_per_department",
+    "courses_per_student",   # drawn from the student's own department
+    "weeks",                 # length of the attendance history
+    "meetings_per_week",     # weekdays each course meets on
+    "absent_rate",
+    "leave_rate",            # share of meetings covered by an approved leave
+    "pending_leaves",        # open requests per department, dated after the history
+])
+
+SCALES = {
+    # ~29k attendance rows: under a second to build, for quick checks
+    'small': Config(3, 4, 2, 100, 4, 12, 2, 0.15, 0.02, 20),
+    # ~3.7M attendance rows: one academic year
+    'medium': Config(8, 6, 3, 600, 5, 52, 3, 0.15, 0.02, 100),
+    # ~31M attendance rows: three academic years of a large university
+    'large': Config(10, 10, 3, 2000, 5, 156, 2, 0.15, 0.02, 500),
+}
+
+FIRST_DAY = datetime.date(2022, 9, 5)  # a Monday
+BATCH_SIZE = 5000
+LEAVE_REASONS = ("Sick", "Family matter", "Medical appointment", "Travel", "Sports event")
+
+INSERT_STATEMENTS = {
+    'teachers': "INSERT INTO teachers (teacher_id, first_name, last_name, department_name, email, password) "
+                "VALUES (:1, :2, :3, :4, :5, :6)",
+    'courses': "INSERT INTO courses (course_id, course_name) VALUES (:1, :2)",
+    'assignments': "INSERT INTO assignments (assignment_id, teacher_id, course_id, total_classes) "
+                   "VALUES (:1, :2, :3, :4)",
+    'students': "INSERT INTO students (student_id, first_name, last_name, department_name, email, password) "
+                "VALUES (:1, :2, :3, :4, :5, :6)",
+    'enrollments': "INSERT INTO enrollments (enrollment_id, student_id, course_id) VALUES (:1, :2, :3)",
+    'leave_requests': "INSERT INTO leave_requests (student_id, course_id, leave_date, reason, status) "
+                      "VALUES (:1, :2, :3, :4, :5)",
+}
+
+
+def expected_attendance_rows(config):
+    """Attendance rows ``config`` produces, before anything is written."""
+    return (config.departments * config.students_per_department * config.courses_per_student
+            * config.weeks * config.meetings_per_week)
+
+
+class University:
+    """Deterministic id layout plus the random choices that go with it."""
+
+    def __init__(self, config, seed=42):
+        self.config = config
+        self.seed = seed
+        rng = random.Random(seed)
+        self.departments = [f"Department {d + 1:02d}" for d in range(config.departments)]
+        self.department_courses = {}
+        self.teacher_department = {}
+        self.course_department = {}
+        self.course_teacher = {}
+        self.course_days = {}
+        teacher_number = course_number = 0
+        for department in self.departments:
+            courses = []
+            for _ in range(config.teachers_per_department):
+                teacher_number += 1
+                teacher_id = f"T{teacher_number:04d}"
+                self.teacher_department[teacher_id] = department
+                for _ in range(config.courses_per_teacher):
+                    course_number += 1
+                    course_id = f"C{course_number:04d}"
+                    courses.append(course_id)
+                    self.course_department[course_id] = department
+                    self.course_teacher[course_id] = teacher_id
+                    self.course_days[course_id] = sorted(rng.sample(range(5), config.meetings_per_week))
+            self.department_courses[department] = courses
+        self.student_courses = {}
+        student_number = 0
+        for department in self.departments:
+            courses = self.department_courses[department]
+            for _ in range(config.students_per_department):
+                student_number += 1
+                picked = rng.sample(courses, min(config.courses_per_student, len(courses)))
+                self.student_courses[f"S{student_number:07d}"] = (department, sorted(picked))
+
+    def class_days(self, course_id):
+        """Every date the course meets on, oldest first."""
+        days = self.course_days[course_id]
+        for week in range(self.config.weeks):
+            monday = FIRST_DAY + datetime.timedelta(weeks=week)
+            for weekday in days:
+                yield monday + datetime.timedelta(days=weekday)
+
+    @property
+    def last_day(self):
+        return FIRST_DAY + datetime.timedelta(weeks=self.config.weeks) - datetime.timedelta(days=1)
+
+    # --- Row generators, in foreign-key order ---
+
+    def teachers(self):
+        for teacher_id, department in self.teacher_department.items():
+            yield (teacher_id, f"Teacher{teacher_id[1:]}", "Staff", department,
+                   f"{teacher_id.lower()}@university.edu.pk", "pw")
+
+    def courses(self):
+        for course_id, department in self.course_department.items():
+            yield course_id, f"{department} Course {course_id}"
+
+    def assignments(self):
+        classes = self.config.weeks * self.config.meetings_per_week
+        for number, (course_id, teacher_id) in enumerate(self.course_teacher.items(), start=1):
+            yield number, teacher_id, course_id, classes
+
+    def students(self):
+        for student_id, (department, _) in self.student_courses.items():
+            yield (student_id, f"First{student_id[1:]}", f"Last{student_id[1:]}", department,
+                   f"{student_id.lower()}@university.edu.pk", "pw")
+
+    def enrollments(self):
+        for student_id, (_, courses) in self.student_courses.items():
+            for course_id in courses:
+                yield f"E{student_id[1:]}-{course_id}", student_id, course_id
+
+    def attendance_and_leaves(self):
+        """Yields ('attendance', row) and ('leave_requests', row) pairs.
+
+        An approved leave and its 'Leave' attendance row are produced
+        together, the way approving a request marks the day.
+        """
+        rng = random.Random(self.seed + 1)
+        absent_rate, leave_rate = self.config.absent_rate, self.config.leave_rate
+        for student_id, (_, courses) in self.student_courses.items():
+            for course_id in courses:
+                for day in self.class_days(course_id):
+                    roll = rng.random()
+                    if roll < leave_rate:
+                        status = "Leave"
+                        yield 'leave_requests', (student_id, course_id, day, rng.choice(LEAVE_REASONS), "Approved")
+                    elif roll < leave_rate + absent_rate:
+                        status = "Absent"
+                    else:
+                        status = "Present"
+                    yield 'attendance', (course_id, day, student_id, calendar.day_name[day.weekday()], status)
+
+    def pending_leaves(self):
+        rng = random.Random(self.seed + 2)
+        by_department = collections.defaultdict(list)
+        for student_id, (department, courses) in self.student_courses.items():
+            by_department[department].append((student_id, courses))
+        for department in self.departments:
+            students = by_department[department]
+            for _ in range(self.config.pending_leaves):
+                student_id, courses = rng.choice(students)
+                day = self.last_day + datetime.timedelta(days=rng.randint(1, 30))
+                yield student_id, rng.choice(courses), day, rng.choice(LEAVE_REASONS), "Pending"
+
+
+def _write(conn, statement, rows, counts, table, progress=None):
+    cursor = conn.cursor()
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, BATCH_SIZE))
+        if not batch:
+            break
+        cursor.executemany(statement, batch)
+        conn.commit()
+        counts[table] += len(batch)
+        if progress:
+            progress(table, counts[table])
+    cursor.close()
+
+
+def _write_interleaved(conn, statements, pairs, counts, progress=None):
+    """Batches (table, row) pairs per table; flushes whichever fills up."""
+    cursor = conn.cursor()
+    pending = collections.defaultdict(list)
+
+    def flush(table):
+        cursor.executemany(statements[table], pending[table])
+        counts[table] += len(pending[table])
+        pending[table] = []
+
+    for table, row in pairs:
+        pending[table].append(row)
+        if len(pending[table]) >= BATCH_SIZE:
+            flush(table)
+            conn.commit()
+            if progress and table == 'attendance':
+                progress(table, counts[table])
+    for table in list(pending):
+        if pending[table]:
+            flush(table)
+    conn.commit()
+    cursor.close()
+
+
+def generate(conn, config, seed=42, backend=None, progress=None):
+    """Writes a synthetic university into an empty schema and commits.
+
+    Returns:
+        dict: rows written per table (plus attendance_summary).
+    """
+    backend = backend or database.current_backend()
+    university = University(config, seed)
+    counts = collections.Counter()
+    for table, rows in (('teachers', university.teachers()), ('courses', university.courses()),
+                        ('assignments', university.assignments()), ('students', university.students()),
+                        ('enrollments', university.enrollments())):
+        _write(conn, INSERT_STATEMENTS[table], rows, counts, table, progress)
+    statements = {'attendance': SAVE_ATTENDANCE_INSERT.sql(backend),
+                  'leave_requests': INSERT_STATEMENTS['leave_requests']}
+    _write_interleaved(conn, statements, university.attendance_and_leaves(), counts, progress)
+    _write(conn, INSERT_STATEMENTS['leave_requests'], university.pending_leaves(), counts, 'leave_requests')
+    counts['attendance_summary'] = attendance_summary.rebuild(conn, backend)
+    return dict(counts)
+
+
+def _print_progress(table, count, _last=[0.0]):
+    now = time.monotonic()
+    if now - _last[0] >= 2:
+        _last[0] = now
+        print(f"  {table}: {count:,} rows", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic university for benchmarks.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sqlite", default="bench_data.db", help="SQLite file to create (default: %(default)s)")
+    parser.add_argument("--configured-db", action="store_true",
+                        help="write through DB_CONFIG instead (an empty test schema, never production)")
+    for field in Config._fields:
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(SCALES['small']._asdict()[field]),
+                            help=f"override the preset's {field}")
+    args = parser.parse_args(argv)
+
+    config = SCALES[args.scale]._replace(**{
+        field: getattr(args, field) for field in Config._fields if getattr(args, field) is not None
+    })
+    pool = database.get_pool() if args.configured_db else sqlite_pool(args.sqlite)
+    print(f"Generating about {expected_attendance_rows(config):,} attendance rows into "
+          f"{pool.backend}{'' if args.configured_db else ' ' + args.sqlite} ...")
+    started = time.perf_counter()
+    with database.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM students")
+        if cursor.fetchone()[0]:
+            print("The target database already has students; generate into an empty schema.")
+            return 1
+        cursor.close()
+        counts = generate(conn, config, args.seed, pool.backend, _print_progress)
+    for table, count in counts.items():
+        print(f"{table:>20}: {count:,}")
+    print(f"Done in {time.perf_counter() - started:.1f} s.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""
+Table browser and editor opened from the login screen.
+
+Kept out of LoginForm.py so the login window can start without importing
+the database layer; LoginForm imports this module when the window is opened.
+"""
+import tkinter as tk
+from tkinter import messagebox
+from tkinter import ttk  # Import ttk for Combobox and Treeview
+from database import DB_ERRORS
+from db_worker import run_in_background, get_executor
+from schema_cache import get_schema_cache, convert_value
+from repository import get_repository
+from tracing import traced_action
+
+INSERT_CHUNK_SIZE = 100  # Treeview rows inserted per event-loop turn
+
+
+class CRUDWindow(tk.Toplevel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("CRUD Operations")
+        self.geometry("800x600")
+        self.parent = parent
+        self.tables = ["students", "teachers", "attendance", "courses", "enrollments", "assignments", "leave_requests"]
+        self.table_combobox = ttk.Combobox(self, values=self.tables, font=("Arial", 12))
+        self.table_combobox.pack(pady=10)
+        self.table_combobox.set(self.tables[0])
+        tk.Button(self, text="Perform Operations", font=("Arial", 12), command=self.show_operation_selection).pack(pady=10)
+        tk.Button(self, text="Refresh Schema", font=("Arial", 10), command=self.refresh_schema).pack()
+        self.result_label = tk.Label(self, text="", font=("Arial", 12), wraplength=400)
+        self.result_label.pack(pady=10)
+        self.data_treeview = ttk.Treeview(self, show="headings", selectmode="browse")
+        self.data_treeview.pack(pady=10, fill=tk.BOTH, expand=True)
+        self.data_treeview.columnconfigure(0, weight=1)
+
+        # Keyset paging: only the current page (plus one read-ahead page) is held in memory
+        nav_frame = tk.Frame(self)
+        nav_frame.pack()
+        self.prev_button = tk.Button(nav_frame, text="\u25c0 Previous", font=("Arial", 11), command=self.previous_page, state=tk.DISABLED)
+        self.prev_button.grid(row=0, column=0, padx=5)
+        self.next_button = tk.Button(nav_frame, text="Next \u25b6", font=("Arial", 11), command=self.next_page, state=tk.DISABLED)
+        self.next_button.grid(row=0, column=1, padx=5)
+        self.pager = None
+        self.page_starts = []
+        self.next_key = None
+        self.readahead = None
+        self._insert_generation = 0
+
+        self.back_button = tk.Button(self, text="Back", font=("Arial", 12), command=self.on_close)
+        self.back_button.pack(pady=10)
+
+    def show_operation_selection(self):
+        selected_table = self.table_combobox.get()
+        operation_window = tk.Toplevel(self)
+        operation_window.title(f"Operations for {selected_table}")
+        operation_window.geometry("300x200")
+        operations = ["Read", "Update", "Delete", "Insert"]
+        tk.Label(operation_window, text="Select operation:", font=("Arial", 12)).pack(pady=10)
+        operation_combobox = ttk.Combobox(operation_window, values=operations, font=("Arial", 12))
+        operation_combobox.pack(pady=10)
+        operation_combobox.set(operations[0])
+        tk.Button(operation_window, text="Confirm", font=("Arial", 12),
+                  command=lambda: self.perform_operation(selected_table, operation_combobox.get(), operation_window)).pack(pady=10)
+        operation_window.back_button = tk.Button(operation_window, text="Back", font=("Arial", 12), command=operation_window.destroy)
+        operation_window.back_button.pack(pady=10)
+
+    def perform_operation(self, selected_table, selected_operation, operation_window):
+        operation_window.destroy()
+        self.result_label.config(text=f"Performing {selected_operation} on table: {selected_table}")
+        if selected_operation == "Read":
+            self.read_data_from_table(selected_table)
+        elif selected_operation == "Update":
+            self.open_update_dialog(selected_table)
+        elif selected_operation == "Delete":
+            self.delete_record_from_table(selected_table)
+        elif selected_operation == "Insert":
+            self.open_insert_dialog(selected_table)
+
+    @traced_action('browse table')
+    def read_data_from_table(self, table_name):
+        try:
+            self.pager = get_repository().pager(table_name)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.page_starts = [None]
+        self.readahead = None
+        self._load_page(None)
+
+    def refresh_table(self, table_name):
+        """Reloads the page being viewed after a change to ``table_name``."""
+        if self.pager is not None and self.pager.table == table_name:
+            self.readahead = None
+            self._load_page(self.page_starts[-1])
+        else:
+            self.read_data_from_table(table_name)
+
+    @traced_action('next table page')
+    def next_page(self):
+        if self.pager is None or self.next_key is None:
+            return
+        self.page_starts.append(self.next_key)
+        self._load_page(self.next_key)
+
+    @traced_action('previous table page')
+    def previous_page(self):
+        if len(self.page_starts) <= 1:
+            return
+        self.page_starts.pop()
+        self._load_page(self.page_starts[-1])
+
+    def _load_page(self, after_key):
+        pager = self.pager
+        get_executor().cancel(self, "readahead")
+        if self.readahead is not None and self.readahead[0] == (pager.table, after_key):
+            result, self.readahead = self.readahead[1], None
+            self._show_page(pager, result)
+            return
+        run_in_background(
+            self,
+            lambda: self._fetch_page(pager, after_key),
+            lambda result: self._show_page(pager, result),
+            lambda e: self.handle_database_error(e, f"Error reading data from table '{pager.table}'"),
+            key="read",
+            loading_text=f"Loading {pager.table}...",
+        )
+
+    def _fetch_page(self, pager, after_key):
+        # Runs on a DB worker thread: no widget access here
+        return get_repository().fetch_page(pager, after_key)
+
+    def _show_page(self, pager, result):
+        columns, rows, last_key = result
+        self.next_key = last_key
+        self._populate_treeview(columns, rows)
+        first_row = (len(self.page_starts) - 1) * pager.page_size + 1
+        if rows:
+            self.result_label.config(text=f"Data from table '{pager.table}' displayed (rows {first_row}-{first_row + len(rows) - 1}).")
+        else:
+            self.result_label.config(text=f"Table '{pager.table}' has no rows to display.")
+        self.prev_button.config(state=tk.NORMAL if len(self.page_starts) > 1 else tk.DISABLED)
+        self.next_button.config(state=tk.NORMAL if last_key is not None else tk.DISABLED)
+        if last_key is not None:
+            # Read the next page ahead so "Next" usually shows it instantly
+            run_in_background(
+                self,
+                lambda: self._fetch_page(pager, last_key),
+                lambda next_result: setattr(self, "readahead", ((pager.table, last_key), next_result)),
+                key="readahead",
+                loading_text=None,
+            )
+
+    def _populate_treeview(self, columns, data):
+        self._insert_generation += 1
+        for item in self.data_treeview.get_children():
+            self.data_treeview.delete(item)
+        self.data_treeview["columns"] = columns
+        for col in columns:
+            self.data_treeview.heading(col, text=col)
+            self.data_treeview.column(col, width=100, stretch=True)
+        self._insert_rows(data, 0, self._insert_generation)
+
+    def _insert_rows(self, data, start, generation):
+        # Insert in small chunks so the window stays responsive while a page fills
+        if generation != self._insert_generation:
+            return  # A newer page has replaced this one
+        end = min(start + INSERT_CHUNK_SIZE, len(data))
+        for row in data[start:end]:
+            self.data_treeview.insert("", tk.END, values=row)
+        if end < len(data):
+            self.after(1, self._insert_rows, data, end, generation)
+
+    @traced_action('delete record')
+    def delete_record_from_table(self, table_name):
+        """
+        Deletes a selected record from the specified table and handles
+        foreign key constraints for the 'students' table.
+
+        Args:
+            table_name (str): The name of the table from which to delete the record.
+        """
+        selected_item = self.data_treeview.selection()
+        if not selected_item:
+            messagebox.showwarning("Warning", "Please select a record to delete.")
+            return
+        record_values = self.data_treeview.item(selected_item)['values']
+        if not record_values:
+            messagebox.showwarning("Warning", "No record to delete.")
+            return
+
+        try:
+            # Use the table's real primary key column (cached), falling back to the first column
+            columns = [column.upper() for column in self.data_treeview["columns"]]
+            primary_key = get_schema_cache().get(table_name).primary_key
+            key_index = columns.index(primary_key[0]) if len(primary_key) == 1 and primary_key[0] in columns else 0
+            primary_key_column = self.data_treeview["columns"][key_index]
+            primary_key_value = record_values[key_index]
+
+            # Dependent rows of a student are removed in the same transaction
+            deleted = get_repository().delete_record(table_name, primary_key_column, primary_key_value)
+            if deleted > 0:
+                messagebox.showinfo("Success", "Record deleted successfully.")
+                self.refresh_table(table_name)  # Refresh the Treeview
+            else:
+                messagebox.showerror("Error", "Failed to delete record.")
+        except (KeyError, ValueError, *DB_ERRORS) as e:
+            self.handle_database_error(e, f"Error deleting record from table '{table_name}'")
+    
+    
+    
+    def open_insert_dialog(self, table_name):
+        schema = get_schema_cache()
+        if schema.is_cached(table_name):
+            self._show_insert_dialog(table_name, schema.get(table_name))
+            return
+        # First use of this table: read its metadata off the Tk thread, then cache it
+        run_in_background(
+            self,
+            lambda: schema.get(table_name),
+            lambda info: self._show_insert_dialog(table_name, info),
+            lambda e: self.handle_database_error(e, f"Error fetching table information for '{table_name}'"),
+            key="schema",
+            loading_text="Loading table information...",
+        )
+
+    def _show_insert_dialog(self, table_name, info):
+        # Identity columns are filled in by the database
+        columns = [column.name for column in info.columns if not column.identity]
+        insert_dialog = tk.Toplevel(self)
+        insert_dialog.title(f"Insert Record into {table_name}")
+        entries = {}
+        for i, column in enumerate(columns):
+            tk.Label(insert_dialog, text=f"{column}:", font=("Arial", 12)).grid(row=i, column=0, padx=5, pady=5, sticky="w")
+            entry = tk.Entry(insert_dialog, font=("Arial", 12))
+            entry.grid(row=i, column=1, padx=5, pady=5, sticky="ew")
+            entries[column] = entry
+        insert_button = tk.Button(insert_dialog, text="Insert", font=("Arial", 12),
+                                   command=lambda: self.insert_new_record(table_name, columns, entries, insert_dialog))
+        insert_button.grid(row=len(columns), column=0, columnspan=2, pady=10)
+        insert_dialog.back_button = tk.Button(insert_dialog, text="Back", font=("Arial", 12), command=insert_dialog.destroy)
+        insert_dialog.back_button.grid(row=len(columns)+1, column=0, columnspan=2, pady=10)
+
+    @traced_action('insert record')
+    def insert_new_record(self, table_name, columns, entries, insert_dialog):
+        # Convert every entry to its column's type from cached metadata (no dictionary queries)
+        schema = get_schema_cache()
+        values = []
+        column_names = []
+        for col in columns:
+            try:
+                values.append(convert_value(schema.column(table_name, col), entries[col].get()))
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            column_names.append(col)
+
+        try:
+            get_repository().insert_record(table_name, column_names, values)
+            messagebox.showinfo("Success", "Record inserted successfully.")
+            self.refresh_table(table_name)
+            insert_dialog.destroy()
+        except (ValueError, *DB_ERRORS) as e:
+            self.handle_database_error(e, f"Error inserting record into table '{table_name}'")
+    
+    
+    def open_update_dialog(self, table_name):
+        if table_name != "students":
+            messagebox.showerror("Error", f"Update operation is only supported for the 'students' table.")
+            return
+
+        selected_item = self.data_treeview.selection()
+        if not selected_item:
+            messagebox.showwarning("Warning", "Please select a student record to update.")
+            return
+
+        student_data = self.data_treeview.item(selected_item)['values']
+        if not student_data:
+            messagebox.showwarning("Warning", "No data to update for the selected record.")
+            return
+
+        self.student_id = student_data[0]  # Assuming student_id is the first column
+        columns = self.data_treeview["columns"]  # Get column names
+
+        self.update_dialog = tk.Toplevel(self)
+        self.update_dialog.title("Update Student Record")
+        tk.Label(self.update_dialog, text="Select column to update:", font=("Arial", 12)).pack(pady=10)
+        self.column_combobox = ttk.Combobox(self.update_dialog, values=columns[1:], font=("Arial", 12))  # Exclude student_id
+        self.column_combobox.pack(pady=10)
+        self.column_combobox.set(columns[1])
+
+        tk.Label(self.update_dialog, text="Enter new value:", font=("Arial", 12)).pack(pady=5)
+        self.value_entry = tk.Entry(self.update_dialog, font=("Arial", 12))
+        self.value_entry.pack(pady=5)
+
+        self.update_button = tk.Button(self.update_dialog, text="Update", font=("Arial", 12), command=self.update_record)
+        self.update_button.pack(pady=10)
+
+        self.update_dialog.back_button = tk.Button(self.update_dialog, text="Back", font=("Arial", 12), command=self.update_dialog.destroy)
+        self.update_dialog.back_button.pack(pady=10)
+
+    @traced_action('update student record')
+    def update_record(self):
+        selected_column = self.column_combobox.get()
+        new_value = self.value_entry.get().strip()
+
+        if not new_value:
+            messagebox.showwarning("Warning", "Please enter a value to update.")
+            return
+
+        try:
+            # Validate and convert against cached column metadata
+            column_info = get_schema_cache().column('students', selected_column)
+            if column_info is None:
+                messagebox.showerror("Error", f"Column '{selected_column}' not found in 'students' table.")
+                return
+            print(f"DEBUG: Column: {selected_column}, Type: {column_info.data_type}, Length: {column_info.length}")
+            try:
+                new_value = convert_value(column_info, new_value)
+            except ValueError as e:
+                messagebox.showwarning("Warning", str(e))
+                return
+
+            if get_repository().update_student(selected_column, new_value, self.student_id) > 0:
+                messagebox.showinfo("Success", "Student record updated successfully.")
+                self.refresh_table('students')  # Refresh the Treeview
+                self.update_dialog.destroy()
+            else:
+                messagebox.showerror("Error", "Failed to update student record.")
+        except DB_ERRORS as e:
+            self.handle_database_error(e, "Error updating student record")
+
+    @traced_action('refresh schema')
+    def refresh_schema(self):
+        """Drops cached table metadata so it is re-read after schema changes."""
+        get_schema_cache().refresh()
+        self.result_label.config(text="Table metadata will be reloaded on next use.")
+
+    def handle_database_error(self, e, message):
+        """
+        Handles database errors consistently.
+        """
+        print(f"DEBUG: {message}: {e}")
+        messagebox.showerror("Database Error", f"{message}: {e}")
+        self.result_label.config(text=f"{message}: {e}")
+
+    def on_close(self):
+        self.destroy()
+        self.parent.deiconify()
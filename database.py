@@ -1,10 +1,616 @@
-import cx_Oracle
+"""
+Shared database access for the attendance application.
+
+All windows get their sessions from one bounded pool instead of logging on
+for every query. ``get_connection()`` hands out a pooled connection whose
+``close()`` returns the session to the pool, so existing
+``conn = get_connection() ... conn.close()`` code keeps working unchanged.
+
+Two backends are supported:
+
+* ``oracle`` - the production database, through ``oracledb`` in thin mode
+  (no Oracle Client libraries needed).
+* ``sqlite`` - a local stand-in with the same tables and views, used for
+  testing and benchmarking on machines without Oracle.
+
+The backend is picked with the ``ATTENDANCE_DB_BACKEND`` environment variable
+(``oracle`` by default); ``ATTENDANCE_SQLITE_PATH`` sets the SQLite file.
+"""
+import atexit
+import collections
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import tracing
+
+try:
+    import oracledb
+except ImportError:  # Only the SQLite stand-in is usable without the driver
+    oracledb = None
+
+# Database connection details (replace with your actual credentials)
+DB_CONFIG = {
+    'backend': os.environ.get('ATTENDANCE_DB_BACKEND', 'oracle'),
+    'user': 'System',
+    'password': 'Server123',
+    'dsn': 'localhost/ORCAL',
+    'sqlite_path': os.environ.get('ATTENDANCE_SQLITE_PATH', 'attendance_local.db'),
+    'pool_min': 1,             # sessions opened when the pool is created
+    'pool_max': 8,             # hard upper bound on concurrent sessions
+    'acquire_timeout': 10.0,   # seconds to wait for a free session
+    'ping_interval': 60.0,     # idle seconds after which a session is pinged before reuse
+    'statement_cache_size': 50,  # prepared statements each session keeps (see statements.py)
+}
+
+SQLITE_SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sqlite_schema.sql")
+
+
+class PoolError(Exception):
+    """Raised when the pool cannot hand out a session."""
+
+
+class PoolTimeout(PoolError):
+    """Raised when no session became free within the acquire timeout."""
+
+
+# Exceptions callers should catch around database work, whatever the backend.
+DB_ERRORS = (PoolError, sqlite3.Error) + ((oracledb.Error,) if oracledb else ())
+
+
+def error_info(e):
+    """Returns (code, message) for a database exception from any backend.
+
+    oracledb wraps an error object carrying ``code`` and ``message``; SQLite
+    and pool errors only carry a message, so their code is None.
+    """
+    detail = e.args[0] if e.args else e
+    return getattr(detail, "code", None), getattr(detail, "message", str(detail))
+
+
+class PooledConnection:
+    """
+    A session borrowed from a ConnectionPool. Behaves like the underlying
+    driver connection; ``close()`` (or leaving a ``with`` block) gives the
+    session back to the pool instead of logging off.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    @property
+    def raw(self):
+        if self._raw is None:
+            raise PoolError("Connection has already been returned to the pool.")
+        return self._raw
+
+    def cursor(self):
+        return tracing.wrap_cursor(self.raw.cursor())
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        if self._raw is not None:
+            self._pool.release(self)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """
+    Bounded pool of database sessions.
+
+    ``connect`` opens a new raw session and ``ping`` returns True if a raw
+    session is still usable. At most ``max_size`` sessions exist at once;
+    callers beyond that wait up to ``timeout`` seconds and then get a
+    PoolTimeout. Sessions idle for longer than ``ping_interval`` are health
+    checked before being handed out again.
+    """
+
+    def __init__(self, connect, ping, min_size=1, max_size=8, timeout=10.0, ping_interval=60.0):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1.")
+        self._connect = connect
+        self._ping = ping
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self._idle = collections.deque()  # (raw connection, time it was released)
+        self._in_use = 0
+        self._opening = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._counters = {
+            'acquired': 0,
+            'released': 0,
+            'created': 0,
+            'discarded': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'pings': 0,
+            'ping_failures': 0,
+            'wait_time': 0.0,
+        }
+        for _ in range(min_size):
+            raw = self._connect()
+            self._counters['created'] += 1
+            self._idle.append((raw, time.monotonic()))
+
+    @property
+    def size(self):
+        """Number of sessions currently open (idle or in use)."""
+        with self._cond:
+            return len(self._idle) + self._in_use + self._opening
+
+    def acquire(self, timeout=None):
+        """Borrows a session, opening a new one if the pool is not yet full."""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+        raw = None
+        last_used = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("Connection pool is closed.")
+                if self._idle:
+                    raw, last_used = self._idle.pop()  # most recently used first
+                    self._in_use += 1
+                    break
+                if self._in_use + self._opening < self.max_size:
+                    self._opening += 1
+                    break
+                if not waited:
+                    waited = True
+                    self._counters['waits'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    raise PoolTimeout(
+                        f"No database session became free within {timeout:.1f}s "
+                        f"({self.max_size} in use)."
+                    )
+                self._cond.wait(remaining)
+            if waited:
+                self._counters['wait_time'] += time.monotonic() - started
+
+        if raw is not None and time.monotonic() - last_used > self.ping_interval:
+            if not self._check(raw):
+                self._close_raw(raw)
+                with self._cond:
+                    self._in_use -= 1
+                    self._opening += 1
+                    self._counters['discarded'] += 1
+                raw = None
+
+        if raw is None:
+            try:
+                raw = self._connect()
+            except Exception:
+                with self._cond:
+                    self._opening -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._opening -= 1
+                self._in_use += 1
+                self._counters['created'] += 1
+
+        with self._cond:
+            self._counters['acquired'] += 1
+        return PooledConnection(self, raw)
+
+    def release(self, conn, discard=False):
+        """Returns a borrowed session. Uncommitted work is rolled back."""
+        raw, conn._raw = conn._raw, None
+        if raw is None:
+            return
+        if not discard:
+            try:
+                raw.rollback()
+            except Exception as e:
+                logging.error(f"Discarding pooled connection after failed rollback: {e}")
+                discard = True
+        with self._cond:
+            self._in_use -= 1
+            self._counters['released'] += 1
+            if discard or self._closed:
+                self._counters['discarded'] += 1
+            else:
+                self._idle.append((raw, time.monotonic()))
+                raw = None
+            self._cond.notify()
+        if raw is not None:
+            self._close_raw(raw)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager that acquires a session and always releases it."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def health_check(self):
+        """Pings every idle session, dropping the broken ones.
+
+        Returns a dict with the number of healthy and discarded sessions.
+        """
+        with self._cond:
+            idle, self._idle = list(self._idle), collections.deque()
+            self._in_use += len(idle)
+        healthy = []
+        broken = 0
+        for raw, _ in idle:
+            if self._check(raw):
+                healthy.append((raw, time.monotonic()))
+            else:
+                self._close_raw(raw)
+                broken += 1
+        with self._cond:
+            self._in_use -= len(idle)
+            self._idle.extend(healthy)
+            self._counters['discarded'] += broken
+            self._cond.notify_all()
+        return {'healthy': len(healthy), 'discarded': broken}
+
+    def stats(self):
+        """Returns a snapshot of pool usage counters."""
+        with self._cond:
+            snapshot = dict(self._counters)
+            snapshot.update({
+                'size': len(self._idle) + self._in_use + self._opening,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+            })
+        return snapshot
+
+    def close(self):
+        """Closes idle sessions; sessions still in use are closed on release."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), collections.deque()
+            self._cond.notify_all()
+        for raw, _ in idle:
+            self._close_raw(raw)
+
+    def _check(self, raw):
+        with self._cond:
+            self._counters['pings'] += 1
+        try:
+            ok = self._ping(raw)
+        except Exception as e:
+            logging.error(f"Pooled connection failed health check: {e}")
+            ok = False
+        if not ok:
+            with self._cond:
+                self._counters['ping_failures'] += 1
+        return ok
+
+    @staticmethod
+    def _close_raw(raw):
+        # Imported here: statements itself imports this module
+        from statements import cache_stats
+        cache_stats.forget(raw)
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+
+# --- Oracle backend ---
+
+def _oracle_connect():
+    if oracledb is None:
+        raise PoolError("The oracledb driver is not installed; set ATTENDANCE_DB_BACKEND=sqlite to use the local stand-in.")
+    # Thin mode (the default while init_oracle_client() is never called)
+    return oracledb.connect(user=DB_CONFIG['user'], password=DB_CONFIG['password'], dsn=DB_CONFIG['dsn'],
+                            stmtcachesize=DB_CONFIG['statement_cache_size'])
+
+
+def _oracle_ping(raw):
+    raw.ping()
+    return True
+
+
+# --- SQLite stand-in ---
+
+def _sqlite_to_date(value, fmt=None):
+    """TO_DATE replacement; dates are stored as ISO text in SQLite."""
+    if value is None:
+        return None
+    return str(value)[:10]
+
+
+def _sqlite_trunc(value, fmt=None):
+    """TRUNC replacement for dates: drops the time part of an ISO value."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    return str(value)[:10]
+
+
+def _sqlite_to_char(value, fmt=None):
+    """TO_CHAR replacement supporting the date formats the app uses."""
+    if value is None:
+        return None
+    if fmt and fmt.strip().upper() == 'DAY':
+        day = datetime.date.fromisoformat(str(value)[:10])
+        return day.strftime('%A')
+    if fmt and fmt.upper() == 'YYYY-MM-DD':
+        return str(value)[:10]
+    return str(value)
+
+
+def _sqlite_convert_date(value):
+    text = value.decode()
+    if len(text) == 10:
+        return datetime.datetime.fromisoformat(text + "T00:00:00")
+    return datetime.datetime.fromisoformat(text)
+
+
+sqlite3.register_adapter(datetime.date, lambda d: d.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda d: d.isoformat(sep=" "))
+sqlite3.register_converter("DATE", _sqlite_convert_date)
+sqlite3.register_converter("TIMESTAMP", _sqlite_convert_date)
+
+# Keeps a shared in-memory database alive while the pool recycles sessions.
+_sqlite_keepalive = {}
+
+
+def _sqlite_target(path):
+    """Maps ':memory:' to a named shared-cache database every session can see."""
+    if path == ':memory:':
+        return f"file:attendance-{uuid.uuid4().hex}?mode=memory&cache=shared", True
+    return path, path.startswith("file:")
+
+
+def make_sqlite_connect(path):
+    """Returns a connect function for the SQLite stand-in at ``path``.
+
+    The schema from sqlite_schema.sql is created the first time an empty
+    database is opened and pending migrations are applied once per process;
+    the Oracle functions the app's SQL relies on (TRUNC, TO_DATE, TO_CHAR)
+    are registered on every session.
+    """
+    target, uri = _sqlite_target(path)
+    initialised = threading.Lock()
+    state = {'ready': False}
+
+    def connect():
+        raw = sqlite3.connect(
+            target,
+            uri=uri,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,  # sessions move between the UI and worker threads
+            cached_statements=DB_CONFIG['statement_cache_size'],
+        )
+        raw.create_function("TRUNC", -1, _sqlite_trunc, deterministic=True)
+        raw.create_function("TO_DATE", -1, _sqlite_to_date, deterministic=True)
+        raw.create_function("TO_CHAR", -1, _sqlite_to_char, deterministic=True)
+        raw.execute("PRAGMA foreign_keys = ON")
+        with initialised:
+            if not state['ready']:
+                if uri and "mode=memory" in target and target not in _sqlite_keepalive:
+                    _sqlite_keepalive[target] = sqlite3.connect(target, uri=True, check_same_thread=False)
+                has_tables = raw.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'students'"
+                ).fetchone()
+                if not has_tables:
+                    with open(SQLITE_SCHEMA_FILE, encoding="utf-8") as f:
+                        raw.executescript(f.read())
+                    raw.commit()
+                # Imported here: migrations itself imports this module
+                from migrations import upgrade
+                upgrade(raw, 'sqlite')
+                state['ready'] = True
+        return raw
+
+    return connect
+
+
+def _sqlite_ping(raw):
+    raw.execute("SELECT 1").fetchone()
+    return True
+
+
+# --- Module-level pool ---
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def create_pool(backend=None, **overrides):
+    """Builds a ConnectionPool for ``backend`` using DB_CONFIG plus overrides."""
+    config = dict(DB_CONFIG, **overrides)
+    backend = backend or config['backend']
+    if backend == 'oracle':
+        connect, ping = _oracle_connect, _oracle_ping
+    elif backend == 'sqlite':
+        connect, ping = make_sqlite_connect(config['sqlite_path']), _sqlite_ping
+    else:
+        raise ValueError(f"Unknown database backend: {backend!r}")
+    pool = ConnectionPool(
+        connect,
+        ping,
+        min_size=config['pool_min'],
+        max_size=config['pool_max'],
+        timeout=config['acquire_timeout'],
+        ping_interval=config['ping_interval'],
+    )
+    pool.backend = backend
+    return pool
+
+
+def get_pool():
+    """Returns the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = create_pool()
+    return _pool
+
+
+def set_pool(pool):
+    """Replaces the process-wide pool (used by tests and benchmarks)."""
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, pool
+    if old is not None and old is not pool:
+        old.close()
+
+
+def close_pool():
+    """Closes the process-wide pool, if one was created."""
+    set_pool(None)
+
+
+atexit.register(close_pool)
+
 
 def get_connection():
+    """
+    Borrows a session from the shared pool. Call ``close()`` on it (or use it
+    as a context manager) to hand it back.
+    """
+    return get_pool().acquire()
+
+
+def connection():
+    """Context manager around get_connection() for ``with`` blocks."""
+    return get_pool().connection()
+
+
+def pool_stats():
+    """Returns usage statistics of the shared pool."""
+    return get_pool().stats()
+
+
+def current_backend():
+    """Name of the backend ('oracle' or 'sqlite') the shared pool talks to."""
+    return get_pool().backend
+
+
+def executemany_batch(cursor, statement, rows, backend=None):
+    """
+    Runs one DML statement for every row in a single batched call and
+    collects per-row failures instead of stopping at the first one.
+
+    On Oracle this is array DML with ``batcherrors``. SQLite has no batch
+    errors, and Oracle has none for a PL/SQL block (``BEGIN ... END;``), so
+    there the batch runs inside a savepoint and, only if it fails, is
+    replayed row by row to find the offending rows. Successful rows stay
+    applied either way; nothing is committed.
+
+    Returns:
+        tuple: (rows affected, list of (row offset, error message) tuples).
+        For a PL/SQL block, rows affected is the number of rows that ran.
+    """
+    if not rows:
+        return 0, []
+    backend = backend or current_backend()
+    if backend == 'oracle':
+        if statement.lstrip()[:5].upper() != "BEGIN":
+            cursor.executemany(statement, rows, batcherrors=True)
+            errors = [(error.offset, error.message) for error in cursor.getbatcherrors()]
+            return cursor.rowcount, errors
+        cursor.execute("SAVEPOINT batch_dml")
+        try:
+            cursor.executemany(statement, rows)
+            return len(rows), []
+        except oracledb.Error:
+            cursor.execute("ROLLBACK TO SAVEPOINT batch_dml")
+        errors = []
+        for offset, row in enumerate(rows):
+            try:
+                cursor.execute(statement, row)
+            except oracledb.Error as e:
+                errors.append((offset, error_info(e)[1]))
+        return len(rows) - len(errors), errors
+
+    # SQLite does not count rows changed through INSTEAD OF triggers in
+    # rowcount, so the connection's change counter is used instead.
+    connection = cursor.connection
+    if not connection.in_transaction:
+        # A savepoint opened outside a transaction commits on RELEASE;
+        # begin one so the caller's commit or rollback still decides.
+        cursor.execute("BEGIN")
+    cursor.execute("SAVEPOINT batch_dml")
     try:
-        # Replace with your actual connection details
-        dsn = cx_Oracle.makedsn("localhost", 1521, service_name="ORCAL")  # Update hostname and port if needed
-        conn = cx_Oracle.connect(user="System", password="Server123", dsn=dsn)  # Replace username and password
-        return conn
-    except cx_Oracle.DatabaseError as e:
-        raise Exception(f"Database connection error: {e}")
\ No newline at end of file
+        changes_before = connection.total_changes
+        try:
+            cursor.executemany(statement, rows)
+            return connection.total_changes - changes_before, []
+        except sqlite3.Error:
+            cursor.execute("ROLLBACK TO SAVEPOINT batch_dml")
+        changes_before = connection.total_changes
+        errors = []
+        for offset, row in enumerate(rows):
+            try:
+                cursor.execute(statement, row)
+            except sqlite3.Error as e:
+                errors.append((offset, str(e)))
+        return connection.total_changes - changes_before, errors
+    finally:
+        cursor.execute("RELEASE SAVEPOINT batch_dml")
+
+
+def executemany_rowcounts(cursor, statement, rows, backend=None):
+    """
+    Like executemany_batch(), but also reports how many rows each input row
+    changed, e.g. to tell which guarded UPDATEs still found their row.
+
+    On Oracle this is one array DML call with ``arraydmlrowcounts``. SQLite
+    runs the rows one by one and reads the connection's change counter,
+    which also counts rows changed through INSTEAD OF triggers. Nothing is
+    committed.
+
+    Returns:
+        tuple: (list of rows changed per input row, list of (row offset,
+        error message) tuples).
+    """
+    if not rows:
+        return [], []
+    backend = backend or current_backend()
+    if backend == 'oracle':
+        cursor.executemany(statement, rows, batcherrors=True, arraydmlrowcounts=True)
+        errors = [(error.offset, error.message) for error in cursor.getbatcherrors()]
+        return list(cursor.getarraydmlrowcounts()), errors
+
+    connection = cursor.connection
+    if not connection.in_transaction:
+        cursor.execute("BEGIN")  # see executemany_batch()
+    counts, errors = [], []
+    for offset, row in enumerate(rows):
+        changes_before = connection.total_changes
+        try:
+            cursor.execute(statement, row)
+        except sqlite3.Error as e:
+            errors.append((offset, str(e)))
+        counts.append(connection.total_changes - changes_before)
+    return counts, errors
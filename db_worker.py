@@ -0,0 +1,212 @@
+"""
+Runs database work off the Tk main loop.
+
+Tk is single threaded, so a slow query run from a button handler freezes
+every window. ``DBExecutor.submit`` runs the query function on a worker
+thread and delivers its result (or exception) back on the Tk thread by
+polling the future with ``after()``. The worker function must not touch
+widgets; only the callbacks may.
+
+Usage::
+
+    run_in_background(self, fetch_rows, self.show_rows, self.show_error,
+                      key="rows", loading_text="Loading records...")
+"""
+import contextvars
+import logging
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+from database import DB_CONFIG
+from prefetch import MISSING, get_prefetcher
+
+POLL_INTERVAL_MS = 30
+
+
+class LoadingIndicator:
+    """A 'Loading...' label and busy cursor shown over a window while work runs."""
+
+    def __init__(self, owner, text):
+        self.owner = owner
+        self.label = tk.Label(owner, text=text, font=("Arial", 11, "italic"),
+                              bg="#fff8dc", relief="groove", padx=10, pady=4)
+        self.label.place(relx=0.5, rely=1.0, anchor="s", y=-8)
+        self._previous_cursor = owner.cget("cursor")
+        owner.config(cursor="watch")
+
+    def close(self):
+        try:
+            self.label.destroy()
+            self.owner.config(cursor=self._previous_cursor)
+        except tk.TclError:
+            pass  # The window has already been destroyed
+
+
+class DBTask:
+    """Handle for one piece of background work; ``cancel()`` drops its result."""
+
+    def __init__(self, owner, key, future, on_success, on_error, indicator):
+        self.owner = owner
+        self.key = key
+        self.future = future
+        self.on_success = on_success
+        self.on_error = on_error
+        self.indicator = indicator
+        self.cancelled = False
+
+    def cancel(self):
+        """Stops the task if it has not started, and suppresses its callbacks."""
+        self.cancelled = True
+        self.future.cancel()
+
+    @property
+    def done(self):
+        return self.future.done()
+
+
+class DBExecutor:
+    """
+    Thread pool for database calls whose results come back to Tk.
+
+    Tasks are tracked per owner widget: destroying the owner cancels its
+    in-flight work, and submitting a task with the same ``key`` as one still
+    running cancels the older one (e.g. when the user picks another date
+    before the previous load finished).
+    """
+
+    def __init__(self, max_workers=None, poll_interval=POLL_INTERVAL_MS):
+        # More workers than pooled sessions would only queue on the pool
+        self.max_workers = max_workers or DB_CONFIG['pool_max']
+        self.poll_interval = poll_interval
+        self._threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db-worker")
+        self._tasks = {}  # owner widget -> list of DBTask
+        self._lock = threading.Lock()
+
+    def submit(self, owner, work, on_success, on_error=None, key=None, loading_text="Loading..."):
+        """Runs ``work()`` on a worker thread.
+
+        ``on_success(result)`` or ``on_error(exception)`` is then called on
+        the Tk thread, unless the task was cancelled or the owner destroyed.
+        ``loading_text`` (or None for no indicator) is shown meanwhile.
+        """
+        if key is not None:
+            self.cancel(owner, key)
+        indicator = LoadingIndicator(owner, loading_text) if loading_text else None
+        # Carry the caller's context so traced statements keep the UI action's name
+        future = self._threads.submit(contextvars.copy_context().run, work)
+        task = DBTask(owner, key, future, on_success, on_error, indicator)
+        with self._lock:
+            if owner not in self._tasks:
+                self._tasks[owner] = []
+                owner.bind("<Destroy>", lambda event, o=owner: self._on_destroy(event, o), add="+")
+            self._tasks[owner].append(task)
+        owner.after(self.poll_interval, self._poll, task)
+        return task
+
+    def cancel(self, owner, key=None):
+        """Cancels the owner's tasks with ``key`` (all of them if key is None)."""
+        with self._lock:
+            tasks = list(self._tasks.get(owner, ()))
+        for task in tasks:
+            if key is None or task.key == key:
+                task.cancel()
+                self._finish(task)
+
+    def in_flight(self, owner=None):
+        """Number of unfinished tasks, for one owner or overall."""
+        with self._lock:
+            if owner is not None:
+                return len(self._tasks.get(owner, ()))
+            return sum(len(tasks) for tasks in self._tasks.values())
+
+    def shutdown(self):
+        """Cancels queued work and stops the worker threads."""
+        with self._lock:
+            owners = list(self._tasks)
+        for owner in owners:
+            self.cancel(owner)
+        self._threads.shutdown(wait=False, cancel_futures=True)
+
+    def _poll(self, task):
+        if task.cancelled:
+            return
+        if not task.future.done():
+            try:
+                task.owner.after(self.poll_interval, self._poll, task)
+            except tk.TclError:
+                task.cancel()
+                self._finish(task)
+            return
+        self._finish(task)
+        try:
+            result = task.future.result()
+        except Exception as e:
+            if task.on_error is not None:
+                task.on_error(e)
+            else:
+                logging.error(f"Background task failed: {e}")
+            return
+        task.on_success(result)
+
+    def _finish(self, task):
+        if task.indicator is not None:
+            task.indicator.close()
+            task.indicator = None
+        with self._lock:
+            tasks = self._tasks.get(task.owner)
+            if tasks and task in tasks:
+                tasks.remove(task)
+
+    def _on_destroy(self, event, owner):
+        # <Destroy> also fires for child widgets through the toplevel's bindings
+        if event.widget is owner:
+            self.cancel(owner)
+            with self._lock:
+                self._tasks.pop(owner, None)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Returns the process-wide DBExecutor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = DBExecutor()
+    return _executor
+
+
+def run_in_background(owner, work, on_success, on_error=None, key=None, loading_text="Loading..."):
+    """Shortcut for get_executor().submit(...)."""
+    return get_executor().submit(owner, work, on_success, on_error, key=key, loading_text=loading_text)
+
+
+def load_cached(owner, dataset, on_success, on_error=None, key=None, loading_text="Loading...", on_refresh=None):
+    """run_in_background() for a prefetchable prefetch.Dataset.
+
+    A cached result is passed to ``on_success`` at once and then reloaded
+    without a loading indicator; ``on_refresh`` (default ``on_success``)
+    gets the fresh result only if it differs, and a failed reload is just
+    logged. Without a cached result this is run_in_background().
+    """
+    prefetcher = get_prefetcher()
+    cached = prefetcher.get(dataset.key)
+    if cached is MISSING:
+        return run_in_background(owner, lambda: prefetcher.load(dataset), on_success, on_error,
+                                 key=key, loading_text=loading_text)
+    on_success(cached)
+    refresh = on_refresh or on_success
+
+    def revalidated(fresh):
+        if fresh != cached:
+            refresh(fresh)
+
+    def revalidate_failed(e):
+        logging.error(f"Revalidating {dataset.key} failed: {e}")
+
+    return run_in_background(owner, lambda: prefetcher.load(dataset), revalidated, revalidate_failed,
+                             key=key, loading_text=None)
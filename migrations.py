@@ -0,0 +1,237 @@
+"""
+Versioned schema migrations for Oracle and the SQLite stand-in.
+
+The base tables and views come from the DDL in README.MD (Oracle) and
+sqlite_schema.sql (SQLite). Everything added after that is a numbered
+migration below; the ``schema_version`` table records which ones a database
+has, so each runs exactly once. The SQLite stand-in is upgraded
+automatically when it is opened; on Oracle run:
+
+    python migrations.py status
+    python migrations.py upgrade
+
+Migrations are append-only: never edit one that has shipped, add a new one.
+"""
+import argparse
+import collections
+import sys
+
+from database import DB_ERRORS, connection, current_backend, error_info
+
+Migration = collections.namedtuple("Migration", "version description statements")
+
+# Oracle error codes meaning the object is already there, e.g. created by
+# hand from older README DDL: name already used, column list already indexed.
+ALREADY_EXISTS = (955, 1408)
+
+VERSION_TABLE = {
+    'oracle': """
+        CREATE TABLE schema_version (
+            version NUMBER PRIMARY KEY,
+            description VARCHAR2(200) NOT NULL,
+            applied_at DATE DEFAULT SYSDATE NOT NULL
+        )
+    """,
+    'sqlite': """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description VARCHAR2(200) NOT NULL,
+            applied_at DATE DEFAULT CURRENT_TIMESTAMP NOT NULL
+        )
+    """,
+}
+
+VERSION_TABLE_EXISTS = {
+    'oracle': "SELECT COUNT(*) FROM user_tables WHERE table_name = 'SCHEMA_VERSION'",
+    'sqlite': "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'",
+}
+
+_POPULATE_SUMMARY = """
+    INSERT INTO attendance_summary (student_id, course_id, present_count, absent_count, leave_count, total_count)
+    SELECT student_id, course_id,
+           SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN status = 'Absent' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN status = 'Leave' THEN 1 ELSE 0 END),
+           COUNT(*)
+    FROM attendance
+    WHERE NOT EXISTS (SELECT 1 FROM attendance_summary)
+    GROUP BY student_id, course_id
+"""
+
+MIGRATIONS = (
+    Migration(1, "attendance_summary counters", {
+        'oracle': ["""
+            CREATE TABLE attendance_summary (
+                student_id VARCHAR2(50) NOT NULL,
+                course_id VARCHAR2(50) NOT NULL,
+                present_count NUMBER DEFAULT 0 NOT NULL,
+                absent_count NUMBER DEFAULT 0 NOT NULL,
+                leave_count NUMBER DEFAULT 0 NOT NULL,
+                total_count NUMBER DEFAULT 0 NOT NULL,
+                CONSTRAINT attendance_summary_pk PRIMARY KEY (student_id, course_id)
+            ) ORGANIZATION INDEX
+        """, _POPULATE_SUMMARY],
+        'sqlite': ["""
+            CREATE TABLE IF NOT EXISTS attendance_summary (
+                student_id VARCHAR2(50) NOT NULL,
+                course_id VARCHAR2(50) NOT NULL,
+                present_count NUMBER DEFAULT 0 NOT NULL,
+                absent_count NUMBER DEFAULT 0 NOT NULL,
+                leave_count NUMBER DEFAULT 0 NOT NULL,
+                total_count NUMBER DEFAULT 0 NOT NULL,
+                PRIMARY KEY (student_id, course_id)
+            ) WITHOUT ROWID
+        """, _POPULATE_SUMMARY],
+    }),
+    Migration(2, "composite indexes for roster, records and leave lookups", {
+        'oracle': [
+            "CREATE INDEX attendance_course_date_ix ON attendance (course_id, date_attended, student_id)",
+            "CREATE INDEX attendance_student_course_date_ix ON attendance (student_id, course_id, date_attended)",
+            "CREATE INDEX leave_requests_course_date_ix ON leave_requests (course_id, leave_date, status)",
+            "CREATE INDEX enrollments_course_student_ix ON enrollments (course_id, student_id)",
+        ],
+        'sqlite': [
+            "CREATE INDEX IF NOT EXISTS attendance_course_date_ix ON attendance (course_id, date_attended, student_id)",
+            "CREATE INDEX IF NOT EXISTS attendance_student_course_date_ix ON attendance (student_id, course_id, date_attended)",
+            "CREATE INDEX IF NOT EXISTS leave_requests_course_date_ix ON leave_requests (course_id, leave_date, status)",
+            "CREATE INDEX IF NOT EXISTS enrollments_course_student_ix ON enrollments (course_id, student_id)",
+        ],
+    }),
+    Migration(3, "case-insensitive email indexes for login", {
+        'oracle': [
+            "CREATE INDEX teachers_email_lower_ix ON teachers (LOWER(email))",
+            "CREATE INDEX students_email_lower_ix ON students (LOWER(email))",
+        ],
+        'sqlite': [
+            "CREATE INDEX IF NOT EXISTS teachers_email_lower_ix ON teachers (LOWER(email))",
+            "CREATE INDEX IF NOT EXISTS students_email_lower_ix ON students (LOWER(email))",
+        ],
+    }),
+    Migration(4, "student course list and planned classes indexes", {
+        'oracle': [
+            "CREATE INDEX enrollments_student_course_ix ON enrollments (student_id, course_id)",
+            "CREATE INDEX assignments_course_classes_ix ON assignments (course_id, total_classes)",
+        ],
+        'sqlite': [
+            "CREATE INDEX IF NOT EXISTS enrollments_student_course_ix ON enrollments (student_id, course_id)",
+            "CREATE INDEX IF NOT EXISTS assignments_course_classes_ix ON assignments (course_id, total_classes)",
+        ],
+    }),
+    Migration(5, "teacher home summary indexes", {
+        'oracle': [
+            "CREATE INDEX assignments_teacher_course_ix ON assignments (teacher_id, course_id)",
+            "CREATE INDEX leave_requests_status_course_ix ON leave_requests (status, course_id)",
+        ],
+        'sqlite': [
+            "CREATE INDEX IF NOT EXISTS assignments_teacher_course_ix ON assignments (teacher_id, course_id)",
+            "CREATE INDEX IF NOT EXISTS leave_requests_status_course_ix ON leave_requests (status, course_id)",
+        ],
+    }),
+    # The leave windows identify requests by request_id (sqlite_schema.sql
+    # already has these columns)
+    Migration(6, "leave request views expose request_id", {
+        'oracle': ["""
+            CREATE OR REPLACE VIEW pending_leave_requests_view AS
+            SELECT lr.request_id, lr.student_id, c.course_name, lr.leave_date, lr.reason, lr.status, c.course_id
+            FROM leave_requests lr
+            JOIN courses c ON lr.course_id = c.course_id
+            WHERE lr.status = 'Pending'
+        """, """
+            CREATE OR REPLACE VIEW leave_requests_update_view AS
+            SELECT request_id, student_id, course_id, leave_date, reason, status
+            FROM leave_requests
+        """],
+        'sqlite': [],
+    }),
+)
+
+
+def latest_version():
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def current_version(conn, backend):
+    """Returns the highest applied migration, 0 for a database without any."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(VERSION_TABLE_EXISTS[backend])
+        if not cursor.fetchone()[0]:
+            return 0
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+        return cursor.fetchone()[0] or 0
+    finally:
+        cursor.close()
+
+
+def pending(conn, backend):
+    """Returns the migrations not yet applied, oldest first."""
+    version = current_version(conn, backend)
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+
+def _execute_ddl(cursor, statement, backend):
+    try:
+        cursor.execute(statement)
+    except DB_ERRORS as e:
+        code, _ = error_info(e)
+        if backend != 'oracle' or code not in ALREADY_EXISTS:
+            raise
+
+
+def upgrade(conn, backend=None, target=None):
+    """Applies pending migrations up to ``target`` (default: all).
+
+    Works on a raw driver connection or a pooled one. Each migration is
+    recorded in schema_version and committed on its own, so a failed run can
+    simply be repeated.
+
+    Returns:
+        list: the Migration tuples applied.
+    """
+    backend = backend or current_backend()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(VERSION_TABLE_EXISTS[backend])
+        if not cursor.fetchone()[0]:
+            cursor.execute(VERSION_TABLE[backend])
+            conn.commit()
+        applied = []
+        for migration in pending(conn, backend):
+            if target is not None and migration.version > target:
+                break
+            for statement in migration.statements[backend]:
+                _execute_ddl(cursor, statement, backend)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description) VALUES (:1, :2)",
+                (migration.version, migration.description),
+            )
+            conn.commit()
+            applied.append(migration)
+        return applied
+    except DB_ERRORS:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show or apply schema migrations.")
+    parser.add_argument("command", choices=("status", "upgrade"))
+    parser.add_argument("--target", type=int, help="stop after this version")
+    args = parser.parse_args(argv)
+    backend = current_backend()
+    with connection() as conn:
+        if args.command == "upgrade":
+            for migration in upgrade(conn, backend, args.target):
+                print(f"Applied {migration.version}: {migration.description}")
+        version = current_version(conn, backend)
+        waiting = pending(conn, backend)
+    print(f"{backend} schema version {version} (latest {latest_version()}), {len(waiting)} pending.")
+    for migration in waiting:
+        print(f"  pending {migration.version}: {migration.description}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
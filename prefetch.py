@@ -0,0 +1,206 @@
+"""
+Background prefetch of the per-course data behind the dashboard windows.
+
+Once a dashboard has shown its course list it hands the prefetcher the
+datasets its follow-up windows will ask for (a course's roster and records
+for today, a student's records, overall attendance and statistics). One
+worker thread loads them, the selected course first, into a bounded LRU
+cache, so opening a window shows cached rows at once; the window then
+revalidates them in the background (``db_worker.load_cached``).
+
+Every cache key starts with (dataset name, course_id). Code that changes a
+course's attendance must call ``invalidate(course_id)``; the repository does
+this for its writes, so a window never opens on rows older than the last save.
+"""
+import collections
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from tracing import action
+
+PREFETCH_CACHE_SIZE = 64  # datasets kept; the least recently used is dropped
+PREFETCH_MAX_AGE = 300.0  # seconds a cached dataset may be shown before it must be reloaded
+
+# Queue priorities, lowest first
+SELECTED = 0
+BACKGROUND = 1
+
+MISSING = object()  # returned by get() for a dataset that is not cached
+
+
+class Dataset(collections.namedtuple("Dataset", "key load")):
+    """A prefetchable result: its cache key (name, course_id, ...) and a
+    function that loads it from the database."""
+
+    @property
+    def course_id(self):
+        return self.key[1]
+
+
+class Prefetcher:
+    """
+    Bounded cache of window datasets plus a priority queue that fills it.
+
+    ``warm()`` queues datasets that are not cached yet; ``prioritize()``
+    moves one course's queued datasets to the front. ``load()`` runs a
+    dataset in the caller's thread and caches the result, for windows
+    that need it now.
+    """
+
+    def __init__(self, size=PREFETCH_CACHE_SIZE, max_age=PREFETCH_MAX_AGE):
+        self.size = size
+        self.max_age = max_age
+        self._entries = collections.OrderedDict()  # key -> (value, loaded at)
+        self._queue = []  # heap of (priority, sequence, Dataset)
+        self._queued = {}  # key -> (priority, sequence) of its live heap entry
+        self._sequence = itertools.count()
+        # Bumped by invalidate(): a load that started before is not cached.
+        # Per course, so a write to one course keeps the others' loads.
+        self._generation = 0
+        self._course_generations = collections.Counter()
+        self._condition = threading.Condition()
+        self._worker = None
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+
+    def get(self, key):
+        """Returns the cached value for ``key``, or MISSING if absent or too old."""
+        with self._condition:
+            if not self._is_fresh(key):
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value, generation=None):
+        """Caches ``value``; skipped if the key's course was invalidated since
+        ``generation`` (from ``_generation_of``)."""
+        with self._condition:
+            if generation is not None and generation != self._generation_of(key):
+                return
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def load(self, dataset):
+        """Loads ``dataset`` now, caches and returns it; errors propagate."""
+        with self._condition:
+            generation = self._generation_of(dataset.key)
+        value = dataset.load()
+        self.put(dataset.key, value, generation)
+        return value
+
+    def warm(self, datasets, priority=BACKGROUND):
+        """Queues the datasets that are not cached yet, in the given order."""
+        with self._condition:
+            for dataset in datasets:
+                if not self._is_fresh(dataset.key):
+                    self._push(dataset, priority)
+            if self._queue:
+                self._start_worker()
+                self._condition.notify()
+
+    def prioritize(self, course_id):
+        """Moves the queued datasets of ``course_id`` ahead of the rest."""
+        with self._condition:
+            for _, _, dataset in list(self._queue):
+                if dataset.course_id == course_id and self._queued.get(dataset.key, (None,))[0] == BACKGROUND:
+                    self._push(dataset, SELECTED)
+            self._condition.notify()
+
+    def cancel(self):
+        """Drops everything still queued, e.g. when the dashboard closes."""
+        with self._condition:
+            self._queue.clear()
+            self._queued.clear()
+
+    def invalidate(self, course_id=None):
+        """Drops the cached datasets of one course, or all of them."""
+        with self._condition:
+            if course_id is None:
+                self._generation += 1
+                self._entries.clear()
+                return
+            self._course_generations[course_id] += 1
+            for key in [key for key in self._entries if key[1] == course_id]:
+                del self._entries[key]
+
+    def pending(self):
+        """Number of datasets waiting to be prefetched."""
+        with self._condition:
+            return len(self._queued)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'cached': len(self._entries),
+                'queued': len(self._queued),
+                'hits': self.hits,
+                'misses': self.misses,
+                'prefetched': self.prefetched,
+            }
+
+    def _generation_of(self, key):
+        return self._generation, self._course_generations[key[1]]
+
+    def _is_fresh(self, key):
+        entry = self._entries.get(key)
+        return entry is not None and time.monotonic() - entry[1] <= self.max_age
+
+    def _push(self, dataset, priority):
+        # A re-queued key leaves its old heap entry behind; _next() skips it
+        marker = (priority, next(self._sequence))
+        self._queued[dataset.key] = marker
+        heapq.heappush(self._queue, marker + (dataset,))
+
+    def _next(self):
+        """Waits for and returns the next live queued dataset."""
+        with self._condition:
+            while True:
+                while self._queue:
+                    priority, sequence, dataset = heapq.heappop(self._queue)
+                    if self._queued.get(dataset.key) != (priority, sequence):
+                        continue
+                    del self._queued[dataset.key]
+                    if not self._is_fresh(dataset.key):  # a window may have loaded it meanwhile
+                        return dataset, self._generation_of(dataset.key)
+                self._condition.wait()
+
+    def _start_worker(self):
+        # One worker: prefetching never holds more than one pooled session
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="prefetch", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            dataset, generation = self._next()
+            try:
+                with action("prefetch"):
+                    value = dataset.load()
+            except Exception as e:
+                # Opportunistic: the window loads it again when it opens
+                logging.error(f"Prefetch of {dataset.key} failed: {e}")
+                continue
+            self.put(dataset.key, value, generation)
+            with self._condition:
+                self.prefetched += 1
+
+
+_prefetcher = Prefetcher()
+
+
+def get_prefetcher():
+    """Returns the process-wide Prefetcher."""
+    return _prefetcher
+
+
+def invalidate(course_id=None):
+    """Drops cached datasets of ``course_id`` (all if None) after a write."""
+    _prefetcher.invalidate(course_id)
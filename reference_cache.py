@@ -0,0 +1,86 @@
+"""
+In-process cache of course rosters (the set of enrolled student ids).
+
+Enrollments change rarely, but the attendance import validates every row
+against the course's roster. Each roster is kept for ``ROSTER_TTL``
+seconds; code that changes enrollments or courses must call the matching
+``invalidate_*`` function so the next read goes back to the database.
+
+The dashboards' course lists are not cached here: they come with live
+attendance counts (attendance_summary.STUDENT_COURSE_STATS_QUERY and
+attendance_queries.TEACHER_COURSE_SUMMARY_QUERY), so each open is one query
+that also replaces the per-course lookups. Navigating from the list into a
+course's windows is served by the prefetch cache (prefetch.py).
+"""
+import threading
+import time
+
+from database import connection
+from statements import KEY, execute, register
+
+ROSTER_TTL = 300.0  # seconds a course roster is reused
+
+COURSE_ROSTER_QUERY = register('course roster', """
+    SELECT student_id
+    FROM enrollments
+    WHERE course_id = :cid
+""", {'cid': KEY})
+
+
+class TTLCache:
+    """Thread-safe key -> value cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}  # key -> (value, expiry time)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = loader()
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+        return value
+
+    def invalidate(self, key=None):
+        """Drops one key, or every entry if key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+course_rosters = TTLCache(ROSTER_TTL)
+
+
+def _fetch_roster(course_id):
+    with connection() as conn:
+        cursor = conn.cursor()
+        execute(cursor, COURSE_ROSTER_QUERY, {'cid': course_id})
+        roster = frozenset(row[0] for row in cursor)
+        cursor.close()
+    return roster
+
+
+def course_roster(course_id):
+    """Returns the frozenset of student ids enrolled in a course."""
+    return course_rosters.get_or_load(course_id, lambda: _fetch_roster(course_id))
+
+
+def invalidate_enrollments(course_id=None):
+    """Call after enrollments change (None = any course)."""
+    course_rosters.invalidate(course_id)
+
+
+def invalidate_courses():
+    """Call after courses, enrollments or students change in bulk; drops everything."""
+    course_rosters.invalidate()
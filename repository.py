@@ -0,0 +1,460 @@
+"""
+Data-access layer used by the Tk windows.
+
+Every database read and write the UI needs is a method here, so windows
+never hold cursors or SQL. Each method borrows a session from the pool,
+runs its statements as one transaction and returns plain Python values;
+database errors propagate as the driver's exceptions (database.DB_ERRORS).
+
+There is one repository class per backend. Every statement is registered
+in statements.py with its bind types; those whose text differs between
+Oracle and SQLite carry one text per backend, and each repository passes its
+own backend when it runs them. Call ``get_repository()`` for the one
+matching the shared pool.
+"""
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+
+import attendance_export
+import attendance_import
+import attendance_queries as queries
+import prefetch
+import reference_cache
+from attendance_summary import fetch_stats, fetch_student_course_stats, resync_pairs
+from database import get_pool
+from schema_cache import get_schema_cache
+from statements import DATE, EMAIL, KEY, NUMBER, VARCHAR2, execute, register
+from table_browser import (
+    KeysetPager, attendance_pairs_statement, checked_columns, delete_statement, insert_statement,
+    update_statement,
+)
+
+# Writes to these tables make the cached course rosters stale
+REFERENCE_TABLES = ("courses", "enrollments", "students")
+
+# ... and these the prefetched window data (see prefetch.py)
+PREFETCHED_TABLES = ("courses", "enrollments", "assignments", "students", "attendance", "leave_requests")
+
+# Role and id in one round trip; both branches are probes of the
+# LOWER(email) indexes from migration 3. Teachers win if an email is in both.
+LOGIN_QUERY = register('login', """
+    SELECT 1 AS role_rank, 'teacher' AS role, teacher_id AS user_id
+    FROM teachers
+    WHERE LOWER(email) = LOWER(:email) AND password = :password
+    UNION ALL
+    SELECT 2, 'student', student_id
+    FROM students
+    WHERE LOWER(email) = LOWER(:email) AND password = :password
+    ORDER BY 1
+""", {'email': EMAIL, 'password': VARCHAR2(100)})
+
+ENROLL_STATEMENT = register('enroll student', """
+    INSERT INTO enrollments_insert_view (enrollment_id, student_id, course_id)
+    VALUES (:enrollment_id, :student_id, :course_id)
+""", {'enrollment_id': KEY, 'student_id': KEY, 'course_id': KEY})
+
+UNENROLL_STATEMENT = register('unenroll student', """
+    DELETE FROM enrollments_delete_view
+    WHERE student_id = :student_id AND course_id = :course_id
+""", {'student_id': KEY, 'course_id': KEY})
+
+PENDING_LEAVE_QUERY = register('pending leave requests', """
+    SELECT
+        REQUEST_ID,
+        STUDENT_ID,
+        COURSE_NAME,
+        TO_CHAR(LEAVE_DATE, 'YYYY-MM-DD'),
+        REASON,
+        STATUS,
+        COURSE_ID
+    FROM pending_leave_requests_view
+""")
+
+STUDENT_LEAVE_QUERY = register('student leave requests', """
+    SELECT request_id, course_name, TO_CHAR(leave_date, 'YYYY-MM-DD'), reason, status
+    FROM PENDING_LEAVE_REQUESTS_VIEW
+    WHERE student_id = :student_id
+""", {'student_id': KEY})
+
+SUBMIT_LEAVE_STATEMENT = register('submit leave request', """
+    INSERT INTO leave_requests (student_id, course_id, leave_date, reason, status)
+    VALUES (:sid, :cid, :ldate, :reason, 'Pending')
+""", {'sid': KEY, 'cid': KEY, 'ldate': DATE, 'reason': VARCHAR2(255)})
+
+# Primary-key update; student_id keeps students to their own requests, and
+# a request a teacher has already decided can no longer be dismissed
+DISMISS_LEAVE_STATEMENT = register('dismiss leave request', """
+    UPDATE leave_requests
+    SET status = 'Dismissed'
+    WHERE request_id = :request_id
+      AND student_id = :student_id
+      AND status = 'Pending'
+""", {'request_id': NUMBER, 'student_id': KEY})
+
+OVERALL_ATTENDANCE_QUERY = register('overall attendance', """
+    SELECT date_attended, status
+    FROM OVERALL_ATTENDANCE_VIEW
+    WHERE student_id = :sid AND course_id = :cid
+    ORDER BY date_attended ASC
+""", {'sid': KEY, 'cid': KEY})
+
+# Rows that reference a student and go before the student itself
+STUDENT_CHILD_DELETES = tuple(register(f"delete student's {name}", statement, (KEY,)) for name, statement in (
+    ("enrollments", "DELETE FROM enrollments WHERE student_id = :1"),
+    ("attendance", "DELETE FROM attendance WHERE student_id = :1"),
+    ("attendance summary", "DELETE FROM attendance_summary WHERE student_id = :1"),
+    ("department assignments",
+     "DELETE FROM assignments WHERE teacher_id IN (SELECT teacher_id FROM teachers WHERE department_name = "
+     "(SELECT department_name FROM students WHERE student_id = :1))"),
+    ("leave requests", "DELETE FROM leave_requests WHERE student_id = :1"),
+))
+
+
+class AttendanceAlreadyMarked(Exception):
+    """Raised by save_attendance when the course already has rows for the date."""
+
+
+class Repository:
+    """Backend-independent operations; subclasses set ``backend``."""
+
+    backend = None
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    @contextmanager
+    def _cursor(self):
+        """Yields a cursor on a pooled session; the caller commits."""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield conn, cursor
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def _fetchall(self, statement, binds):
+        with self._cursor() as (conn, cursor):
+            execute(cursor, statement, binds, self.backend)
+            return cursor.fetchall()
+
+    # --- Login ---
+
+    def authenticate(self, email, password):
+        """Returns ('teacher', teacher_id), ('student', student_id) or None."""
+        with self._cursor() as (conn, cursor):
+            execute(cursor, LOGIN_QUERY, {'email': email, 'password': password}, self.backend)
+            row = cursor.fetchone()
+        return (row[1], row[2]) if row else None
+
+    # --- Courses and rosters ---
+
+    def student_course_stats(self, student_id):
+        """Returns [(course_id, course_name, present, absent, leave, recorded,
+        planned classes)] for a student's courses in one round trip."""
+        with self._cursor() as (conn, cursor):
+            return fetch_student_course_stats(cursor, student_id, self.backend)
+
+    def teacher_course_summary(self, teacher_id, day):
+        """Returns [(course_id, course_name, roster size, present, absent, leave,
+        marked, pending leave requests)] for a teacher's courses on a date,
+        in one round trip."""
+        with self._cursor() as (conn, cursor):
+            return queries.fetch_teacher_course_summary(cursor, teacher_id, day, self.backend)
+
+    def roster(self, course_id, day):
+        """Returns [(student_id, student_name, status)] for a course on a date."""
+        with self._cursor() as (conn, cursor):
+            return queries.fetch_roster_with_status(cursor, course_id, day, self.backend)
+
+    def enroll_student(self, course_id, student_id):
+        """Adds a student to a course; returns the new enrollment id."""
+        enrollment_id = str(uuid.uuid4())
+        with self._cursor() as (conn, cursor):
+            execute(cursor, ENROLL_STATEMENT, {
+                'enrollment_id': enrollment_id, 'student_id': student_id, 'course_id': course_id,
+            }, self.backend)
+            conn.commit()
+        reference_cache.invalidate_enrollments(course_id)
+        prefetch.invalidate(course_id)
+        return enrollment_id
+
+    def unenroll_student(self, course_id, student_id):
+        with self._cursor() as (conn, cursor):
+            execute(cursor, UNENROLL_STATEMENT, {'student_id': student_id, 'course_id': course_id}, self.backend)
+            conn.commit()
+        reference_cache.invalidate_enrollments(course_id)
+        prefetch.invalidate(course_id)
+
+    # --- Attendance ---
+
+    def save_attendance(self, course_id, day, statuses):
+        """Inserts a day's attendance for a course, all or nothing.
+
+        Args:
+            statuses: (student_id, status) pairs.
+
+        Returns:
+            list: (student_id, error message) for rejected rows; when it is
+            not empty nothing was saved.
+
+        Raises:
+            AttendanceAlreadyMarked: the course already has rows for ``day``.
+        """
+        with self._cursor() as (conn, cursor):
+            if queries.attendance_already_marked(cursor, course_id, day, self.backend):
+                raise AttendanceAlreadyMarked(course_id, day)
+            failed = queries.save_attendance_bulk(cursor, course_id, day, statuses, self.backend)
+            if failed:
+                conn.rollback()
+            else:
+                conn.commit()
+                prefetch.invalidate(course_id)
+        return failed
+
+    def update_attendance(self, course_id, day, changes):
+        """Writes changed statuses, all or nothing.
+
+        Returns:
+            tuple: (rows updated, list of (student_id, error message)); when
+            the list is not empty nothing was updated.
+        """
+        with self._cursor() as (conn, cursor):
+            touched, failed = queries.update_attendance_changes(cursor, course_id, day, changes, self.backend)
+            if failed:
+                conn.rollback()
+            else:
+                conn.commit()
+                prefetch.invalidate(course_id)
+        return touched, failed
+
+    def import_attendance(self, course_id, records, dry_run=False,
+                          batch_size=attendance_import.IMPORT_BATCH_SIZE, progress=None):
+        """Imports (line number, fields) CSV records for a course in one transaction.
+
+        Rows are validated against the course's cached roster; rejected rows
+        are reported in the result and the rest are committed, unless
+        ``dry_run`` rolls everything back.
+
+        Returns:
+            attendance_import.ImportResult
+        """
+        roster = reference_cache.course_roster(course_id)
+        with self._cursor() as (conn, cursor):
+            result = attendance_import.import_attendance(
+                cursor, course_id, records, roster, self.backend, batch_size, progress)
+            if dry_run:
+                conn.rollback()
+            else:
+                conn.commit()
+                prefetch.invalidate(course_id)
+        return result
+
+    def count_attendance_export(self, course_id=None, department=None, date_from=None, date_to=None):
+        """Returns how many rows export_attendance() would write."""
+        with self._cursor() as (conn, cursor):
+            return attendance_export.count_rows(cursor, {
+                'course_id': course_id, 'department': department, 'date_from': date_from, 'date_to': date_to,
+            }, self.backend)
+
+    def export_attendance(self, path, course_id=None, department=None, date_from=None, date_to=None,
+                          file_format=None, progress=None):
+        """Streams matching attendance to ``path``; ``date_to`` is inclusive.
+
+        The format is taken from the file name unless ``file_format`` ('csv'
+        or 'parquet') is given. A partly written file is removed on error.
+
+        Returns:
+            int: rows written.
+        """
+        writer = attendance_export.WRITERS[file_format or attendance_export.format_for(path)](path)
+        filters = {'course_id': course_id, 'department': department, 'date_from': date_from, 'date_to': date_to}
+        try:
+            with self._cursor() as (conn, cursor):
+                written = attendance_export.export_rows(cursor, writer, filters, progress, backend=self.backend)
+            writer.close()
+        except BaseException:
+            writer.close()
+            os.remove(path)
+            raise
+        return written
+
+    def course_records(self, course_id, day):
+        """Returns [(student_id, formatted_date, status)] for a course on a date."""
+        day_start, day_end = queries.day_range(day)
+        return self._fetchall(queries.COURSE_RECORDS_QUERY,
+                              {'cid': course_id, 'day_start': day_start, 'day_end': day_end})
+
+    def student_records(self, student_id, course_id, day):
+        """Returns [(date_attended, status)] for one student, course and date."""
+        day_start, day_end = queries.day_range(day)
+        return self._fetchall(queries.STUDENT_RECORDS_QUERY, {
+            'cid': course_id, 'sid': student_id, 'day_start': day_start, 'day_end': day_end,
+        })
+
+    def overall_attendance(self, student_id, course_id):
+        """Returns [(date_attended, status)] for a student's whole course history."""
+        return self._fetchall(OVERALL_ATTENDANCE_QUERY, {'sid': student_id, 'cid': course_id})
+
+    def attendance_stats(self, student_id, course_id):
+        """Returns (present, absent, leave, recorded, planned classes) or None."""
+        with self._cursor() as (conn, cursor):
+            return fetch_stats(cursor, student_id, course_id, self.backend)
+
+    # --- Leave requests ---
+
+    def pending_leave_requests(self):
+        """Returns (request_id, student_id, course_name, leave_date, reason,
+        status, course_id) rows, leave_date as 'YYYY-MM-DD'."""
+        return self._fetchall(PENDING_LEAVE_QUERY, {})
+
+    def student_leave_requests(self, student_id):
+        """Returns (request_id, course_name, leave_date, reason, status) rows."""
+        return self._fetchall(STUDENT_LEAVE_QUERY, {'student_id': student_id})
+
+    def submit_leave_request(self, student_id, course_id, leave_date, reason):
+        with self._cursor() as (conn, cursor):
+            execute(cursor, SUBMIT_LEAVE_STATEMENT, {
+                'sid': student_id, 'cid': course_id, 'ldate': leave_date, 'reason': reason,
+            }, self.backend)
+            conn.commit()
+
+    def decide_leave_requests(self, requests, status):
+        """Approves or rejects requests in one transaction, all or nothing.
+
+        Args:
+            requests: (request_id, student_id, course_id, leave_date) tuples.
+            status: 'Approved' (also marks the dates as 'Leave') or 'Rejected'.
+
+        Returns:
+            tuple: (list of (request, error message) for rejected rows, list
+            of requests no longer pending and left unchanged). When the first
+            list is not empty nothing was changed.
+        """
+        with self._cursor() as (conn, cursor):
+            failed, stale = queries.decide_leave_requests(cursor, requests, status, self.backend)
+            if failed:
+                conn.rollback()
+            else:
+                conn.commit()
+                for course_id in {request[2] for request in requests}:
+                    prefetch.invalidate(course_id)
+        return failed, stale
+
+    def dismiss_leave_request(self, request_id, student_id):
+        """Dismisses one of a student's requests; returns False if it was not pending."""
+        with self._cursor() as (conn, cursor):
+            execute(cursor, DISMISS_LEAVE_STATEMENT, {'request_id': request_id, 'student_id': student_id},
+                    self.backend)
+            dismissed = cursor.rowcount > 0
+            conn.commit()
+        return dismissed
+
+    # --- CRUD table browser ---
+
+    def pager(self, table, **kwargs):
+        """Returns a KeysetPager for one of the browsable tables."""
+        return KeysetPager(table, backend=self.backend, **kwargs)
+
+    def fetch_page(self, pager, after_key=None):
+        """Returns (columns, rows, last key) for the page after ``after_key``."""
+        with self.pool.connection() as conn:
+            return pager.fetch_page(conn, after_key)
+
+    def table_info(self, table):
+        """Returns the cached TableInfo (columns, primary key) for ``table``."""
+        return get_schema_cache().get(table)
+
+    def _after_write(self, table):
+        if table in REFERENCE_TABLES:
+            reference_cache.invalidate_courses()
+        if table in PREFETCHED_TABLES:
+            prefetch.invalidate()
+
+    def insert_record(self, table, column_names, values):
+        """Inserts one row; ``values`` are already converted bind values."""
+        columns = checked_columns(table, column_names)
+        with self._cursor() as (conn, cursor):
+            execute(cursor, insert_statement(table, columns), list(values), self.backend)
+            if table == "attendance":
+                record = dict(zip([column.name.lower() for column in columns], values))
+                resync_pairs(cursor, [(record.get("student_id"), record.get("course_id"))], self.backend)
+            conn.commit()
+        self._after_write(table)
+
+    def delete_record(self, table, key_column, key_value):
+        """Deletes one row by key, removing a student's dependent rows first.
+
+        Returns:
+            int: rows deleted from ``table``.
+        """
+        key, = checked_columns(table, [key_column])
+        with self._cursor() as (conn, cursor):
+            if table == "students":
+                for statement in STUDENT_CHILD_DELETES:
+                    execute(cursor, statement, (key_value,), self.backend)
+            summary_pairs = []
+            if table == "attendance":
+                execute(cursor, attendance_pairs_statement(key), (key_value,), self.backend)
+                summary_pairs = cursor.fetchall()
+            execute(cursor, delete_statement(table, key), (key_value,), self.backend)
+            deleted = cursor.rowcount
+            resync_pairs(cursor, summary_pairs, self.backend)  # Keep the running counters in the same transaction
+            conn.commit()
+        self._after_write(table)
+        return deleted
+
+    def update_student(self, column, value, student_id):
+        """Sets one column of a student row; returns rows updated."""
+        column, key = checked_columns("students", [column, "student_id"])
+        with self._cursor() as (conn, cursor):
+            execute(cursor, update_statement("students", column, key),
+                    {'new_value': value, 'key_value': student_id}, self.backend)
+            updated = cursor.rowcount
+            conn.commit()
+        self._after_write("students")
+        return updated
+
+
+class OracleRepository(Repository):
+    """Repository for the Oracle schema (oracledb sessions)."""
+
+    backend = 'oracle'
+
+
+class SQLiteRepository(Repository):
+    """Repository for the SQLite stand-in built from sqlite_schema.sql."""
+
+    backend = 'sqlite'
+
+
+REPOSITORIES = {
+    'oracle': OracleRepository,
+    'sqlite': SQLiteRepository,
+}
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def create_repository(pool):
+    """Returns the repository class matching ``pool.backend``, bound to it."""
+    try:
+        return REPOSITORIES[pool.backend](pool)
+    except KeyError:
+        raise ValueError(f"No repository for database backend: {pool.backend!r}") from None
+
+
+def get_repository():
+    """Returns the repository for the process-wide pool."""
+    global _repository
+    pool = get_pool()
+    with _repository_lock:
+        if _repository is None or _repository.pool is not pool:
+            _repository = create_repository(pool)
+        return _repository
+
@@ -0,0 +1,198 @@
+"""
+Virtualized attendance roster for AttendanceWindow.
+
+Creating a Label and three Radiobuttons per student costs seconds for large
+courses. RosterGrid keeps the roster in compact backing arrays (ids, names
+and one status byte per student) and only creates widgets for the rows that
+fit on screen; scrolling re-binds those few rows to other students.
+
+Keyboard: Up/Down/PageUp/PageDown/Home/End move the highlighted row, and
+P, A or L mark it Present, Absent or Leave and move to the next student.
+"""
+import tkinter as tk
+
+STATUSES = ("Present", "Absent", "Leave")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+STATUS_KEYS = {"p": "Present", "a": "Absent", "l": "Leave"}
+
+HIGHLIGHT = "#dbe9ff"
+
+
+class _RowSlot:
+    """One on-screen row, re-bound to whichever student scrolls into it."""
+
+    def __init__(self, grid, parent):
+        self.grid = grid
+        self.index = None
+        self.frame = tk.Frame(parent)
+        self.var = tk.StringVar()
+        self.label = tk.Label(self.frame, font=grid.font, anchor="w", width=grid.name_width)
+        self.label.pack(side="left", padx=10)
+        self.normal_bg = self.label.cget("bg")
+        for status in STATUSES:
+            tk.Radiobutton(
+                self.frame, text=status, variable=self.var, value=status,
+                command=self._on_pick, takefocus=0,
+            ).pack(side="left", padx=5)
+        for widget in (self.frame, self.label):
+            widget.bind("<Button-1>", self._on_click)
+        self.frame.bind("<MouseWheel>", grid._on_mousewheel)
+        self.label.bind("<MouseWheel>", grid._on_mousewheel)
+
+    def bind_row(self, index):
+        self.index = index
+        self.label.config(
+            text=f"{self.grid.student_ids[index]} - {self.grid.names[index]}",
+            bg=HIGHLIGHT if index == self.grid.cursor else self.normal_bg,
+        )
+        self.var.set(STATUSES[self.grid.codes[index]])
+
+    def _on_pick(self):
+        # Radiobutton commands only fire on user clicks, never on var.set()
+        self.grid.set_status(self.index, self.var.get())
+        self.grid.move_cursor(self.index)
+
+    def _on_click(self, event):
+        self.grid.move_cursor(self.index)
+        self.grid.canvas.focus_set()
+
+
+class RosterGrid(tk.Frame):
+    """
+    Scrollable list of students with a Present/Absent/Leave choice each.
+
+    Only about one screenful of row widgets exists at any time, no matter
+    how many students are loaded with set_roster().
+    """
+
+    def __init__(self, parent, row_height=32, font=("Arial", 12), name_width=32, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.row_height = row_height
+        self.font = font
+        self.name_width = name_width
+        self.student_ids = []
+        self.names = []
+        self.codes = bytearray()
+        self.positions = {}  # student_id -> index in the backing arrays
+        self.first = 0  # index of the student shown in the top row
+        self.cursor = 0  # index of the keyboard-highlighted student
+        self._slots = []
+
+        header = tk.Frame(self)
+        header.pack(fill="x")
+        tk.Label(header, text="Student ID - Name", font=(font[0], font[1], "bold"),
+                 anchor="w", width=name_width).pack(side="left", padx=10, pady=5)
+        tk.Label(header, text="Status", font=(font[0], font[1], "bold")).pack(side="left", padx=10)
+
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas = tk.Canvas(self, highlightthickness=1, takefocus=1)
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.canvas.bind("<Configure>", lambda event: self.render())
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda event: self.scroll_rows(-3))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll_rows(3))
+        self.canvas.bind("<Button-1>", lambda event: self.canvas.focus_set())
+        self.canvas.bind("<Up>", lambda event: self.move_cursor(self.cursor - 1))
+        self.canvas.bind("<Down>", lambda event: self.move_cursor(self.cursor + 1))
+        self.canvas.bind("<Prior>", lambda event: self.move_cursor(self.cursor - self.visible_rows()))
+        self.canvas.bind("<Next>", lambda event: self.move_cursor(self.cursor + self.visible_rows()))
+        self.canvas.bind("<Home>", lambda event: self.move_cursor(0))
+        self.canvas.bind("<End>", lambda event: self.move_cursor(len(self) - 1))
+        self.canvas.bind("<Key>", self._on_key)
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    def set_roster(self, roster):
+        """Replaces the roster with (student_id, student_name, status) rows."""
+        self.student_ids = [row[0] for row in roster]
+        self.names = [row[1] for row in roster]
+        self.codes = bytearray(STATUS_CODES.get(row[2], STATUS_CODES["Absent"]) for row in roster)
+        self.positions = {student_id: index for index, student_id in enumerate(self.student_ids)}
+        self.first = 0
+        self.cursor = 0
+        self.render()
+
+    def statuses(self):
+        """Returns {student_id: status} for every student in the roster."""
+        return {student_id: STATUSES[code] for student_id, code in zip(self.student_ids, self.codes)}
+
+    def get_status(self, student_id):
+        return STATUSES[self.codes[self.positions[student_id]]]
+
+    def set_status(self, index, status):
+        """Marks the student at ``index``; redraws its row if it is visible."""
+        self.codes[index] = STATUS_CODES[status]
+        slot = self._slot_for(index)
+        if slot is not None:
+            slot.var.set(status)
+
+    def visible_rows(self):
+        height = self.canvas.winfo_height()
+        if height <= 1:  # Not mapped yet; fall back to the requested height
+            height = int(self.canvas.cget("height"))
+        return max(1, height // self.row_height)
+
+    def render(self):
+        """Binds the on-screen row widgets to the students currently in view."""
+        visible = self.visible_rows()
+        total = len(self)
+        self.first = max(0, min(self.first, total - visible))
+        while len(self._slots) < visible:
+            self._slots.append(_RowSlot(self, self.canvas))
+        for offset, slot in enumerate(self._slots):
+            index = self.first + offset
+            if offset < visible and index < total:
+                slot.bind_row(index)
+                slot.frame.place(x=0, y=offset * self.row_height, relwidth=1.0, height=self.row_height)
+            else:
+                slot.index = None
+                slot.frame.place_forget()
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_rows(self, delta):
+        self.first += delta
+        self.render()
+
+    def move_cursor(self, index):
+        """Highlights the student at ``index`` and scrolls it into view."""
+        if not len(self):
+            return
+        self.cursor = max(0, min(index, len(self) - 1))
+        visible = self.visible_rows()
+        if self.cursor < self.first:
+            self.first = self.cursor
+        elif self.cursor >= self.first + visible:
+            self.first = self.cursor - visible + 1
+        self.render()
+
+    def _slot_for(self, index):
+        for slot in self._slots:
+            if slot.index == index:
+                return slot
+        return None
+
+    def _on_key(self, event):
+        status = STATUS_KEYS.get(event.char.lower()) if event.char else None
+        if status is None or not len(self):
+            return None
+        self.set_status(self.cursor, status)
+        self.move_cursor(self.cursor + 1)
+        return "break"
+
+    def _on_mousewheel(self, event):
+        self.scroll_rows(-1 if event.delta > 0 else 1)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        total = len(self)
+        if action == "moveto":
+            self.first = int(float(amount) * total)
+        elif action == "scroll":
+            step = self.visible_rows() if unit == "pages" else 1
+            self.first += int(amount) * step
+        self.render()
@@ -0,0 +1,210 @@
+"""
+Process-wide cache of table metadata for the CRUD dialogs.
+
+Column names, types, lengths, nullability and primary keys are read from the
+data dictionary once per table and then served from memory, so opening an
+insert or update dialog costs no round trip. Call ``refresh()`` after a
+schema change (the CRUD window has a button for it).
+
+``convert_value`` uses the cached types to turn dialog input into the
+Python value the driver should bind, without asking the database, and
+``bind_type`` gives the type the CRUD statements declare for a column.
+"""
+import collections
+import datetime
+import decimal
+import re
+import threading
+
+from database import connection, current_backend
+from statements import DATE, NUMBER, TIMESTAMP, VARCHAR2, execute, register
+
+ColumnInfo = collections.namedtuple(
+    "ColumnInfo", "name data_type length precision scale nullable identity"
+)
+TableInfo = collections.namedtuple("TableInfo", "name columns primary_key")
+
+ORACLE_COLUMNS_QUERY = register('table columns', {'oracle': """
+    SELECT c.column_name, c.data_type, c.data_length, c.data_precision, c.data_scale,
+           c.nullable, c.identity_column,
+           CASE WHEN pk.column_name IS NOT NULL THEN 1 ELSE 0 END AS is_primary_key
+    FROM user_tab_columns c
+    LEFT JOIN (
+        SELECT cc.column_name
+        FROM user_constraints k
+        JOIN user_cons_columns cc ON cc.constraint_name = k.constraint_name
+        WHERE k.table_name = :table_name AND k.constraint_type = 'P'
+    ) pk ON pk.column_name = c.column_name
+    WHERE c.table_name = :table_name
+    ORDER BY c.column_id
+"""}, {'table_name': VARCHAR2(128)})
+
+SQLITE_TABLE_SQL_QUERY = register(
+    'table definition', {'sqlite': "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"},
+    {'name': VARCHAR2(128)},
+)
+
+# The table-valued form of PRAGMA table_info takes the table name as a bind
+SQLITE_COLUMNS_QUERY = register(
+    'table columns (sqlite)',
+    {'sqlite': 'SELECT cid, name, type, "notnull", dflt_value, pk FROM pragma_table_info(:name)'},
+    {'name': VARCHAR2(128)},
+)
+
+_SQLITE_TYPE = re.compile(r"^\s*([A-Za-z0-9_ ]+?)\s*(?:\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\))?\s*$")
+
+DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S')
+
+
+def _load_oracle(cursor, table):
+    execute(cursor, ORACLE_COLUMNS_QUERY, {'table_name': table.upper()}, 'oracle')
+    columns = []
+    primary_key = []
+    for name, data_type, length, precision, scale, nullable, identity, is_pk in cursor.fetchall():
+        columns.append(ColumnInfo(name, data_type, length, precision, scale,
+                                  nullable == 'Y', identity == 'YES'))
+        if is_pk:
+            primary_key.append(name)
+    return columns, primary_key
+
+
+def _load_sqlite(cursor, table):
+    execute(cursor, SQLITE_TABLE_SQL_QUERY, {'name': table.lower()}, 'sqlite')
+    row = cursor.fetchone()
+    autoincrement = bool(row and row[0] and "AUTOINCREMENT" in row[0].upper())
+    execute(cursor, SQLITE_COLUMNS_QUERY, {'name': table.lower()}, 'sqlite')
+    columns = []
+    pk_positions = []
+    for _, name, declared_type, notnull, _, pk in cursor.fetchall():
+        match = _SQLITE_TYPE.match(declared_type or "")
+        data_type = (match.group(1) if match else declared_type or "").upper()
+        length = int(match.group(2)) if match and match.group(2) else None
+        scale = int(match.group(3)) if match and match.group(3) else None
+        if data_type in ('VARCHAR2', 'VARCHAR', 'CHAR'):
+            precision = None
+        else:
+            precision, length = length, None
+        columns.append(ColumnInfo(name.upper(), data_type, length, precision, scale,
+                                  not notnull and not pk, bool(pk) and autoincrement))
+        if pk:
+            pk_positions.append((pk, name.upper()))
+    return columns, [name for _, name in sorted(pk_positions)]
+
+
+class SchemaCache:
+    """Table metadata keyed by upper-case table name, loaded on first use."""
+
+    def __init__(self):
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def get(self, table):
+        """Returns the TableInfo for ``table``, reading the dictionary only on a miss."""
+        key = table.upper()
+        with self._lock:
+            info = self._tables.get(key)
+        if info is not None:
+            return info
+        with connection() as conn:
+            cursor = conn.cursor()
+            if current_backend() == 'oracle':
+                columns, primary_key = _load_oracle(cursor, table)
+            else:
+                columns, primary_key = _load_sqlite(cursor, table)
+            cursor.close()
+        if not columns:
+            raise KeyError(f"Table '{table}' was not found in the schema.")
+        info = TableInfo(key, columns, primary_key)
+        with self._lock:
+            self._tables[key] = info
+        return info
+
+    def is_cached(self, table):
+        with self._lock:
+            return table.upper() in self._tables
+
+    def column(self, table, column_name):
+        """Returns the ColumnInfo for one column, or None if it does not exist."""
+        wanted = column_name.upper()
+        for column in self.get(table).columns:
+            if column.name == wanted:
+                return column
+        return None
+
+    def refresh(self, table=None):
+        """Forgets one table's metadata, or all of it, so it is re-read on next use."""
+        with self._lock:
+            if table is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(table.upper(), None)
+
+
+_cache = SchemaCache()
+
+
+def get_schema_cache():
+    """Returns the process-wide SchemaCache."""
+    return _cache
+
+
+def table_info(table):
+    return _cache.get(table)
+
+
+def refresh(table=None):
+    _cache.refresh(table)
+
+
+def convert_value(column, text):
+    """Converts dialog text into a bind value for ``column``.
+
+    Empty text becomes None (NULL). Raises ValueError with a user-facing
+    message when the text does not fit the column's type, length or
+    nullability.
+    """
+    text = text.strip()
+    if text == "":
+        if not column.nullable and not column.identity:
+            raise ValueError(f"'{column.name}' is required.")
+        return None
+    data_type = column.data_type
+    if data_type in ('VARCHAR2', 'VARCHAR', 'CHAR', 'NVARCHAR2', 'NCHAR'):
+        if column.length and len(text) > column.length:
+            raise ValueError(f"Value exceeds maximum length ({column.length}) for column '{column.name}'.")
+        return text
+    if data_type in ('NUMBER', 'INTEGER', 'INT', 'FLOAT', 'REAL', 'NUMERIC'):
+        try:
+            number = decimal.Decimal(text)
+        except decimal.InvalidOperation:
+            raise ValueError(f"Invalid data type for column '{column.name}'.  Please enter a number.") from None
+        if data_type in ('INTEGER', 'INT') or (column.scale == 0 and column.precision is not None):
+            if number != number.to_integral_value():
+                raise ValueError(f"Column '{column.name}' only accepts whole numbers.")
+            return int(number)
+        if number == number.to_integral_value() and '.' not in text:
+            return int(number)
+        return float(number)
+    if data_type == 'DATE' or data_type.startswith('TIMESTAMP'):
+        for fmt in DATE_FORMATS:
+            try:
+                parsed = datetime.datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            return parsed.date() if fmt == '%Y-%m-%d' else parsed
+        raise ValueError(f"Invalid date format for '{column.name}'. Please use YYYY-MM-DD.")
+    return text
+
+
+def bind_type(column):
+    """Returns the statements.BindType to declare for binding into ``column``."""
+    data_type = column.data_type
+    if data_type in ('VARCHAR2', 'VARCHAR', 'CHAR', 'NVARCHAR2', 'NCHAR'):
+        return VARCHAR2(column.length or 4000)
+    if data_type in ('NUMBER', 'INTEGER', 'INT', 'FLOAT', 'REAL', 'NUMERIC'):
+        return NUMBER
+    if data_type == 'DATE':
+        return DATE
+    if data_type.startswith('TIMESTAMP'):
+        return TIMESTAMP
+    return None  # left to the driver
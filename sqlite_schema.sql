@@ -0,0 +1,164 @@
+-- Local SQLite stand-in for the Oracle schema described in README.MD.
+-- Table and view names match the ones the application queries, so the same
+-- SQL runs against both backends. Updatable Oracle views are emulated with
+-- INSTEAD OF triggers. Later additions (attendance_summary, indexes) are
+-- applied on top of this baseline by migrations.py.
+
+CREATE TABLE teachers (
+    teacher_id VARCHAR2(50) PRIMARY KEY,
+    first_name VARCHAR2(50) NOT NULL,
+    last_name VARCHAR2(50),
+    date_of_birth DATE,
+    gender VARCHAR2(10),
+    age NUMBER,
+    contact_no VARCHAR2(15),
+    address VARCHAR2(200),
+    department_name VARCHAR2(100) NOT NULL,
+    email VARCHAR2(100) UNIQUE NOT NULL,
+    password VARCHAR2(100) NOT NULL,
+    salary NUMBER(20,3)
+);
+
+CREATE TABLE courses (
+    course_id VARCHAR2(50) PRIMARY KEY,
+    course_name VARCHAR2(100) UNIQUE NOT NULL
+);
+
+CREATE TABLE assignments (
+    assignment_id NUMBER PRIMARY KEY,
+    teacher_id VARCHAR2(50) REFERENCES teachers(teacher_id),
+    course_id VARCHAR2(50) REFERENCES courses(course_id),
+    weeks NUMBER,
+    total_classes NUMBER
+);
+
+CREATE TABLE students (
+    student_id VARCHAR2(50) PRIMARY KEY,
+    first_name VARCHAR2(50) NOT NULL,
+    last_name VARCHAR2(50),
+    date_of_birth DATE,
+    gender VARCHAR2(10),
+    age NUMBER,
+    contact_no VARCHAR2(15),
+    address VARCHAR2(200),
+    department_name VARCHAR2(100) NOT NULL,
+    email VARCHAR2(100) NOT NULL,
+    password VARCHAR2(100) NOT NULL
+);
+
+CREATE TABLE enrollments (
+    enrollment_id VARCHAR2(50) PRIMARY KEY,
+    student_id VARCHAR2(50) REFERENCES students(student_id),
+    course_id VARCHAR2(50) REFERENCES courses(course_id)
+);
+
+CREATE TABLE attendance (
+    attendance_id INTEGER PRIMARY KEY,
+    student_id VARCHAR2(50) REFERENCES students(student_id),
+    course_id VARCHAR2(50) REFERENCES courses(course_id),
+    date_attended DATE NOT NULL,
+    status VARCHAR2(10) DEFAULT 'Absent' CHECK (status IN ('Present', 'Absent', 'Leave')),
+    day_attended VARCHAR2(15),
+    class_number NUMBER
+);
+
+CREATE TABLE leave_requests (
+    request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id VARCHAR2(50) NOT NULL REFERENCES students(student_id),
+    course_id VARCHAR2(50) NOT NULL REFERENCES courses(course_id),
+    leave_date DATE NOT NULL,
+    reason VARCHAR2(255) NOT NULL,
+    status VARCHAR2(20) DEFAULT 'Pending'
+);
+
+CREATE VIEW dual AS SELECT 'X' AS dummy;
+
+CREATE VIEW teacher_courses_view AS
+SELECT c.course_id, c.course_name, a.teacher_id
+FROM courses c
+JOIN assignments a ON c.course_id = a.course_id;
+
+CREATE VIEW course_enrollment_view AS
+SELECT e.student_id, c.course_id, c.course_name
+FROM enrollments e
+JOIN courses c ON e.course_id = c.course_id;
+
+CREATE VIEW course_students_view AS
+SELECT s.student_id, s.first_name, s.last_name, e.course_id
+FROM students s
+JOIN enrollments e ON s.student_id = e.student_id;
+
+CREATE VIEW course_name_id_view AS
+SELECT course_id, course_name FROM courses;
+
+CREATE VIEW attendance_status_view AS
+SELECT student_id, course_id, date_attended, status FROM attendance;
+
+CREATE VIEW attendance_check_view AS
+SELECT course_id, date_attended FROM attendance;
+
+CREATE VIEW attendance_update_view AS
+SELECT student_id, course_id, date_attended, status FROM attendance;
+
+CREATE TRIGGER attendance_update_view_upd
+INSTEAD OF UPDATE ON attendance_update_view
+BEGIN
+    UPDATE attendance SET status = NEW.status
+    WHERE student_id = OLD.student_id
+      AND course_id = OLD.course_id
+      AND date_attended = OLD.date_attended;
+END;
+
+CREATE VIEW attendance_records_view AS
+SELECT student_id, course_id, date_attended,
+       substr(date_attended, 1, 10) AS formatted_date, status
+FROM attendance;
+
+CREATE VIEW student_attendance_view AS
+SELECT date_attended, status, student_id, course_id FROM attendance;
+
+CREATE VIEW overall_attendance_view AS
+SELECT student_id, course_id, date_attended, status FROM attendance;
+
+CREATE VIEW attendance_stats_view AS
+SELECT a.student_id, a.course_id,
+       SUM(CASE WHEN a.status = 'Present' THEN 1 ELSE 0 END) AS present_count,
+       SUM(CASE WHEN a.status = 'Absent' THEN 1 ELSE 0 END) AS absent_count,
+       SUM(CASE WHEN a.status = 'Leave' THEN 1 ELSE 0 END) AS leave_count,
+       (SELECT MAX(asg.total_classes) FROM assignments asg WHERE asg.course_id = a.course_id) AS total_classes
+FROM attendance a
+GROUP BY a.student_id, a.course_id;
+
+CREATE VIEW pending_leave_requests_view AS
+SELECT lr.request_id, lr.student_id, c.course_name, lr.leave_date, lr.reason, lr.status, c.course_id
+FROM leave_requests lr
+JOIN courses c ON lr.course_id = c.course_id
+WHERE lr.status = 'Pending';
+
+CREATE VIEW leave_requests_update_view AS
+SELECT request_id, student_id, course_id, leave_date, reason, status FROM leave_requests;
+
+CREATE TRIGGER leave_requests_update_view_upd
+INSTEAD OF UPDATE ON leave_requests_update_view
+BEGIN
+    UPDATE leave_requests SET status = NEW.status WHERE request_id = OLD.request_id;
+END;
+
+CREATE VIEW enrollments_insert_view AS
+SELECT enrollment_id, student_id, course_id FROM enrollments;
+
+CREATE TRIGGER enrollments_insert_view_ins
+INSTEAD OF INSERT ON enrollments_insert_view
+BEGIN
+    INSERT INTO enrollments (enrollment_id, student_id, course_id)
+    VALUES (NEW.enrollment_id, NEW.student_id, NEW.course_id);
+END;
+
+CREATE VIEW enrollments_delete_view AS
+SELECT enrollment_id, student_id, course_id FROM enrollments;
+
+CREATE TRIGGER enrollments_delete_view_del
+INSTEAD OF DELETE ON enrollments_delete_view
+BEGIN
+    DELETE FROM enrollments WHERE enrollment_id = OLD.enrollment_id;
+END;
@@ -0,0 +1,267 @@
+"""
+Registry of the SQL statements the application runs.
+
+Every statement is registered once under a name with fixed text (per
+backend where Oracle and SQLite differ) and the declared type of each bind
+variable. Executing through ``execute``/``executemany`` then:
+
+* sends byte-for-byte the same text every time, so the driver's statement
+  cache (``DB_CONFIG['statement_cache_size']`` per session) and Oracle's
+  shared cursors are reused instead of hard parsing;
+* declares bind types with ``setinputsizes`` on Oracle, so a short and a
+  long string bound to the same variable do not create a new child cursor;
+* counts, per statement, how often its text was already in the session's
+  statement cache (``statement_cache_stats()``).
+
+Statements whose text depends on identifiers, such as the CRUD window's
+table and column names, are registered on first use with ``dynamic()``;
+identifiers must come from an allow-list (see table_browser), never from
+user input. Bind names are checked against the text at registration, so a
+typo fails at import rather than at run time.
+"""
+import collections
+import re
+import threading
+
+from database import (
+    DB_CONFIG, current_backend, executemany_batch as _executemany_batch,
+    executemany_rowcounts as _executemany_rowcounts, oracledb,
+)
+
+
+class BindType(collections.namedtuple("BindType", "type_name size")):
+    """Declared type of a bind variable; ``size`` is the maximum string length."""
+
+
+def VARCHAR2(size):
+    return BindType('VARCHAR2', size)
+
+
+NUMBER = BindType('NUMBER', None)
+DATE = BindType('DATE', None)
+TIMESTAMP = BindType('TIMESTAMP', None)
+
+# Column sizes shared by many statements (see sqlite_schema.sql)
+KEY = VARCHAR2(50)       # student, teacher, course and enrollment ids
+STATUS = VARCHAR2(20)    # attendance and leave request statuses
+DAY_NAME = VARCHAR2(15)
+EMAIL = VARCHAR2(100)
+
+_LITERAL = re.compile(r"'[^']*'")
+_BIND = re.compile(r"(?<![:\w]):(\w+)")
+
+
+def bind_names(text):
+    """Returns the set of bind variable names in ``text`` (string literals skipped)."""
+    return {name.lower() for name in _BIND.findall(_LITERAL.sub("''", text))}
+
+
+class Statement:
+    """A named statement: fixed text per backend plus its declared bind types.
+
+    ``binds`` is a dict {name: BindType} for named binds or a tuple of
+    BindTypes for positional (:1, :2, ...) binds.
+    """
+
+    def __init__(self, name, text, binds=()):
+        self.name = name
+        self.texts = dict(text) if isinstance(text, dict) else None
+        self.text = None if self.texts is not None else text
+        self.binds = binds
+        declared = {str(i + 1) for i in range(len(binds))} if isinstance(binds, tuple) else set(binds)
+        for backend, sql in (self.texts or {None: text}).items():
+            used = bind_names(sql)
+            if used != declared:
+                where = f" ({backend})" if backend else ""
+                raise ValueError(f"Statement '{name}'{where} binds {sorted(used)} but declares {sorted(declared)}.")
+
+    def sql(self, backend=None):
+        """Returns the text to run on ``backend``."""
+        if self.texts is None:
+            return self.text
+        backend = backend or current_backend()
+        try:
+            return self.texts[backend]
+        except KeyError:
+            raise ValueError(f"Statement '{self.name}' has no {backend} text.") from None
+
+    def runs_on(self, backend):
+        """False for a backend-specific statement that has no text for ``backend``."""
+        return self.texts is None or backend in self.texts
+
+    def input_sizes(self):
+        """Returns (positional, named) arguments for an oracledb setinputsizes call."""
+        if isinstance(self.binds, tuple):
+            return [_oracle_input_size(bind) for bind in self.binds], {}
+        return [], {name: _oracle_input_size(bind) for name, bind in self.binds.items()}
+
+    def __repr__(self):
+        return f"Statement({self.name!r})"
+
+
+def _oracle_input_size(bind):
+    if bind is None:
+        return None  # left to the driver
+    if bind.type_name == 'VARCHAR2':
+        return bind.size
+    return {
+        'NUMBER': oracledb.DB_TYPE_NUMBER,
+        'DATE': oracledb.DB_TYPE_DATE,
+        'TIMESTAMP': oracledb.DB_TYPE_TIMESTAMP,
+    }[bind.type_name]
+
+
+STATEMENTS = {}
+_registry_lock = threading.Lock()
+
+
+def register(name, text, binds=()):
+    """Adds a statement to the registry and returns it; names are unique."""
+    statement = Statement(name, text, binds)
+    with _registry_lock:
+        if name in STATEMENTS:
+            raise ValueError(f"Statement '{name}' is already registered.")
+        STATEMENTS[name] = statement
+    return statement
+
+
+def dynamic(name, build):
+    """Returns the statement registered as ``name``, registering ``build()`` on first use.
+
+    ``build`` returns (text, binds). The name must identify the text
+    completely, e.g. include the table and column names it was built from.
+    """
+    with _registry_lock:
+        statement = STATEMENTS.get(name)
+    if statement is not None:
+        return statement
+    text, binds = build()
+    statement = Statement(name, text, binds)
+    with _registry_lock:
+        return STATEMENTS.setdefault(name, statement)
+
+
+class StatementCacheStats:
+    """
+    Hit counters for the per-session statement caches.
+
+    Neither driver reports its cache hits, so each session's cache is
+    mirrored here: an LRU of the last ``size`` statement texts run on it,
+    which is how both the oracledb statement cache and sqlite3's
+    ``cached_statements`` evict.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._sessions = {}  # id(raw connection) -> OrderedDict of texts
+        self._counters = collections.defaultdict(lambda: [0, 0])  # name -> [hits, misses]
+        self._lock = threading.Lock()
+
+    def record(self, connection, name, text):
+        with self._lock:
+            cache = self._sessions.setdefault(id(connection), collections.OrderedDict())
+            hit = text in cache
+            if hit:
+                cache.move_to_end(text)
+            else:
+                cache[text] = None
+                if len(cache) > self.size:
+                    cache.popitem(last=False)
+            self._counters[name][0 if hit else 1] += 1
+
+    def forget(self, connection):
+        """Drops a closed session's cache so a new session with the same id starts cold."""
+        with self._lock:
+            self._sessions.pop(id(connection), None)
+
+    def snapshot(self):
+        """Returns totals and per-statement {'hits', 'misses', 'hit_rate'}."""
+        with self._lock:
+            per_statement = {name: list(counts) for name, counts in self._counters.items()}
+            sessions = len(self._sessions)
+        hits = sum(counts[0] for counts in per_statement.values())
+        misses = sum(counts[1] for counts in per_statement.values())
+        return {
+            'cache_size': self.size,
+            'sessions': sessions,
+            'executions': hits + misses,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+            'statements': {
+                name: {'hits': h, 'misses': m, 'hit_rate': round(h / (h + m), 4)}
+                for name, (h, m) in sorted(per_statement.items())
+            },
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+cache_stats = StatementCacheStats(DB_CONFIG['statement_cache_size'])
+
+
+def statement_cache_stats():
+    """Returns the statement-cache hit counters of this process."""
+    return cache_stats.snapshot()
+
+
+def _prepare(cursor, statement, backend):
+    backend = backend or current_backend()
+    sql = statement.sql(backend)
+    if backend == 'oracle' and statement.binds:
+        args, kwargs = statement.input_sizes()
+        cursor.setinputsizes(*args, **kwargs)
+    cache_stats.record(cursor.connection, statement.name, sql)
+    return sql, backend
+
+
+def execute(cursor, statement, binds=None, backend=None):
+    """Runs a registered statement on ``cursor``; returns the cursor."""
+    sql, _ = _prepare(cursor, statement, backend)
+    if binds is None:
+        return cursor.execute(sql)
+    return cursor.execute(sql, binds)
+
+
+def executemany(cursor, statement, rows, backend=None):
+    """Runs a registered statement once per row in one batched call."""
+    sql, _ = _prepare(cursor, statement, backend)
+    return cursor.executemany(sql, rows)
+
+
+def executemany_batch(cursor, statement, rows, backend=None):
+    """database.executemany_batch() for a registered statement."""
+    if not rows:
+        return 0, []
+    sql, backend = _prepare(cursor, statement, backend)
+    return _executemany_batch(cursor, sql, rows, backend)
+
+
+def executemany_rowcounts(cursor, statement, rows, backend=None):
+    """database.executemany_rowcounts() for a registered statement."""
+    if not rows:
+        return [], []
+    sql, backend = _prepare(cursor, statement, backend)
+    return _executemany_rowcounts(cursor, sql, rows, backend)
+
+
+SESSION_PARSE_STATS = register('session parse stats', {'oracle': """
+    SELECT n.name, s.value
+    FROM v$mystat s
+    JOIN v$statname n ON n.statistic# = s.statistic#
+    WHERE n.name IN ('parse count (total)', 'parse count (hard)', 'session cursor cache hits')
+"""})
+
+
+def session_parse_stats(cursor, backend=None):
+    """Returns Oracle's parse counters for the session, or {} on SQLite.
+
+    A hard parse count that keeps growing while the application repeats
+    the same work means some statement text is not being shared.
+    """
+    if (backend or current_backend()) != 'oracle':
+        return {}
+    execute(cursor, SESSION_PARSE_STATS, backend='oracle')
+    return dict(cursor.fetchall())
@@ -2,8 +2,13 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from tkcalendar import DateEntry
 from datetime import date
-import oracledb
 import logging
+from attendance_summary import percentages
+from database import DB_ERRORS, error_info
+from db_worker import load_cached, run_in_background
+from prefetch import Dataset, get_prefetcher
+from repository import get_repository
+from tracing import traced_action
 
 # Configure logging at the module level
 logging.basicConfig(
@@ -13,41 +18,17 @@ logging.basicConfig(
 )
 
 
-def get_connection():
-    """
-    Establishes a connection to the Oracle database. Handles connection errors
-    and logs them. Returns a connection object or None on failure.
-    """
-    try:
-        conn = oracledb.connect(
-            user="system",
-            password="Server123",
-            dsn="localhost/orcal",
-        )
-        logging.info("Database connection successful.")
-        return conn
-    except oracledb.DatabaseError as e:
-        error_code = e.args[0].code
-        error_message = e.args[0].message
-        logging.error(
-            f"Database Connection Failed: {e}, Code: {error_code}, Message: {error_message}"
-        )
-        messagebox.showerror(
-            "Error", f"Database Connection Failed: {e}"
-        )  # Keep the messagebox
-        return None  # Explicitly return None on failure
-
-
 class StudentDashboard(tk.Tk):
     """
     Student dashboard application.  Displays courses and provides options to
     view attendance, request leave, view stats, and view overall attendance.
     """
 
+    @traced_action('open StudentDashboard')
     def __init__(self, student_id, parent=None):
         super().__init__()
         self.title("Student Dashboard")
-        self.geometry("600x450")
+        self.geometry("800x450")
         self.student_id = student_id
         self.parent = parent
 
@@ -60,12 +41,18 @@ class StudentDashboard(tk.Tk):
         label = tk.Label(self, text="Your Courses", font=("Arial", 14))
         label.pack(pady=10)
 
-        self.tree = ttk.Treeview(
-            self, columns=("Course ID", "Course Name"), show="headings"
-        )
-        self.tree.heading("Course ID", text="Course ID")
-        self.tree.heading("Course Name", text="Course Name")
+        # Course list with each course's attendance, from one grouped query
+        columns = ("Course ID", "Course Name", "Present", "Absent", "Leave", "Classes")
+        self.tree = ttk.Treeview(self, columns=columns, show="headings")
+        for column in columns:
+            self.tree.heading(column, text=column)
+        self.tree.column("Course ID", width=90)
+        self.tree.column("Course Name", width=220)
+        for column in columns[2:]:
+            self.tree.column(column, width=100, anchor=tk.CENTER)
         self.tree.pack(pady=10, fill=tk.BOTH, expand=True)
+        self.tree.bind("<<TreeviewSelect>>", self._course_selected)
+        self.bind("<Destroy>", self._on_destroy)
 
         button_frame = tk.Frame(self)
         button_frame.pack(pady=10)
@@ -100,32 +87,61 @@ class StudentDashboard(tk.Tk):
         self.show_leave_status = False
 
     def load_courses(self):
-        """Loads the courses for the student from the COURSE_ENROLLMENT_VIEW
-        and populates the Treeview."""
-        try:
-            conn = get_connection()
-            if conn is None:
-                return  # Exit if connection failed
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                    SELECT course_id, course_name
-                    FROM COURSE_ENROLLMENT_VIEW
-                    WHERE student_id = :sid
-                """,
-                {"sid": self.student_id},
-            )
-            for row in cursor.fetchall():
-                self.tree.insert("", tk.END, values=row)
-            cursor.close()
-            conn.close()
-        except oracledb.DatabaseError as e:
-            error_code = e.args[0].code
-            error_message = e.args[0].message
-            logging.error(
-                f"Database Error in load_courses: {e}, Code: {error_code}, Message: {error_message}"
-            )
-            messagebox.showerror("Error", f"Database Error: {e}")
+        """Loads the student's courses with their present/absent/leave counts
+        in one round trip and populates the Treeview."""
+        run_in_background(self, self._fetch_courses, self._show_courses, self._load_courses_failed,
+                          key="courses", loading_text="Loading courses...")
+
+    def _fetch_courses(self):
+        """Runs on a DB worker thread; must not touch widgets."""
+        return get_repository().student_course_stats(self.student_id)
+
+    def _show_courses(self, rows):
+        self.tree.delete(*self.tree.get_children())
+        for course_id, course_name, present, absent, leave, recorded, planned in rows:
+            if self.tree.exists(course_id):
+                continue
+            classes, present_pct, absent_pct, leave_pct = percentages(present, absent, leave, recorded, planned)
+            # The course id is the item id, so it is not converted like values are
+            self.tree.insert("", tk.END, iid=course_id, values=(
+                course_id, course_name,
+                f"{present} ({present_pct:.1f}%)", f"{absent} ({absent_pct:.1f}%)", f"{leave} ({leave_pct:.1f}%)",
+                classes,
+            ))
+        self._prefetch(rows)
+
+    def _prefetch(self, rows):
+        """Warms the follow-up windows' data for every course in the background."""
+        prefetcher = get_prefetcher()
+        today = date.today()
+        datasets = []
+        for course_id, course_name, present, absent, leave, recorded, planned in rows:
+            stats = AttendanceStatsWindow.dataset(self.student_id, course_id)
+            if recorded:
+                # The course list already carries the counters the stats window reads
+                prefetcher.put(stats.key, (present, absent, leave, recorded, planned))
+            else:
+                datasets.append(stats)
+            datasets.append(AttendanceRecordsWindow.dataset(self.student_id, course_id, today))
+            datasets.append(OverallAttendanceWindow.dataset(self.student_id, course_id))
+        prefetcher.warm(datasets)
+        if self.tree.focus():
+            prefetcher.prioritize(self.tree.focus())
+
+    def _course_selected(self, event):
+        if self.tree.focus():
+            get_prefetcher().prioritize(self.tree.focus())
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            get_prefetcher().cancel()
+
+    def _load_courses_failed(self, e):
+        error_code, error_message = error_info(e)
+        logging.error(
+            f"Database Error in load_courses: {e}, Code: {error_code}, Message: {error_message}"
+        )
+        messagebox.showerror("Error", f"Database Error: {e}")
 
     def get_selected_course(self):
         """Gets the selected course from the Treeview.
@@ -137,7 +153,7 @@ class StudentDashboard(tk.Tk):
         if not selected:
             messagebox.showwarning("Warning", "Please select a course.")
             return None
-        return self.tree.item(selected)["values"]
+        return selected, self.tree.item(selected)["values"][1]
 
     def request_leave(self):
         """Opens the LeaveRequestWindow for the selected course."""
@@ -181,6 +197,7 @@ class AttendanceRecordsWindow(tk.Toplevel):
     Displays attendance records for a specific course and student.
     """
 
+    @traced_action('open student AttendanceRecordsWindow')
     def __init__(self, parent, student_id, course_id, course_name):
         super().__init__(parent)
         self.title(f"Attendance Records - {course_name}")
@@ -218,56 +235,40 @@ class AttendanceRecordsWindow(tk.Toplevel):
 
         self.load_records()
 
+    @staticmethod
+    def dataset(student_id, course_id, selected_date):
+        """The records this window shows for one date (see prefetch.py)."""
+        return Dataset(
+            ('student records', course_id, student_id, selected_date),
+            lambda: get_repository().student_records(student_id, course_id, selected_date),
+        )
+
+    @traced_action('load student attendance records')
     def load_records(self):
         """Loads attendance records for the selected date from the
-        STUDENT_ATTENDANCE_VIEW."""
+        STUDENT_ATTENDANCE_VIEW; prefetched records show at once."""
         selected_date = self.date_entry.get_date()
-        formatted_date_str = selected_date.strftime('%Y-%m-%d')  # Format the date object
-        print(f"Loading records for Student ID: {self.student_id}, Course ID: {self.course_id}, Date: {formatted_date_str}")  # Debug print
-        try:
-            conn = get_connection()
-            if conn is None:
-                print("Database connection failed in load_records.")  # Debug print
-                return  # Exit if connection failed
-            cursor = conn.cursor()
-            sql_query = """
-                SELECT date_attended, status
-                FROM STUDENT_ATTENDANCE_VIEW
-                WHERE course_id = :cid
-                AND student_id = :sid
-                AND TRUNC(date_attended) = TO_DATE(:selected_date, 'YYYY-MM-DD')
-                ORDER BY date_attended ASC
-            """
-            print(f"Executing SQL: {sql_query} with selected_date: {formatted_date_str}")  # Debug print
-            cursor.execute(
-                sql_query,
-                {
-                    "cid": self.course_id,
-                    "sid": self.student_id,
-                    "selected_date": formatted_date_str,  # Use the formatted string
-                },
-            )
-            records = cursor.fetchall()
-            print(f"Number of records fetched: {len(records)}")  # Debug print
-            self.tree.delete(*self.tree.get_children())
-
-            for row in records:
-                formatted_date = row[0].strftime("%Y-%m-%d")
-                self.tree.insert("", tk.END, values=(formatted_date, row[1]))
-
-            cursor.close()
-            conn.close()
-
-        except oracledb.DatabaseError as e:
-            error_code = e.args[0].code
-            error_message = e.args[0].message
+        print(f"Loading records for Student ID: {self.student_id}, Course ID: {self.course_id}, Date: {selected_date:%Y-%m-%d}")  # Debug print
+        load_cached(self, self.dataset(self.student_id, self.course_id, selected_date), self._show_records,
+                    self._load_records_failed, key="records", loading_text="Loading records...")
+
+    def _show_records(self, records):
+        print(f"Number of records fetched: {len(records)}")  # Debug print
+        self.tree.delete(*self.tree.get_children())
+        for row in records:
+            formatted_date = row[0].strftime("%Y-%m-%d")
+            self.tree.insert("", tk.END, values=(formatted_date, row[1]))
+
+    def _load_records_failed(self, e):
+        if isinstance(e, DB_ERRORS):
+            error_code, error_message = error_info(e)
             logging.error(
                 f"Database Error in load_records: {e}, Code: {error_code}, Message: {error_message}"
             )
             messagebox.showerror(
                 "Error", f"Failed to load attendance records: {e}"
             )
-        except Exception as e:
+        else:
             print(f"An unexpected error occurred: {e}")  # Catch any other errors
             logging.error(f"Unexpected error in load_records: {e}")
             messagebox.showerror("Error", f"An unexpected error occurred: {e}")
@@ -316,6 +317,7 @@ class LeaveRequestWindow(tk.Toplevel):
             self, command=lambda: self.submit_leave(student_id, course_id), text="Submit"
         ).pack(pady=10)
 
+    @traced_action('submit leave request')
     def submit_leave(self, student_id, course_id):
         """Submits the leave request."""
         selected_date = self.date_entry.get_date()
@@ -331,30 +333,11 @@ class LeaveRequestWindow(tk.Toplevel):
             return
 
         try:
-            conn = get_connection()
-            if conn is None:
-                return
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                    INSERT INTO leave_requests (student_id, course_id, leave_date, reason, status)
-                    VALUES (:sid, :cid, :ldate, :reason, 'Pending')
-                """,
-                {
-                    "sid": student_id,
-                    "cid": course_id,
-                    "ldate": selected_date,
-                    "reason": reason,
-                },
-            )
-            conn.commit()
-            cursor.close()
-            conn.close()
+            get_repository().submit_leave_request(student_id, course_id, selected_date, reason)
             messagebox.showinfo("Success", "Leave request submitted successfully.")
             self.destroy()
-        except oracledb.DatabaseError as e:
-            error_code = e.args[0].code
-            error_message = e.args[0].message
+        except DB_ERRORS as e:
+            error_code, error_message = error_info(e)
             logging.error(
                 f"Database Error in submit_leave: {e}, Code: {error_code}, Message: {error_message}"
             )
@@ -374,10 +357,11 @@ class LeaveRequestWindow(tk.Toplevel):
 
 class AttendanceStatsWindow(tk.Toplevel):
     """
-    Displays attendance statistics for a specific course and student using
-    the ATTENDANCE_STATS_VIEW.
+    Displays attendance statistics for a specific course and student from
+    the attendance_summary counters.
     """
 
+    @traced_action('open AttendanceStatsWindow')
     def __init__(self, parent, student_id, course_id, course_name):
         super().__init__(parent)
         self.title(f"Attendance Statistics - {course_name}")
@@ -400,59 +384,45 @@ class AttendanceStatsWindow(tk.Toplevel):
 
         self.load_stats()
 
+    @staticmethod
+    def dataset(student_id, course_id):
+        """The counters this window shows (see prefetch.py)."""
+        # One primary-key read of the running counters
+        return Dataset(
+            ('attendance stats', course_id, student_id),
+            lambda: get_repository().attendance_stats(student_id, course_id),
+        )
+
     def load_stats(self):
-        """Loads and displays attendance statistics from the ATTENDANCE_STATS_VIEW."""
-        try:
-            conn = get_connection()
-            if conn is None:
-                return  # Exit if connection failed
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                    SELECT present_count, absent_count, leave_count, total_classes
-                    FROM ATTENDANCE_STATS_VIEW
-                    WHERE student_id = :sid AND course_id = :cid
-                """,
-                {"sid": self.student_id, "cid": self.course_id},
-            )
-            result = cursor.fetchone()
-
-            if result:
-                present_count_val, absent_count_val, leave_count_val, total_classes =result
-
-                # Handle potential None values by converting them to 0
-                present_count_val = present_count_val if present_count_val is not None else 0
-                absent_count_val = absent_count_val if absent_count_val is not None else 0
-                leave_count_val = leave_count_val if leave_count_val is not None else 0
-                total_classes = total_classes if total_classes is not None else 16 # Default if not available
-
-                present_percentage = (present_count_val / total_classes) * 100 if total_classes else 0
-                absent_percentage = (absent_count_val / total_classes) * 100 if total_classes else 0
-                leave_percentage = (leave_count_val / total_classes) * 100 if total_classes else 0
-
-                self.stats_label.config(
-                    text=(
-                        f"Present: {present_count_val} ({present_percentage:.2f}%)\n"
-                        f"Absent: {absent_count_val} ({absent_percentage:.2f}%)\n"
-                        f"Leave: {leave_count_val} ({leave_percentage:.2f}%)\n"
-                        f"Total Classes: {total_classes}"
-                    )
+        """Loads and displays attendance statistics from attendance_summary;
+        prefetched statistics show at once."""
+        load_cached(self, self.dataset(self.student_id, self.course_id), self._show_stats,
+                    self._load_stats_failed, key="stats", loading_text="Loading statistics...")
+
+    def _show_stats(self, result):
+        if result:
+            present_count_val, absent_count_val, leave_count_val = result[:3]
+            total_classes, present_percentage, absent_percentage, leave_percentage = percentages(*result)
+
+            self.stats_label.config(
+                text=(
+                    f"Present: {present_count_val} ({present_percentage:.2f}%)\n"
+                    f"Absent: {absent_count_val} ({absent_percentage:.2f}%)\n"
+                    f"Leave: {leave_count_val} ({leave_percentage:.2f}%)\n"
+                    f"Total Classes: {total_classes}"
                 )
-            else:
-                self.stats_label.config(text="No statistics available for this course.")
-
-            cursor.close()
-            conn.close()
-
-        except oracledb.DatabaseError as e:
-            error_code = e.args[0].code
-            error_message = e.args[0].message
-            logging.error(
-                f"Database Error in load_stats: {e}, Code: {error_code}, Message: {error_message}"
-            )
-            messagebox.showerror(
-                "Error", f"Failed to load attendance statistics: {e}"
             )
+        else:
+            self.stats_label.config(text="No statistics available for this course.")
+
+    def _load_stats_failed(self, e):
+        error_code, error_message = error_info(e)
+        logging.error(
+            f"Database Error in load_stats: {e}, Code: {error_code}, Message: {error_message}"
+        )
+        messagebox.showerror(
+            "Error", f"Failed to load attendance statistics: {e}"
+        )
 
     def go_back(self):
         """Goes back to the parent window."""
@@ -466,6 +436,7 @@ class OverallAttendanceWindow(tk.Toplevel):
     the OVERALL_ATTENDANCE_VIEW.
     """
 
+    @traced_action('open OverallAttendanceWindow')
     def __init__(self, parent, student_id, course_id, course_name):
         super().__init__(parent)
         self.title(f"Overall Attendance - {course_name}")
@@ -490,38 +461,34 @@ class OverallAttendanceWindow(tk.Toplevel):
 
         self.load_overall_attendance()
 
+    @staticmethod
+    def dataset(student_id, course_id):
+        """The attendance history this window shows (see prefetch.py)."""
+        return Dataset(
+            ('overall attendance', course_id, student_id),
+            lambda: get_repository().overall_attendance(student_id, course_id),
+        )
+
     def load_overall_attendance(self):
-        """Loads and displays overall attendance from the OVERALL_ATTENDANCE_VIEW."""
-        try:
-            conn = get_connection()
-            if conn is None:
-                return  # Exit if connection failed
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                    SELECT date_attended, status
-                    FROM OVERALL_ATTENDANCE_VIEW
-                    WHERE student_id = :sid AND course_id = :cid
-                    ORDER BY date_attended ASC
-                """,
-                {"sid": self.student_id, "cid": self.course_id},
-            )
-            records = cursor.fetchall()
-            self.tree.delete(*self.tree.get_children())
-            for row in records:
-                formatted_date = row[0].strftime("%Y-%m-%d")
-                self.tree.insert("", tk.END, values=(formatted_date, row[1]))
-            cursor.close()
-            conn.close()
-        except oracledb.DatabaseError as e:
-            error_code = e.args[0].code
-            error_message = e.args[0].message
-            logging.error(
-                f"Database Error in load_overall_attendance: {e}, Code: {error_code}, Message: {error_message}"
-            )
-            messagebox.showerror(
-                "Error", f"Failed to load overall attendance: {e}"
-            )
+        """Loads and displays overall attendance from the OVERALL_ATTENDANCE_VIEW;
+        a prefetched history shows at once."""
+        load_cached(self, self.dataset(self.student_id, self.course_id), self._show_overall_attendance,
+                    self._load_overall_attendance_failed, key="overall", loading_text="Loading attendance...")
+
+    def _show_overall_attendance(self, records):
+        self.tree.delete(*self.tree.get_children())
+        for row in records:
+            formatted_date = row[0].strftime("%Y-%m-%d")
+            self.tree.insert("", tk.END, values=(formatted_date, row[1]))
+
+    def _load_overall_attendance_failed(self, e):
+        error_code, error_message = error_info(e)
+        logging.error(
+            f"Database Error in load_overall_attendance: {e}, Code: {error_code}, Message: {error_message}"
+        )
+        messagebox.showerror(
+            "Error", f"Failed to load overall attendance: {e}"
+        )
 
     def go_back(self):
         """Goes back to the parent window."""
@@ -535,6 +502,7 @@ class LeaveRequestStatusWindow(tk.Toplevel):
     PENDING_LEAVE_REQUESTS_VIEW.
     """
 
+    @traced_action('open LeaveRequestStatusWindow')
     def __init__(self, parent, student_id):
         super().__init__(parent)
         self.title("Leave Request Status")
@@ -571,38 +539,30 @@ class LeaveRequestStatusWindow(tk.Toplevel):
     def load_leave_requests(self):
         """Loads pending leave requests for the student from the
         PENDING_LEAVE_REQUESTS_VIEW."""
-        try:
-            conn = get_connection()
-            if conn is None:
-                return  # Exit if connection failed
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                    SELECT course_name, TO_CHAR(leave_date, 'YYYY-MM-DD'), reason, status
-                    FROM PENDING_LEAVE_REQUESTS_VIEW
-                    WHERE student_id = :student_id
-                """,
-                {"student_id": self.student_id},
+        run_in_background(self, self._fetch_leave_requests, self._show_leave_requests,
+                          self._load_leave_requests_failed, key="leave_requests",
+                          loading_text="Loading leave requests...")
+
+    def _fetch_leave_requests(self):
+        """Runs on a DB worker thread; must not touch widgets."""
+        return get_repository().student_leave_requests(self.student_id)
+
+    def _show_leave_requests(self, rows):
+        self.leave_tree.delete(*self.leave_tree.get_children())  # Clear previous data
+        for row in rows:
+            # The item id is the request's primary key
+            self.leave_tree.insert(
+                "", tk.END, iid=str(row[0]), values=(row[1], row[2], row[3], row[4])
             )
 
-            self.leave_tree.delete(*self.leave_tree.get_children())  # Clear previous data
-
-            for row in cursor.fetchall():
-                self.leave_tree.insert(
-                    "", tk.END, values=(row[0], row[1], row[2], row[3])
-                )
-
-            cursor.close()
-            conn.close()
-
-        except oracledb.DatabaseError as e:
-            error_code = e.args[0].code
-            error_message = e.args[0].message
-            logging.error(
-                f"Failed to load leave requests from view: {e}, Code: {error_code}, Message: {error_message}"
-            )
-            messagebox.showerror("Error", f"Failed to load leave requests: {e}")
+    def _load_leave_requests_failed(self, e):
+        error_code, error_message = error_info(e)
+        logging.error(
+            f"Failed to load leave requests from view: {e}, Code: {error_code}, Message: {error_message}"
+        )
+        messagebox.showerror("Error", f"Failed to load leave requests: {e}")
 
+    @traced_action('dismiss leave request')
     def dismiss_leave_request(self):
         """Dismisses the selected leave request by updating its status in the
         underlying LEAVE_REQUESTS table."""
@@ -611,37 +571,17 @@ class LeaveRequestStatusWindow(tk.Toplevel):
             messagebox.showwarning("Warning", "Please select a leave request to dismiss.")
             return
 
-        course_name, leave_date_str, reason, status = self.leave_tree.item(selected_item)["values"]
+        request_id = int(selected_item[0])
         try:
-            conn = get_connection()
-            if conn is None:
-                return  # Exit if connection failed
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                    UPDATE leave_requests
-                    SET status = 'Dismissed'
-                    WHERE student_id = :student_id
-                      AND COURSE_ID = (SELECT course_id FROM courses WHERE course_name = :course_name)
-                      AND LEAVE_DATE = TO_DATE(:leave_date, 'YYYY-MM-DD')
-                      AND reason = :reason
-                """,
-                {
-                    "student_id": self.student_id,
-                    "course_name": course_name,
-                    "leave_date": leave_date_str,
-                    "reason": reason,
-                },
-            )
-
-            conn.commit()
-            cursor.close()
-            conn.close()
-            messagebox.showinfo("Success", "Leave request dismissed successfully.")
+            if get_repository().dismiss_leave_request(request_id, self.student_id):
+                messagebox.showinfo("Success", "Leave request dismissed successfully.")
+            else:
+                messagebox.showwarning(
+                    "Warning", "This leave request is no longer pending and was not dismissed."
+                )
             self.load_leave_requests()  # Refresh the list from the view
-        except oracledb.DatabaseError as e:
-            error_code = e.args[0].code
-            error_message = e.args[0].message
+        except DB_ERRORS as e:
+            error_code, error_message = error_info(e)
             logging.error(
                 f"Failed to dismiss leave request: {e}, Code: {error_code}, Message: {error_message}"
             )
@@ -0,0 +1,149 @@
+"""
+Keyset-paginated reads and single-row writes for the CRUD table browser.
+
+``SELECT * FROM table`` followed by ``fetchall()`` pulls whole tables into
+memory. KeysetPager instead reads one page at a time, ordered by the primary
+key and continuing after the last key seen, so every page is an index range
+scan no matter how deep the user pages, and only a page or two of rows is
+ever held in memory.
+
+Table and column names cannot be binds, so the CRUD statements are built
+from identifiers: tables from ``TABLE_KEYS`` and columns from the cached
+data dictionary (``checked_columns``), always lower case. Each distinct text
+is registered once in statements.py, so repeating an edit reuses the cached
+statement instead of parsing new SQL.
+"""
+import re
+
+from database import current_backend
+from schema_cache import bind_type, get_schema_cache
+from statements import KEY, NUMBER, dynamic, execute
+
+# Primary key of every table the CRUD window can browse. Table names are
+# only ever taken from this allow-list before being put into SQL text.
+TABLE_KEYS = {
+    "students": "student_id",
+    "teachers": "teacher_id",
+    "attendance": "attendance_id",
+    "courses": "course_id",
+    "enrollments": "enrollment_id",
+    "assignments": "assignment_id",
+    "leave_requests": "request_id",
+}
+
+# Keys that are numbers; the others are VARCHAR2(50) ids
+NUMERIC_KEYS = {"attendance_id", "assignment_id", "request_id"}
+
+IDENTIFIER = re.compile(r"^[a-z][a-z0-9_]*$")
+
+PAGE_SIZE = 500
+
+_PAGE_QUERIES = {
+    'oracle': {
+        'first': "SELECT * FROM {table} ORDER BY {key} FETCH FIRST :page_size ROWS ONLY",
+        'next': "SELECT * FROM {table} WHERE {key} > :after_key ORDER BY {key} FETCH FIRST :page_size ROWS ONLY",
+    },
+    'sqlite': {
+        'first': "SELECT * FROM {table} ORDER BY {key} LIMIT :page_size",
+        'next': "SELECT * FROM {table} WHERE {key} > :after_key ORDER BY {key} LIMIT :page_size",
+    },
+}
+
+
+class KeysetPager:
+    """Fetches pages of ``table`` in primary-key order."""
+
+    def __init__(self, table, page_size=PAGE_SIZE, backend=None):
+        if table not in TABLE_KEYS:
+            raise ValueError(f"Table '{table}' cannot be browsed.")
+        self.table = table
+        self.key = TABLE_KEYS[table]
+        self.page_size = page_size
+        self.backend = backend or current_backend()
+        key_type = NUMBER if self.key in NUMERIC_KEYS else KEY
+        self.first_query = self._statement('first', {'page_size': NUMBER})
+        self.next_query = self._statement('next', {'page_size': NUMBER, 'after_key': key_type})
+
+    def _statement(self, page, binds):
+        return dynamic(f"browse {self.table} ({page} page)", lambda: (
+            {backend: queries[page].format(table=self.table, key=self.key)
+             for backend, queries in _PAGE_QUERIES.items()},
+            binds,
+        ))
+
+    def fetch_page(self, conn, after_key=None):
+        """Returns (columns, rows, last key) for the page after ``after_key``.
+
+        ``after_key`` None means the first page. The last key is None when
+        this page is the final one.
+        """
+        cursor = conn.cursor()
+        # One network round trip per page: fetch the whole page in one go
+        cursor.arraysize = self.page_size
+        if hasattr(cursor, "prefetchrows"):
+            cursor.prefetchrows = self.page_size + 1
+        if after_key is None:
+            execute(cursor, self.first_query, {'page_size': self.page_size}, self.backend)
+        else:
+            execute(cursor, self.next_query, {'page_size': self.page_size, 'after_key': after_key}, self.backend)
+        columns = [desc[0] for desc in cursor.description]
+        rows = cursor.fetchall()
+        cursor.close()
+        last_key = None
+        if len(rows) == self.page_size:
+            key_index = [column.lower() for column in columns].index(self.key)
+            last_key = rows[-1][key_index]
+        return columns, rows, last_key
+
+
+def checked_columns(table, column_names):
+    """Returns the ColumnInfo of each named column, in order.
+
+    This is the allow-list for identifiers in CRUD statements: the table
+    must be in TABLE_KEYS and every column must exist in its cached
+    metadata. Raises ValueError otherwise.
+    """
+    if table not in TABLE_KEYS:
+        raise ValueError(f"Table '{table}' cannot be edited.")
+    by_name = {column.name: column for column in get_schema_cache().get(table).columns}
+    columns = []
+    for name in column_names:
+        column = by_name.get(str(name).upper())
+        if column is None or not IDENTIFIER.match(column.name.lower()):
+            raise ValueError(f"Column '{name}' not found in '{table}' table.")
+        columns.append(column)
+    return columns
+
+
+def insert_statement(table, columns):
+    """INSERT of one row into ``columns`` (checked ColumnInfo), binds :1..:n."""
+    names = ", ".join(column.name.lower() for column in columns)
+    return dynamic(f"insert {table} ({names})", lambda: (
+        f"INSERT INTO {table} ({names}) VALUES ({', '.join(f':{i + 1}' for i in range(len(columns)))})",
+        tuple(bind_type(column) for column in columns),
+    ))
+
+
+def delete_statement(table, key_column):
+    """DELETE of the rows whose ``key_column`` (checked ColumnInfo) equals :1."""
+    key = key_column.name.lower()
+    return dynamic(f"delete {table} by {key}", lambda: (
+        f"DELETE FROM {table} WHERE {key} = :1", (bind_type(key_column),),
+    ))
+
+
+def attendance_pairs_statement(key_column):
+    """(student_id, course_id) of the attendance rows a delete by ``key_column`` removes."""
+    key = key_column.name.lower()
+    return dynamic(f"attendance pairs by {key}", lambda: (
+        f"SELECT student_id, course_id FROM attendance WHERE {key} = :1", (bind_type(key_column),),
+    ))
+
+
+def update_statement(table, column, key_column):
+    """UPDATE of one column, binds :new_value and :key_value."""
+    name, key = column.name.lower(), key_column.name.lower()
+    return dynamic(f"update {table}.{name} by {key}", lambda: (
+        f"UPDATE {table} SET {name} = :new_value WHERE {key} = :key_value",
+        {'new_value': bind_type(column), 'key_value': bind_type(key_column)},
+    ))
@@ -1,12 +1,16 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from tkcalendar import DateEntry
 import datetime
-import calendar
-from database import get_connection
+from database import DB_ERRORS, error_info
+from db_worker import load_cached, run_in_background
+from prefetch import Dataset, get_prefetcher
+from roster_grid import RosterGrid
+from attendance_queries import changed_statuses
+from attendance_import import read_csv
+from repository import get_repository, AttendanceAlreadyMarked
+from tracing import traced_action
 import logging
-import oracledb
-import uuid  # Import the uuid module
 
 logging.basicConfig(level=logging.ERROR,
                     format="%(asctime)s - %(levelname)s - %(message)s",
@@ -33,23 +37,14 @@ class AddStudentWindow(tk.Toplevel):
         back_button.pack(pady=5, anchor="w", padx=10)
 
 
+    @traced_action('add student to course')
     def add_student(self):
         student_id = self.student_id_entry.get().strip()
         if not student_id:
             messagebox.showwarning("Input Error", "Please enter a student ID.")
             return
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            enrollment_id = str(uuid.uuid4())  # Generate a UUID
-            query = """
-    INSERT INTO enrollments_insert_view (enrollment_id, student_id, course_id)
-    VALUES (:enrollment_id, :student_id, :course_id)
-"""
-            cursor.execute(query, {'enrollment_id': enrollment_id, 'student_id': student_id, 'course_id': self.course_id})
-            conn.commit()
-            cursor.close()
-            conn.close()
+            get_repository().enroll_student(self.course_id, student_id)
             messagebox.showinfo("Success", f"Student {student_id} added to course.")
             self.destroy()
         except Exception as e:
@@ -79,6 +74,7 @@ class RemoveStudentWindow(tk.Toplevel):
         back_button = tk.Button(self, text="\u2190 Back", command=self.go_back, font=("Arial", 12))
         back_button.pack(pady=5, anchor="w", padx=10)
 
+    @traced_action('remove student from course')
     def remove_student(self):
         student_id = self.student_id_entry.get().strip()
         if not student_id:
@@ -87,16 +83,7 @@ class RemoveStudentWindow(tk.Toplevel):
         if not messagebox.askyesno("Confirm", f"Are you sure you want to remove student {student_id} from course {self.course_id}?"):
             return
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            query = """
-    DELETE FROM enrollments_delete_view
-    WHERE student_id = :student_id AND course_id = :course_id
-"""
-            cursor.execute(query, {'student_id': student_id, 'course_id': self.course_id})
-            conn.commit()
-            cursor.close()
-            conn.close()
+            get_repository().unenroll_student(self.course_id, student_id)
             messagebox.showinfo("Success", f"Student {student_id} removed from course {self.course_id}.")
             self.destroy()
         except Exception as e:
@@ -109,17 +96,37 @@ class RemoveStudentWindow(tk.Toplevel):
 
 
 class TeacherDashboard(tk.Tk):
+    @traced_action('open TeacherDashboard')
     def __init__(self, teacher_id):
         super().__init__()
         self.teacher_id = teacher_id
         self.title("Teacher Dashboard")
-        self.geometry("600x400") # Adjusted height
+        self.geometry("900x500")
 
         tk.Label(self, text="Welcome to Attendance System", font=("Arial", 18, "bold")).pack(pady=10)
 
-        self.course_listbox = tk.Listbox(self, font=("Arial", 12), width=50, height=8) # Reduced height slightly
-        self.course_listbox.pack(pady=10)
-
+        # Today's marking status across all courses, from one grouped query
+        self.summary_frame = tk.LabelFrame(self, text="Today", font=("Arial", 12))
+        self.summary_frame.pack(pady=5, padx=10, fill=tk.BOTH, expand=True)
+        columns = ("Course ID", "Course Name", "Students", "Today", "Present", "Absent", "Leave", "Pending Leaves")
+        self.course_tree = ttk.Treeview(self.summary_frame, columns=columns, show="headings", height=8,
+                                        selectmode="browse")
+        for column in columns:
+            self.course_tree.heading(column, text=column)
+        self.course_tree.column("Course ID", width=90)
+        self.course_tree.column("Course Name", width=220)
+        for column in columns[2:]:
+            self.course_tree.column(column, width=85, anchor=tk.CENTER)
+        self.course_tree.pack(padx=5, pady=5, fill=tk.BOTH, expand=True)
+        self.course_tree.bind("<Double-1>", lambda event: self.open_attendance_window())
+        self.course_tree.bind("<<TreeviewSelect>>", self._course_selected)
+        self.bind("<Destroy>", self._on_destroy)
+        self.summary_label = tk.Label(self.summary_frame, text="", font=("Arial", 10))
+        self.summary_label.pack(side=tk.LEFT, padx=5, pady=(0, 5))
+        tk.Button(self.summary_frame, text="Refresh", font=("Arial", 10),
+                  command=self.load_courses).pack(side=tk.RIGHT, padx=5, pady=(0, 5))
+
+        self.courses = []
         self.load_courses()
 
         button_frame = tk.Frame(self)
@@ -136,41 +143,71 @@ class TeacherDashboard(tk.Tk):
             self.destroy()
 
     def load_courses(self):
-        try:
-            conn = get_connection()
-            if conn is None:
-                return
-            cursor = conn.cursor()
-            query = """
-                SELECT course_id, course_name
-                FROM teacher_courses_view
-                WHERE teacher_id = :teacher_id
-            """
-            cursor.execute(query, {'teacher_id': self.teacher_id})
-            self.courses = cursor.fetchall()
-            self.course_listbox.delete(0, tk.END)
-            for course in self.courses:
-                self.course_listbox.insert(tk.END, f"{course[0]} - {course[1]}")
-            cursor.close()
-            conn.close()
-        except Exception as e:
-            messagebox.showerror("Error", f"Database Error: {e}")
+        """Loads the course list with today's summary; also called after
+        attendance or leave decisions change it."""
+        today = datetime.date.today()
+        run_in_background(self, lambda: self._fetch_courses(today), lambda rows: self._show_courses(today, rows),
+                          self._load_courses_failed, key="courses", loading_text="Loading courses...")
+
+    def _fetch_courses(self, today):
+        # Runs on a DB worker thread: no widget access here
+        return get_repository().teacher_course_summary(self.teacher_id, today)
+
+    def _show_courses(self, today, rows):
+        selected = self.course_tree.focus()
+        self.courses = [(row[0], row[1]) for row in rows]
+        self.course_tree.delete(*self.course_tree.get_children())
+        unmarked = pending = 0
+        for course_id, course_name, roster_size, present, absent, leave, marked, pending_leaves in rows:
+            if self.course_tree.exists(course_id):
+                continue  # assigned to the teacher more than once
+            # The course id is the item id, so it is not converted like values are
+            self.course_tree.insert("", tk.END, iid=course_id, values=(
+                course_id, course_name, roster_size, "Marked" if marked else "Not marked",
+                present, absent, leave, pending_leaves,
+            ))
+            unmarked += not marked
+            pending += pending_leaves
+        if selected and self.course_tree.exists(selected):
+            self.course_tree.selection_set(selected)
+            self.course_tree.focus(selected)
+        self.summary_frame.config(text=f"Today ({today:%A, %d %B %Y})")
+        self.summary_label.config(text=f"{unmarked} of {len(self.course_tree.get_children())} course(s) still need attendance today; "
+                                       f"{pending} pending leave request(s).")
+        self._prefetch(today)
+
+    def _prefetch(self, today):
+        """Warms today's roster and records of every course in the background."""
+        prefetcher = get_prefetcher()
+        datasets = []
+        for course_id, _ in self.courses:
+            datasets.append(AttendanceWindow.dataset(course_id, today))
+            datasets.append(AttendanceRecordsWindow.dataset(course_id, today))
+        prefetcher.warm(datasets)
+        if self.course_tree.focus():
+            prefetcher.prioritize(self.course_tree.focus())
+
+    def _course_selected(self, event):
+        if self.course_tree.focus():
+            get_prefetcher().prioritize(self.course_tree.focus())
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            get_prefetcher().cancel()
+
+    def _load_courses_failed(self, e):
+        messagebox.showerror("Error", f"Database Error: {e}")
 
     def get_selected_course(self):
-        selected_index = self.course_listbox.curselection()
-        if not selected_index:
+        selected = self.course_tree.focus()
+        if not selected:
             messagebox.showwarning("Warning", "Please select a course!")
             return None
-        return self.courses[selected_index[0]]
+        return next((course for course in self.courses if course[0] == selected), None)
 
     def open_attendance_window(self):
-        selected_index = self.course_listbox.curselection()
-        if not selected_index:
-            messagebox.showwarning("Warning", "Please select a course!")
-            return
-        selected_course = self.courses[selected_index[0]]
+        selected_course = self.get_selected_course()
         if not selected_course:
-            messagebox.showerror("Error", "Invalid course selection.")
             return
         course_id, course_name = selected_course
         AttendanceWindow(self, self.teacher_id, course_id, course_name)
@@ -185,12 +222,14 @@ class TeacherDashboard(tk.Tk):
 
 
 class AllLeaveRequestsWindow(tk.Toplevel):
+    @traced_action('open AllLeaveRequestsWindow')
     def __init__(self, parent, teacher_id):
         super().__init__(parent)
         self.title("All Pending Leave Requests")
         self.geometry("700x500")
         self.teacher_id = teacher_id
         self.parent = parent
+        self.requests = {}  # Treeview item id -> (request_id, student_id, course_id, leave_date)
 
         back_button = tk.Button(self, text="\u2190 Back", command=self.go_back, font=("Arial", 12))
         back_button.pack(pady=5, anchor="w", padx=10)
@@ -201,6 +240,7 @@ class AllLeaveRequestsWindow(tk.Toplevel):
             self,
             columns=("Student ID", "Course", "Leave Date", "Reason", "Status"),
             show="headings",
+            selectmode="extended",  # Ctrl/Shift-click to pick several requests
         )
         for col in ("Student ID", "Course", "Leave Date", "Reason", "Status"):
             self.leave_tree.heading(col, text=col)
@@ -219,153 +259,99 @@ class AllLeaveRequestsWindow(tk.Toplevel):
         tk.Button(
             button_frame, text="Disapprove Leave", command=self.disapprove_leave, font=("Arial", 12)
         ).grid(row=0, column=1, padx=5)
+        tk.Button(
+            button_frame, text="Select All", command=self.select_all, font=("Arial", 12)
+        ).grid(row=0, column=2, padx=5)
 
         self.load_leave_requests()
 
     def load_leave_requests(self):
         """Loads all pending leave requests from the database."""
-        try:
-            conn = get_connection()
-            if conn is None:
-                return
-            cursor = conn.cursor()
-            cursor.execute(
-    """
-        SELECT
-            STUDENT_ID,
-            COURSE_NAME,
-            TO_CHAR(LEAVE_DATE, 'YYYY-MM-DD'),
-            REASON,
-            STATUS,
-            COURSE_ID,
-            TO_CHAR(LEAVE_DATE, 'YYYY-MM-DD')
-        FROM pending_leave_requests_view
-    """
-)
-
-            self.leave_tree.delete(*self.leave_tree.get_children())
-
-            for row in cursor.fetchall():
-                self.leave_tree.insert(
-                    "", tk.END, values=(row[0], row[1], row[2], row[3], row[4])
-                )
-
-            cursor.close()
-            conn.close()
-
-        except oracledb.DatabaseError as e:
-            logging.error(f"Failed to load pending leave requests: {e}")
-            messagebox.showerror("Error", f"Failed to load pending leave requests: {e}")
+        run_in_background(self, self._fetch_leave_requests, self._show_leave_requests,
+                          self._load_leave_requests_failed, key="leave_requests",
+                          loading_text="Loading leave requests...")
+
+    def _fetch_leave_requests(self):
+        # Runs on a DB worker thread: no widget access here
+        return get_repository().pending_leave_requests()
+
+    def _show_leave_requests(self, rows):
+        self.leave_tree.delete(*self.leave_tree.get_children())
+        self.requests = {}
+        for request_id, student_id, course_name, leave_date_str, reason, status, course_id in rows:
+            # The Treeview item id is the request's primary key
+            iid = str(request_id)
+            self.requests[iid] = (request_id, student_id, course_id,
+                                  datetime.datetime.strptime(leave_date_str, '%Y-%m-%d').date())
+            self.leave_tree.insert(
+                "", tk.END, iid=iid, values=(student_id, course_name, leave_date_str, reason, status)
+            )
+
+    def _load_leave_requests_failed(self, e):
+        logging.error(f"Failed to load pending leave requests: {e}")
+        messagebox.showerror("Error", f"Failed to load pending leave requests: {e}")
 
     def approve_leave(self):
-        selected_item = self.leave_tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Warning", "Please select a leave request to approve.")
+        """Approves every selected request and marks those dates as 'Leave'."""
+        self.decide_selected_leaves("Approved")
+
+    def disapprove_leave(self):
+        """Rejects every selected request."""
+        self.decide_selected_leaves("Rejected")
+
+    def select_all(self):
+        self.leave_tree.selection_set(self.leave_tree.get_children())
+
+    @traced_action('decide leave requests')
+    def decide_selected_leaves(self, status):
+        """Applies one decision to all selected requests in a single transaction."""
+        verb = "approve" if status == "Approved" else "disapprove"
+        selected_items = self.leave_tree.selection()
+        if not selected_items:
+            messagebox.showwarning("Warning", f"Please select a leave request to {verb}.")
             return
 
-        student_id, course_name, leave_date_str, reason, status = self.leave_tree.item(selected_item)["values"]
+        requests = [self.requests[item] for item in selected_items]
 
-        if not messagebox.askyesno("Confirm", "Are you sure you want to approve this leave?"):
+        count = len(requests)
+        prompt = (f"Are you sure you want to {verb} this leave?" if count == 1
+                  else f"Are you sure you want to {verb} these {count} leave requests?")
+        if not messagebox.askyesno("Confirm", prompt):
             return
 
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-
-            # Update the leave request status via the update view
-            cursor.execute(
-                """
-                    UPDATE leave_requests_update_view
-                    SET status = 'Approved'
-                    WHERE STUDENT_ID = :sid
-                      AND COURSE_ID = (SELECT course_id FROM course_name_id_view WHERE course_name = :cname)
-                      AND LEAVE_DATE = TO_DATE(:ldate, 'YYYY-MM-DD')
-                      AND REASON = :reason
-                """,
-                {
-                    "sid": student_id,
-                    "cname": course_name,
-                    "ldate": leave_date_str,
-                    "reason": reason,
-                },
-            )
-            conn.commit()
-
-            # Automatically mark attendance as 'Leave' if not already present via the merge view
-            cursor.execute("""
-                MERGE INTO attendance_merge_view a
-                USING (SELECT :sid AS student_id,
-                            (SELECT course_id FROM course_name_id_view WHERE course_name = :cname) AS course_id,
-                            TO_DATE(:ldate, 'YYYY-MM-DD') AS date_attended,
-                            :day_attended AS day_attended,
-                            'Leave' AS status
-                       FROM dual) s
-                ON (a.STUDENT_ID = s.student_id AND a.COURSE_ID = s.course_id AND TRUNC(a.DATE_ATTENDED) = s.date_attended)
-                WHEN NOT MATCHED THEN
-                    INSERT (STUDENT_ID, COURSE_ID, DATE_ATTENDED, DAY_ATTENDED, STATUS)
-                    VALUES (s.student_id, s.course_id, s.date_attended, s.day_attended, s.status)
-                WHEN MATCHED THEN
-                    UPDATE SET a.STATUS = s.status, a.DAY_ATTENDED = s.day_attended
-            """, {
-                "sid": student_id,
-                "cname": course_name,
-                "ldate": leave_date_str,
-                "day_attended": calendar.day_name[datetime.datetime.strptime(leave_date_str, '%Y-%m-%d').weekday()]
-            })
-            conn.commit()
-
-            cursor.close()
-            conn.close()
-            messagebox.showinfo("Success", "Leave request approved and attendance marked as 'Leave'.")
-            self.load_leave_requests()  # Refresh the list
+            # Batched status UPDATEs and, for approvals, batched attendance MERGEs
+            failed, stale = get_repository().decide_leave_requests(requests, status)
+            if failed:
+                details = "\n".join(f"{request[1]} {request[3]:%Y-%m-%d}: {message}"
+                                    for request, message in failed[:10])
+                messagebox.showerror("Error", f"No leave requests were changed; {len(failed)} failed:\n{details}")
+                return
+            count -= len(stale)
+            if status == "Approved":
+                messagebox.showinfo("Success", f"{count} leave request(s) approved and attendance marked as 'Leave'.")
+            else:
+                messagebox.showinfo("Success", f"{count} leave request(s) disapproved.")
+            if stale:
+                # Dismissed by the student or decided elsewhere since the list was loaded
+                details = "\n".join(f"{request[1]} {request[3]:%Y-%m-%d}" for request in stale[:10])
+                messagebox.showwarning("Warning", f"{len(stale)} request(s) were no longer pending and were "
+                                                  f"left unchanged:\n{details}")
+            self.load_leave_requests()  # One refresh for the whole batch
+            self.parent.load_courses()
             # If the AttendanceWindow is currently open and showing the same course
             # and date, it might need a manual refresh to reflect the change.
-        except oracledb.DatabaseError as e:
-            messagebox.showerror("Error", f"Error approving leave: {e}")
-
-    def disapprove_leave(self):
-        selected_item = self.leave_tree.selection()
-        if not selected_item:
-            messagebox.showwarning("Warning", "Please select a leave request to disapprove.")
-            return
-
-        student_id, course_name, leave_date_str, reason, status = self.leave_tree.item(selected_item)["values"]
-
-        if not messagebox.askyesno("Confirm", "Are you sure you want to disapprove this leave?"):
-            return
+        except DB_ERRORS as e:
+            logging.error(f"Error deciding leave requests ({status}): {e}")
+            messagebox.showerror("Error", f"Error trying to {verb} leave: {e}")
 
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                    UPDATE leave_requests_update_view
-                    SET status = 'Rejected'
-                    WHERE STUDENT_ID = :sid
-                      AND COURSE_ID = (SELECT course_id FROM course_name_id_view WHERE course_name = :cname)
-                      AND LEAVE_DATE = TO_DATE(:ldate, 'YYYY-MM-DD')
-                      AND REASON = :reason
-                """,
-                {
-                    "sid": student_id,
-                    "cname": course_name,
-                    "ldate": leave_date_str,
-                    "reason": reason,
-                },
-            )
-            conn.commit()
-            cursor.close()
-            conn.close()
-            messagebox.showinfo("Success", "Leave request disapproved.")
-            self.load_leave_requests()  # Refresh the list
-        except oracledb.DatabaseError as e:
-            messagebox.showerror("Error", f"Error disapproving leave: {e}")
     def go_back(self):
         self.destroy()
         self.parent.deiconify()
 
 
 class AttendanceWindow(tk.Toplevel):
+    @traced_action('open AttendanceWindow')
     def __init__(self, parent, teacher_id, course_id, course_name):
         super().__init__(parent)
         self.title(f"Mark Attendance - {course_name}")
@@ -381,16 +367,13 @@ class AttendanceWindow(tk.Toplevel):
         self.date_picker = DateEntry(self, width=12, font=("Arial", 12), command=self.load_students_on_date)
         self.date_picker.pack(pady=5)
 
-        self.students_frame = tk.Frame(self)
-        self.students_frame.pack(pady=10, fill="both", expand=True)
+        # Only the visible rows get widgets; statuses live in the grid's backing array
+        self.roster_grid = RosterGrid(self)
+        self.roster_grid.pack(pady=10, fill="both", expand=True)
+        tk.Label(self, text="Keyboard: \u2191/\u2193 to move, P / A / L to mark", font=("Arial", 9)).pack()
 
-        self.status_label = tk.Label(self.students_frame, text="Student ID - Name", font=("Arial", 12, "bold"))
-        self.status_label.grid(row=0, column=0, padx=10, pady=5)
-        self.attendance_label = tk.Label(self.students_frame, text="Status", font=("Arial", 12, "bold"))
-        self.attendance_label.grid(row=0, column=1, padx=10, pady=5, columnspan=3)
-
-        self.attendance_vars = {}
-        self.student_widgets = {}
+        self.loaded_date = None
+        self.loaded_statuses = {}
 
         self.load_students_on_date()
 
@@ -401,184 +384,148 @@ class AttendanceWindow(tk.Toplevel):
         update_btn = tk.Button(self, text="Update Attendance", font=("Arial", 12), command=self.update_attendance)
         update_btn.pack(pady=5)
 
+        import_btn = tk.Button(self, text="Import CSV...", font=("Arial", 12), command=self.import_csv)
+        import_btn.pack(pady=5)
+
+    @traced_action('change attendance date')
     def load_students_on_date(self):
-        for widgets in self.student_widgets.values():
-            for widget in widgets:
-                widget.destroy()
-        self.student_widgets.clear()
-        self.load_students(self.students_frame, self.date_picker.get_date())
+        self.load_students(self.date_picker.get_date())
+
+    @staticmethod
+    def dataset(course_id, selected_date):
+        """The roster this window shows for one date (see prefetch.py)."""
+        # Roster, recorded status and approved leaves in a single round trip
+        return Dataset(
+            ('roster', course_id, selected_date),
+            lambda: get_repository().roster(course_id, selected_date),
+        )
 
-    def load_students(self, frame, selected_date):
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            query = """
-                SELECT s.student_id, (s.first_name || ' ' || s.last_name) AS student_name
-                FROM course_students_view s
-                WHERE s.course_id = :course_id
-                ORDER BY s.student_id
-            """
-            cursor.execute(query, {'course_id': self.course_id})
-
-            row_num = 1
-            widgets_for_student = []
-            for student_id, student_name in cursor.fetchall():
-                student_label = tk.Label(frame, text=f"{student_id} - {student_name}", font=("Arial", 12))
-                student_label.grid(row=row_num, column=0, sticky="w", padx=10, pady=5)
-                widgets_for_student.append(student_label)
-
-                initial_status = self.get_initial_attendance_status(student_id, selected_date)
-                var = tk.StringVar(value=initial_status)
-                self.attendance_vars[student_id] = var
-
-                present_radio = tk.Radiobutton(frame, text="Present", variable=var, value="Present")
-                present_radio.grid(row=row_num, column=1, padx=5)
-                widgets_for_student.append(present_radio)
-                absent_radio = tk.Radiobutton(frame, text="Absent", variable=var, value="Absent")
-                absent_radio.grid(row=row_num, column=2, padx=5)
-                widgets_for_student.append(absent_radio)
-                leave_radio = tk.Radiobutton(frame, text="Leave", variable=var, value="Leave")
-                leave_radio.grid(row=row_num, column=3, padx=5)
-                widgets_for_student.append(leave_radio)
-
-                self.student_widgets[student_id] = widgets_for_student
-                widgets_for_student = []
-                row_num += 1
-
-            cursor.close()
-            conn.close()
-        except Exception as e:
-            logging.error(f"Failed to load students: {e}")
-            messagebox.showerror("Error", f"Failed to load students: {e}")
+    def load_students(self, selected_date):
+        # Off the Tk thread; a prefetched roster shows at once and is revalidated
+        load_cached(
+            self,
+            self.dataset(self.course_id, selected_date),
+            lambda roster: self._show_students(selected_date, roster),
+            self._load_students_failed,
+            key="roster",
+            loading_text="Loading students...",
+            on_refresh=lambda roster: self._refresh_students(selected_date, roster),
+        )
 
+    def _refresh_students(self, selected_date, roster):
+        # Never overwrite marks the teacher has already started changing
+        if selected_date == self.loaded_date and self.roster_grid.statuses() == self.loaded_statuses:
+            self._show_students(selected_date, roster)
 
-    def get_initial_attendance_status(self, student_id, selected_date):
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-    SELECT status
-    FROM attendance_status_view
-    WHERE STUDENT_ID = :student_id
-      AND COURSE_ID = :course_id
-      AND TRUNC(DATE_ATTENDED) = TO_DATE(:date_attended, 'YYYY-MM-DD')
-""", {
-    'student_id': student_id,
-    'course_id': self.course_id,
-    'date_attended': selected_date.strftime('%Y-%m-%d')
-})
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
-            if result:
-                return result[0]
-            else:
-                return self.get_leave_status(student_id, selected_date)
-        except Exception as e:
-            logging.error(f"Failed to get initial attendance status: {e}")
-            return self.get_leave_status(student_id, selected_date)
+    def _show_students(self, selected_date, roster):
+        # Snapshot of what is stored, so updates only write what the teacher changed
+        self.loaded_date = selected_date
+        self.loaded_statuses = {student_id: status for student_id, _, status in roster}
+        self.roster_grid.set_roster(roster)
+        self.roster_grid.canvas.focus_set()
 
-    def get_leave_status(self, student_id, selected_date):
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 1
-                FROM leave_requests
-                WHERE STUDENT_ID = :student_id
-                  AND COURSE_ID = :course_id
-                  AND TRUNC(LEAVE_DATE) = TO_DATE(:date_attended, 'YYYY-MM-DD')
-                  AND STATUS = 'Approved'
-            """, {
-                'student_id': student_id,
-                'course_id': self.course_id,
-                'date_attended': selected_date.strftime('%Y-%m-%d')
-            })
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
-            return "Leave" if result else "Absent"
-        except Exception as e:
-            logging.error(f"Failed to check leave status: {e}")
-            messagebox.showerror("Error", f"Failed to check leave status: {e}")
-            return "Absent"
+    def _load_students_failed(self, e):
+        logging.error(f"Failed to load students: {e}")
+        messagebox.showerror("Error", f"Failed to load students: {e}")
 
+    @traced_action('save attendance')
     def save_attendance(self):
         selected_date = self.date_picker.get_date()
+        if selected_date != self.loaded_date:
+            # The radio buttons belong to another date; show the picked one first
+            self.load_students_on_date()
+            messagebox.showinfo("Info", "Attendance reloaded for the selected date. Mark it and save again.")
+            return
+        # The whole roster goes to the database in one batched insert
+        statuses = list(self.roster_grid.statuses().items())
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-
-            # Check if attendance has already been taken for this course and date
-            cursor.execute("""
-                SELECT 1
-                FROM attendance_check_view
-                WHERE COURSE_ID = :cid
-                  AND TRUNC(DATE_ATTENDED) = TO_DATE(:dat, 'YYYY-MM-DD')
-            """, {
-                'cid': self.course_id,
-                'dat': selected_date.strftime('%Y-%m-%d')
-            })
-            attendance_already_marked = cursor.fetchone()
-
-            if attendance_already_marked:
-                messagebox.showwarning("Warning", "Attendance for this course on this date has already been marked.")
-                cursor.close()
-                conn.close()
-                return
-
-            for student_id, var in self.attendance_vars.items():
-                status = var.get()
-                # Call the stored procedure to save attendance
-                cursor.callproc('save_attendance_proc', [
-                    self.course_id,
-                    selected_date,
-                    student_id,
-                    calendar.day_name[selected_date.weekday()],
-                    status
-                ])
-
-            conn.commit()  # Commit all attendance records for the day
-            cursor.close()
-            conn.close()
-            messagebox.showinfo("Success", "Attendance saved.")
-        except oracledb.DatabaseError as e:
-            conn.rollback()
+            failed_rows = get_repository().save_attendance(self.course_id, selected_date, statuses)
+        except AttendanceAlreadyMarked:
+            messagebox.showwarning("Warning", "Attendance for this course on this date has already been marked.")
+            return
+        except DB_ERRORS as e:
             logging.error(f"Failed to save attendance: {e}")
             messagebox.showerror("Error", f"Failed to save attendance: {e}")
+            return
         except Exception as e:
-            conn.rollback()
             logging.error(f"An unexpected error occurred: {e}")
             messagebox.showerror("Error", f"An unexpected error occurred: {e}")
+            return
 
+        if failed_rows:
+            for student_id, message in failed_rows:
+                logging.error(f"Failed to save attendance for {student_id}: {message}")
+            details = "\n".join(f"{student_id}: {message}" for student_id, message in failed_rows[:10])
+            messagebox.showerror("Error", f"Attendance not saved; {len(failed_rows)} row(s) were rejected:\n{details}")
+            return
+        self.loaded_statuses = dict(statuses)
+        self.parent.load_courses()
+        messagebox.showinfo("Success", "Attendance saved.")
 
+    @traced_action('update attendance')
     def update_attendance(self):
         selected_date = self.date_picker.get_date()
+        if selected_date != self.loaded_date:
+            # The radio buttons belong to another date; show the picked one first
+            self.load_students_on_date()
+            messagebox.showinfo("Info", "Attendance reloaded for the selected date. Make your changes and update again.")
+            return
+
+        current = self.roster_grid.statuses()
+        changes = changed_statuses(self.loaded_statuses, current)
+        if not changes:
+            messagebox.showinfo("Info", "No attendance changes to update.")
+            return
+
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            for student_id, var in self.attendance_vars.items():
-                status = var.get()
-                cursor.execute("""
-    UPDATE attendance_update_view
-    SET STATUS = :stat
-    WHERE STUDENT_ID = :sid
-      AND COURSE_ID = :cid
-      AND TRUNC(DATE_ATTENDED) = TO_DATE(:dat, 'YYYY-MM-DD')
-""", {
-    'stat': status,
-    'sid': student_id,
-    'cid': self.course_id,
-    'dat': selected_date.strftime('%Y-%m-%d')
-})
-            conn.commit()
-            cursor.close()
-            conn.close()
-            messagebox.showinfo("Success", "Attendance updated.")
+            touched, failed_rows = get_repository().update_attendance(self.course_id, selected_date, changes)
         except Exception as e:
-            conn.rollback()
             logging.error(f"Failed to update attendance: {e}")
             messagebox.showerror("Error", f"Failed to update attendance: {e}")
+            return
+
+        if failed_rows:
+            for student_id, message in failed_rows:
+                logging.error(f"Failed to update attendance for {student_id}: {message}")
+            details = "\n".join(f"{student_id}: {message}" for student_id, message in failed_rows[:10])
+            messagebox.showerror("Error", f"Attendance not updated; {len(failed_rows)} row(s) were rejected:\n{details}")
+            return
+        self.loaded_statuses = current
+        self.parent.load_courses()
+        messagebox.showinfo("Success", f"Attendance updated ({touched} record(s) changed).")
+
+    @traced_action('import attendance CSV')
+    def import_csv(self):
+        path = filedialog.askopenfilename(
+            parent=self, title="Import attendance (student_id, date, status)",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+        # The file is streamed on a worker thread; only the summary comes back
+        run_in_background(self, lambda: self._import_file(path), self._import_finished,
+                          self._import_failed, key="import", loading_text="Importing attendance...")
+
+    def _import_file(self, path):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return get_repository().import_attendance(self.course_id, read_csv(f))
+
+    def _import_finished(self, result):
+        for line_number, student_id, message in result.errors:
+            logging.error(f"Attendance import line {line_number} ({student_id}) rejected: {message}")
+        summary = f"Imported {result.imported} of {result.read} row(s)."
+        if result.rejected:
+            details = "\n".join(f"line {line_number} ({student_id}): {message}"
+                                for line_number, student_id, message in result.errors[:10])
+            messagebox.showwarning("Import", f"{summary}\n{result.rejected} row(s) were rejected:\n{details}")
+        else:
+            messagebox.showinfo("Import", summary)
+        self.load_students_on_date()
+        self.parent.load_courses()
+
+    def _import_failed(self, e):
+        logging.error(f"Failed to import attendance: {e}")
+        messagebox.showerror("Error", f"Failed to import attendance: {e}")
 
     def go_back(self):
         self.destroy()
@@ -586,6 +533,7 @@ class AttendanceWindow(tk.Toplevel):
 
 
 class AttendanceRecordsWindow(tk.Toplevel):
+    @traced_action('open AttendanceRecordsWindow')
     def __init__(self, parent, course_id, course_name):
         super().__init__(parent)
         self.title(f"Attendance Records -{course_name}")
@@ -601,6 +549,9 @@ class AttendanceRecordsWindow(tk.Toplevel):
         self.date_picker.pack(pady=5)
 
         tk.Button(self, text="Load Records", command=lambda: self.load_records(course_id)).pack(pady=5)
+        tk.Button(self, text="Export Course...", command=self.export_course).pack(pady=5)
+        self.export_status = tk.Label(self, text="", font=("Arial", 10))
+        self.export_status.pack()
 
         self.tree = ttk.Treeview(self, columns=("Student ID", "Date", "Status"), show='headings')
         for col in ("Student ID", "Date", "Status"):
@@ -611,53 +562,82 @@ class AttendanceRecordsWindow(tk.Toplevel):
         self.course_id = course_id
         self.load_records(course_id)
 
+    @staticmethod
+    def dataset(course_id, selected_date):
+        """The records this window shows for one date (see prefetch.py)."""
+        return Dataset(
+            ('course records', course_id, selected_date),
+            lambda: get_repository().course_records(course_id, selected_date),
+        )
+
+    @traced_action('load attendance records')
     def load_records(self, course_id):
         selected_date = self.date_picker.get_date()
-        formatted_date_str = selected_date.strftime('%Y-%m-%d')
-        print(f"Loading records for Course ID: {course_id}, Date: {formatted_date_str}")
-        try:
-            conn = get_connection()
-            if conn is None:
-                print("Database connection failed in load_records.")
-                return
-            cursor = conn.cursor()
-            sql_query = """
-    SELECT student_id, formatted_date, STATUS
-    FROM attendance_records_view
-    WHERE COURSE_ID = :cid
-      AND TRUNC(DATE_ATTENDED) = TO_DATE(:selected_date, 'YYYY-MM-DD')
-    ORDER BY student_id ASC, DATE_ATTENDED ASC
-"""
-            cursor.execute(sql_query,
-            {
-        "cid": course_id,
-        "selected_date": formatted_date_str,
-    },
-)
-            records = cursor.fetchall()
-            print(f"Number of records fetched: {len(records)}")
-            self.tree.delete(*self.tree.get_children())
-
-            for row in records:
-                self.tree.insert("", tk.END, values=(row[0], row[1], row[2]))
-
-            cursor.close()
-            conn.close()
-
-        except oracledb.DatabaseError as e:
-            error_code = e.args[0].code
-            error_message = e.args[0].message
+        print(f"Loading records for Course ID: {course_id}, Date: {selected_date:%Y-%m-%d}")
+        # Prefetched records show at once and are revalidated in the background
+        load_cached(self, self.dataset(course_id, selected_date), self._show_records,
+                    self._load_records_failed, key="records", loading_text="Loading records...")
+
+    def _show_records(self, records):
+        print(f"Number of records fetched: {len(records)}")
+        self.tree.delete(*self.tree.get_children())
+        for row in records:
+            self.tree.insert("", tk.END, values=(row[0], row[1], row[2]))
+
+    def _load_records_failed(self, e):
+        if isinstance(e, DB_ERRORS):
+            error_code, error_message = error_info(e)
             logging.error(
                 f"Database Error in load_records: {e}, Code: {error_code}, Message: {error_message}"
             )
             messagebox.showerror(
                 "Error", f"Failed to load attendance records: {e}"
             )
-        except Exception as e:
+        else:
             print(f"An unexpected error occurred: {e}")
             logging.error(f"Unexpected error in load_records: {e}")
             messagebox.showerror("Error", f"An unexpected error occurred: {e}")
 
+    @traced_action('export course attendance')
+    def export_course(self):
+        path = filedialog.asksaveasfilename(
+            parent=self, title="Export course attendance", defaultextension=".csv",
+            initialfile=f"attendance_{self.course_id}.csv",
+            filetypes=[("CSV", "*.csv"), ("Compressed CSV", "*.csv.gz"), ("Parquet", "*.parquet")],
+        )
+        if not path:
+            return
+        # The worker only writes the count here; the Tk thread polls it
+        self.export_progress = {'written': 0}
+
+        def progress(written):
+            self.export_progress['written'] = written
+
+        task = run_in_background(
+            self,
+            lambda: get_repository().export_attendance(path, course_id=self.course_id, progress=progress),
+            lambda written: self._export_finished(path, written),
+            self._export_failed,
+            key="export",
+            loading_text="Exporting attendance...",
+        )
+        self._show_export_progress(task)
+
+    def _show_export_progress(self, task):
+        if task.done or task.cancelled:
+            return
+        self.export_status.config(text=f"Exported {self.export_progress['written']:,} rows...")
+        self.after(250, self._show_export_progress, task)
+
+    def _export_finished(self, path, written):
+        self.export_status.config(text="")
+        messagebox.showinfo("Export", f"Exported {written:,} rows to {path}.")
+
+    def _export_failed(self, e):
+        self.export_status.config(text="")
+        logging.error(f"Failed to export attendance: {e}")
+        messagebox.showerror("Error", f"Failed to export attendance: {e}")
+
     def go_back(self):
         self.destroy()
         self.parent.deiconify()
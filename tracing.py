@@ -0,0 +1,332 @@
+"""
+Statement tracing grouped by UI action.
+
+Every cursor handed out by the pool is wrapped in a ``TracingCursor`` that
+times execute/executemany/callproc and the fetches that follow, and records
+the statement text, bind count, rows and round trips under the UI action
+that caused it. Windows name their actions with ``@traced_action("open
+AttendanceWindow")`` or ``with action("login"):``; the name is carried into
+DB worker threads, so background loads are counted under the click that
+started them. Nested actions keep the outermost name.
+
+Statements slower than ``ATTENDANCE_SLOW_QUERY_MS`` (default 250) are
+written to the trace log (``ATTENDANCE_TRACE_LOG``, default
+query_trace.log) as they finish, and a per-action summary is appended to the
+same file when the application exits. Bind values are never logged, only
+their count. Set ``ATTENDANCE_TRACE=0`` to hand out unwrapped cursors.
+"""
+import atexit
+import collections
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_CONFIG = {
+    'enabled': os.environ.get('ATTENDANCE_TRACE', '1') != '0',
+    'slow_query_ms': float(os.environ.get('ATTENDANCE_SLOW_QUERY_MS', '250')),
+    'log_file': os.environ.get('ATTENDANCE_TRACE_LOG', 'query_trace.log'),
+    'top_statements': 5,  # statements listed per action in the summary
+}
+
+NO_ACTION = "(no action)"
+STATEMENT_WIDTH = 160  # characters of statement text kept in logs and reports
+
+_current_action = contextvars.ContextVar("trace_action", default=None)
+
+trace_log = logging.getLogger("attendance.trace")
+trace_log.propagate = False  # keep traces out of attendance_app.log
+trace_log.setLevel(logging.INFO)
+
+
+def _ensure_log_handler():
+    if not trace_log.handlers:
+        handler = logging.FileHandler(TRACE_CONFIG['log_file'], delay=True, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+        trace_log.addHandler(handler)
+
+
+def statement_key(statement):
+    """Collapses whitespace so the same statement always groups together."""
+    return " ".join(str(statement).split())
+
+
+def bind_count(parameters, many=False):
+    """Number of bind values sent: per row for execute, summed for executemany."""
+    if parameters is None:
+        return 0
+    if many:
+        return sum(len(row) for row in parameters)
+    return len(parameters)
+
+
+class StatementStats:
+    """Totals for one statement text under one action."""
+
+    __slots__ = ("executions", "errors", "binds", "rows", "round_trips", "elapsed", "max_elapsed")
+
+    def __init__(self):
+        self.executions = self.errors = self.binds = self.rows = self.round_trips = 0
+        self.elapsed = self.max_elapsed = 0.0
+
+    def add(self, binds, rows, round_trips, elapsed, failed):
+        self.executions += 1
+        self.errors += failed
+        self.binds += binds
+        self.rows += rows
+        self.round_trips += round_trips
+        self.elapsed += elapsed
+        self.max_elapsed = max(self.max_elapsed, elapsed)
+
+
+class ActionStats:
+    """Totals for one UI action across the session."""
+
+    def __init__(self):
+        self.invocations = 0
+        self.totals = StatementStats()
+        self.statements = collections.defaultdict(StatementStats)
+
+
+class Tracer:
+    """Collects statement timings per action; thread safe."""
+
+    def __init__(self, slow_query_ms=None):
+        self.slow_query_ms = TRACE_CONFIG['slow_query_ms'] if slow_query_ms is None else slow_query_ms
+        self.started = time.time()
+        self._actions = collections.defaultdict(ActionStats)
+        self._lock = threading.Lock()
+
+    def begin_action(self, name):
+        with self._lock:
+            self._actions[name].invocations += 1
+
+    def record(self, action, statement, binds, rows, round_trips, elapsed, failed=False):
+        """Adds one finished statement; logs it if it was slow."""
+        action = action or NO_ACTION
+        key = statement_key(statement)
+        with self._lock:
+            stats = self._actions[action]
+            stats.totals.add(binds, rows, round_trips, elapsed, failed)
+            stats.statements[key].add(binds, rows, round_trips, elapsed, failed)
+        if elapsed * 1000 >= self.slow_query_ms:
+            _ensure_log_handler()
+            trace_log.warning(
+                f"SLOW {elapsed * 1000:.1f} ms [{action}] binds={binds} rows={rows} "
+                f"round_trips={round_trips}{' FAILED' if failed else ''}: {key[:STATEMENT_WIDTH]}"
+            )
+
+    def summary(self):
+        """Returns {action: {'invocations', 'statements', 'rows', 'round_trips', 'elapsed_ms'}}."""
+        with self._lock:
+            return {
+                name: {
+                    'invocations': stats.invocations,
+                    'statements': stats.totals.executions,
+                    'errors': stats.totals.errors,
+                    'rows': stats.totals.rows,
+                    'round_trips': stats.totals.round_trips,
+                    'elapsed_ms': round(stats.totals.elapsed * 1000, 3),
+                }
+                for name, stats in self._actions.items()
+            }
+
+    def report(self):
+        """Human-readable per-action summary, slowest action first."""
+        with self._lock:
+            actions = sorted(self._actions.items(), key=lambda item: item[1].totals.elapsed, reverse=True)
+            lines = [f"Query trace summary for session started {time.ctime(self.started)}"]
+            for name, stats in actions:
+                totals = stats.totals
+                if not totals.executions:
+                    continue
+                lines.append(
+                    f"{name}: {stats.invocations}x, {totals.executions} statements, "
+                    f"{totals.round_trips} round trips, {totals.rows} rows, "
+                    f"{totals.elapsed * 1000:.1f} ms in the database"
+                    + (f", {totals.errors} failed" if totals.errors else "")
+                )
+                top = sorted(stats.statements.items(), key=lambda item: item[1].elapsed, reverse=True)
+                for key, statement in top[:TRACE_CONFIG['top_statements']]:
+                    lines.append(
+                        f"    {statement.elapsed * 1000:9.1f} ms total, {statement.max_elapsed * 1000:8.1f} ms max, "
+                        f"{statement.executions}x, {statement.rows} rows: {key[:STATEMENT_WIDTH]}"
+                    )
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._actions.clear()
+            self.started = time.time()
+
+
+tracer = Tracer()
+
+
+def current_action():
+    return _current_action.get()
+
+
+@contextmanager
+def action(name):
+    """Counts the statements run inside the block (and in DB work it starts) under ``name``."""
+    if _current_action.get() is not None:
+        yield  # The outer action triggered this one; keep its name
+        return
+    token = _current_action.set(name)
+    tracer.begin_action(name)
+    try:
+        yield
+    finally:
+        _current_action.reset(token)
+
+
+def traced_action(name):
+    """Decorator form of ``action`` for window constructors and button handlers."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with action(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class TracingCursor:
+    """
+    Driver cursor wrapper. A statement's record stays open while its rows
+    are fetched and is closed by the last fetch, the next execute or
+    ``close()``, so fetch time and row counts are included.
+    """
+
+    _own = frozenset(("_cursor", "_tracer", "_pending"))
+
+    def __init__(self, cursor, tracer):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_tracer", tracer)
+        object.__setattr__(self, "_pending", None)
+
+    def _run(self, method, statement, args, kwargs, binds):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            result = getattr(self._cursor, method)(statement, *args, **kwargs)
+        except Exception:
+            self._tracer.record(current_action(), statement, binds, 0, 1, time.perf_counter() - started, True)
+            raise
+        # [action, statement, binds, rows fetched, elapsed]
+        object.__setattr__(self, "_pending", [current_action(), statement, binds, 0,
+                                              time.perf_counter() - started])
+        return self if result is self._cursor else result
+
+    def execute(self, statement, *args, **kwargs):
+        parameters = args[0] if args else (kwargs or None)
+        return self._run("execute", statement, args, kwargs, bind_count(parameters))
+
+    def executemany(self, statement, parameters, *args, **kwargs):
+        parameters = list(parameters) if not isinstance(parameters, (list, tuple, int)) else parameters
+        binds = parameters if isinstance(parameters, int) else bind_count(parameters, many=True)
+        return self._run("executemany", statement, (parameters,) + args, kwargs, binds)
+
+    def callproc(self, name, *args, **kwargs):
+        return self._run("callproc", name, args, kwargs, bind_count(args[0] if args else None))
+
+    def _fetched(self, started, rows, done):
+        pending = self._pending
+        if pending is not None:
+            pending[3] += rows
+            pending[4] += time.perf_counter() - started
+            if done:
+                self._finish()
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(started, row is not None, row is None)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._fetched(started, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def __iter__(self):
+        while True:
+            started = time.perf_counter()
+            row = self._cursor.fetchone()
+            self._fetched(started, row is not None, row is None)
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def _finish(self):
+        pending = self._pending
+        if pending is None:
+            return
+        object.__setattr__(self, "_pending", None)
+        action_name, statement, binds, rows, elapsed = pending
+        cursor = self._cursor
+        if not rows and cursor.description is None:
+            rows = max(getattr(cursor, "rowcount", 0) or 0, 0)  # DML: rows affected
+        self._tracer.record(action_name, statement, binds, rows, 1 + _fetch_round_trips(cursor, rows), elapsed)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        if name in self._own:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._cursor, name, value)  # arraysize, prefetchrows, ...
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def _fetch_round_trips(cursor, rows):
+    """Extra network round trips oracledb needs for ``rows`` fetched rows.
+
+    The first ``prefetchrows`` rows come back with the execute and the rest
+    in ``arraysize`` batches. SQLite is in-process, so it never has extra.
+    """
+    prefetch = getattr(cursor, "prefetchrows", None)
+    if prefetch is None or rows <= prefetch:
+        return 0
+    arraysize = max(getattr(cursor, "arraysize", 1) or 1, 1)
+    return -(-(rows - prefetch) // arraysize)
+
+
+def wrap_cursor(cursor):
+    """Returns ``cursor`` wrapped for tracing, or unchanged when tracing is off."""
+    if not TRACE_CONFIG['enabled']:
+        return cursor
+    return TracingCursor(cursor, tracer)
+
+
+def write_session_report():
+    """Appends the session summary to the trace log if anything was traced."""
+    if not any(stats['statements'] for stats in tracer.summary().values()):
+        return
+    _ensure_log_handler()
+    trace_log.info(tracer.report())
+
+
+atexit.register(write_session_report)